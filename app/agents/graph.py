@@ -1,18 +1,23 @@
 from __future__ import annotations
 
+import asyncio
 import os
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel
 from langchain_core.messages import SystemMessage, HumanMessage
 
 from app.tools import sleeper_tools
 from app.tools import web_tools
-from app.services import analysis
+from app.services import analysis, lineup
+from app.services import intent as intent_clf
+from app.services.fetch_plan import FetchPlan
 from app.services.logging import append_agent_log
+from app.services.prompt_context import build_context, count_tokens
 from app.services.llm_router import make_llm
 
 
@@ -24,6 +29,9 @@ class AgentState(BaseModel):
     answer: Optional[str] = None
     sources: List[Dict[str, Any]] = []
     timings: Dict[str, float] = {}
+    usage: Dict[str, int] = {}
+    # Set when the deadline cut synthesis short and the answer is the templated data summary
+    degraded: bool = False
 
 
 SYSTEM_PROMPT = (
@@ -39,51 +47,59 @@ SYNTH_PROMPT = (
 )
 
 
-def _llm():
-    return make_llm()
+# Per-request time budget for /api/ask; stages get whatever is left of it
+ASK_DEADLINE_S = float(os.getenv("ASK_DEADLINE_S", "15"))
+# Time fetch_context leaves for synthesize (at most half of what remains when fetch starts)
+SYNTH_RESERVE_S = float(os.getenv("ASK_SYNTH_RESERVE_S", "4"))
+# The classify LLM fallback may use at most this share of the remaining budget
+CLASSIFY_BUDGET_SHARE = 0.25
+# Token budget of the data summary returned when synthesis misses the deadline
+DEGRADED_CONTEXT_TOKENS = 600
 
 
-async def classify_intent(state: AgentState) -> AgentState:
+def _llm(stage: str = "synthesize"):
+    return make_llm(stage)
+
+
+def _deadline(config: Optional[RunnableConfig]) -> Optional[float]:
+    return ((config or {}).get("configurable") or {}).get("deadline")
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+async def classify_intent(state: AgentState, config: RunnableConfig) -> AgentState:
     t0 = time.perf_counter()
-    llm = _llm()
-    messages = [
-        SystemMessage(content=SYSTEM_PROMPT),
-        HumanMessage(content=f"Question: {state.question}\nRespond with only the intent label."),
-    ]
-    result = await llm.ainvoke(messages)
-    intent = (result.content or "").strip().lower()
-    mapping = {
-        "league": "league_info",
-        "league_info": "league_info",
-        "roster": "rosters",
-        "rosters": "rosters",
-        "matchup": "matchups",
-        "matchups": "matchups",
-        "player": "players_search",
-        "players_search": "players_search",
-        "trending": "trending",
-        "state": "nfl_state",
-        "nfl_state": "nfl_state",
-        "start": "start_sit",
-        "start_sit": "start_sit",
-        "trade": "trade",
-        "waiver": "waivers",
-        "waivers": "waivers",
-    }
-    for key, val in mapping.items():
-        if key in intent:
-            intent = val
-            break
-    if intent not in mapping.values():
-        intent = "rosters"
+    remaining = _remaining(_deadline(config))
+    # Local classifier first; only low-confidence questions pay for an LLM round trip
+    intent, confidence = intent_clf.classify_local(state.question)
+    timings: Dict[str, float] = {}
+    if confidence < intent_clf.CONFIDENCE_THRESHOLD:
+        llm_t0 = time.perf_counter()
+        llm = _llm("classify")
+        messages = [
+            SystemMessage(content=SYSTEM_PROMPT),
+            HumanMessage(content=f"Question: {state.question}\nRespond with only the intent label."),
+        ]
+        try:
+            result = await asyncio.wait_for(llm.ainvoke(messages), None if remaining is None else remaining * CLASSIFY_BUDGET_SHARE)
+            # An unparseable reply keeps the local guess too
+            intent = intent_clf.parse_label(result.content) or intent
+        except Exception:
+            # Timed out (don't spend the budget fetch and synthesize need) or failed: keep the local guess
+            pass
+        # Only present when the LLM fallback ran
+        timings["classify_llm_s"] = time.perf_counter() - llm_t0
     t1 = time.perf_counter()
+    timings["classify_s"] = t1 - t0
     return AgentState(
         question=state.question,
         preferences=state.preferences,
         intent=intent,
         data={},
         sources=[],
-        timings={"classify_s": t1 - t0},
+        timings=timings,
     )
 
 
@@ -121,57 +137,120 @@ def _estimate_roster_value(roster_players: List[str], player_catalog: Dict[str,
     return round(total, 1)
 
 
-async def fetch_context(state: AgentState) -> AgentState:
+def research_config(sleeper_client, deadline: Optional[float] = None) -> Dict[str, Any]:
+    """Per-invocation graph config binding the Sleeper client the tools should use.
+
+    deadline is a time.monotonic() instant the whole run must finish by.
+    """
+    return {"configurable": {"sleeper_client": sleeper_client, "deadline": deadline}}
+
+
+async def fetch_context(state: AgentState, config: RunnableConfig) -> AgentState:
+    client = ((config or {}).get("configurable") or {}).get("sleeper_client")
+    with sleeper_tools.use_sleeper_client(client):
+        return await _fetch_context(state, _deadline(config))
+
+
+def _find_my_team(rosters: List[Dict[str, Any]], prefs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    owner_name = (prefs.get("roster_owner_name") or "").strip().lower()
+    if not owner_name:
+        return None
+    for r in rosters or []:
+        if str(r.get("owner") or "").strip().lower() == owner_name:
+            return r
+    return None
+
+
+# Trending arguments per intent
+_TRENDING_ARGS = {
+    "trending": {"trend_type": "add", "lookback_hours": 48, "limit": 25},
+    "waivers": {"trend_type": "add", "lookback_hours": 72, "limit": 50},
+    "trade": {"trend_type": "add", "lookback_hours": 48, "limit": 50},
+}
+
+
+async def _fetch_context(state: AgentState, deadline: Optional[float] = None) -> AgentState:
     t0 = time.perf_counter()
     intent = state.intent or "rosters"
+    prefs = state.preferences or {}
     sources: List[Dict[str, Any]] = []
-    data: Dict[str, Any] = {"preferences": state.preferences or {}}
-
-    # League profile
-    league = await sleeper_tools.get_league_info.ainvoke({})
+    data: Dict[str, Any] = {"preferences": prefs}
+
+    # Each tool runs once per run, as soon as what it depends on is ready
+    needs_rosters = intent in {"rosters", "start_sit", "trade"} or bool(prefs.get("roster_owner_name"))
+    needs_my_team = needs_rosters and bool(prefs.get("roster_owner_name"))
+    needs_week = needs_my_team or intent in {"matchups", "nfl_state", "start_sit"}
+    needs_matchups = needs_my_team or intent in {"matchups", "start_sit"}
+    web_query: Optional[str] = None
+
+    # Under a deadline a slow tool leaves its section out instead of failing the answer
+    required = deadline is None
+    plan = FetchPlan()
+    plan.add("get_league_info", lambda: sleeper_tools.get_league_info.ainvoke({}), required=required)
+    if intent == "trending" and os.getenv("TAVILY_API_KEY"):
+        async def web_search(get_league_info: Dict[str, Any]) -> Any:
+            nonlocal web_query
+            web_query = f"NFL fantasy trending adds drops week {_compute_league_profile(get_league_info).get('season','')}"
+            return await web_tools.web_search.ainvoke({"query": web_query, "max_results": 5})
+        plan.add("web_search", web_search, deps=["get_league_info"], required=False)
+    if needs_rosters:
+        plan.add("get_rosters", lambda: sleeper_tools.get_rosters.ainvoke({}), required=required)
+    if needs_week:
+        plan.add("get_nfl_state", lambda: sleeper_tools.get_nfl_state.ainvoke({}), required=required)
+    if needs_matchups:
+        plan.add("get_matchups", lambda get_nfl_state: sleeper_tools.get_matchups.ainvoke({"week": int(get_nfl_state.get("week") or 1)}), deps=["get_nfl_state"], required=required)
+    if needs_my_team:
+        async def resolve_starters(get_rosters: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            my_team = _find_my_team(get_rosters, prefs)
+            if not my_team:
+                return []
+            return await sleeper_tools.resolve_players.ainvoke({"player_ids": my_team.get("starters", []) or []})
+        plan.add("resolve_players", resolve_starters, deps=["get_rosters"], required=required)
+    if intent == "players_search":
+        plan.add("search_players", lambda: sleeper_tools.search_players.ainvoke({"query": state.question, "limit": 10}), required=required)
+    if intent in _TRENDING_ARGS:
+        plan.add("get_trending_players", lambda: sleeper_tools.get_trending_players.ainvoke(_TRENDING_ARGS[intent]), required=required)
+    if intent == "start_sit":
+        plan.add("get_players", lambda: sleeper_tools.current_sleeper_client().get_players(), required=required)
+    fetch_deadline = None
+    if deadline is not None:
+        fetch_deadline = deadline - min(SYNTH_RESERVE_S, (_remaining(deadline) or 0.0) / 2)
+    fetched = await plan.run(deadline=fetch_deadline)
+    values = fetched.values
+    if fetched.partial:
+        data["unavailable"] = fetched.partial
+
+    league = values.get("get_league_info") or {}
     sources.append({"tool": "get_league_info", "args": {}})
-    league_profile = _compute_league_profile(league)
-    data["league_profile"] = league_profile
-
-    rosters: List[Dict[str, Any]] = []
-
-    # Web search only if Tavily is configured and intent is fresh-info
-    if intent in {"trending"} and os.getenv("TAVILY_API_KEY"):
-        query = f"NFL fantasy trending adds drops week {league_profile.get('season','')}"
-        web = await web_tools.web_search.ainvoke({"query": query, "max_results": 5})
-        if web:
-            data["web_results"] = web
-            sources.append({"tool": "web_search", "args": {"query": query}})
-            for item in (web or [])[:5]:
-                url = item.get("url") or item.get("link")
-                title = item.get("title") or url
-                if url:
-                    sources.append({"tool": "web", "url": url, "title": title})
-
-    # Determine if we need rosters now
-    needs_rosters = intent in {"rosters", "start_sit", "trade"} or (state.preferences or {}).get("roster_owner_name")
+    data["league_profile"] = _compute_league_profile(league)
+
+    web = values.get("web_search")
+    if web:
+        data["web_results"] = web
+        sources.append({"tool": "web_search", "args": {"query": web_query}})
+        for item in (web or [])[:5]:
+            url = item.get("url") or item.get("link")
+            title = item.get("title") or url
+            if url:
+                sources.append({"tool": "web", "url": url, "title": title})
+
+    rosters: List[Dict[str, Any]] = values.get("get_rosters") or []
     if needs_rosters:
-        rosters = await sleeper_tools.get_rosters.ainvoke({})
         data["rosters"] = rosters
         sources.append({"tool": "get_rosters", "args": {}})
+    state_info = values.get("get_nfl_state") or {}
+    week = int(state_info.get("week") or 1)
+    matchups = values.get("get_matchups") or []
+    if needs_week:
+        sources.append({"tool": "get_nfl_state", "args": {}})
+    if needs_matchups:
+        sources.append({"tool": "get_matchups", "args": {"week": week}})
 
     # My team snapshot
-    prefs = state.preferences or {}
-    owner_name = (prefs.get("roster_owner_name") or "").strip().lower()
-    my_team = None
-    if owner_name and rosters:
-        for r in rosters:
-            if str(r.get("owner") or "").strip().lower() == owner_name:
-                my_team = r
-                break
+    my_team = _find_my_team(rosters, prefs) if needs_my_team else None
     if my_team:
-        state_info = await sleeper_tools.get_nfl_state.ainvoke({})
-        week = int(state_info.get("week") or 1)
-        sources.append({"tool": "get_nfl_state", "args": {}})
-        matchups = await sleeper_tools.get_matchups.ainvoke({"week": week})
-        sources.append({"tool": "get_matchups", "args": {"week": week}})
         starters_ids = my_team.get("starters", []) or []
-        starters_named = await sleeper_tools.resolve_players.ainvoke({"player_ids": starters_ids})
+        starters_named = values.get("resolve_players") or []
         sources.append({"tool": "resolve_players", "args": {"count": len(starters_ids)}})
         proj_map: Dict[str, float] = {}
         for m in matchups:
@@ -196,51 +275,45 @@ async def fetch_context(state: AgentState) -> AgentState:
         }
 
     # Intent-specific additions
+    trending = values.get("get_trending_players") or []
+    if intent in _TRENDING_ARGS:
+        sources.append({"tool": "get_trending_players", "args": _TRENDING_ARGS[intent]})
     if intent == "matchups":
-        state_info = await sleeper_tools.get_nfl_state.ainvoke({})
-        week = int(state_info.get("week") or 1)
-        previews = await analysis.build_matchup_previews(await sleeper_tools.get_matchups.ainvoke({"week": week}))
-        data.update({"nfl_state": state_info, "matchup_previews": previews})
-        sources.extend([
-            {"tool": "get_nfl_state", "args": {}},
-            {"tool": "get_matchups", "args": {"week": week}},
-        ])
+        data.update({"nfl_state": state_info, "matchup_previews": await analysis.build_matchup_previews(matchups)})
 
     elif intent == "players_search":
-        frag = state.question
-        players = await sleeper_tools.search_players.ainvoke({"query": frag, "limit": 10})
-        data["players"] = players
-        sources.append({"tool": "search_players", "args": {"query": frag, "limit": 10}})
+        data["players"] = values.get("search_players") or []
+        sources.append({"tool": "search_players", "args": {"query": state.question, "limit": 10}})
 
     elif intent == "trending":
-        trending = await sleeper_tools.get_trending_players.ainvoke({"trend_type": "add", "lookback_hours": 48, "limit": 25})
         data["trending"] = trending
-        sources.append({"tool": "get_trending_players", "args": {"trend_type": "add", "lookback_hours": 48, "limit": 25}})
 
     elif intent == "nfl_state":
-        state_info = await sleeper_tools.get_nfl_state.ainvoke({})
         data["nfl_state"] = state_info
-        sources.append({"tool": "get_nfl_state", "args": {}})
 
     elif intent == "waivers":
-        trending = await sleeper_tools.get_trending_players.ainvoke({"trend_type": "add", "lookback_hours": 72, "limit": 50})
-        waivers = await analysis.recommend_waivers(trending, limit=12)
-        data["waiver_recommendations"] = waivers
-        sources.append({"tool": "get_trending_players", "args": {"trend_type": "add", "lookback_hours": 72, "limit": 50}})
-
-    elif intent in {"start_sit", "trade"}:
-        if rosters:
-            data["rosters"] = rosters
-        if intent == "start_sit":
-            data["start_sit"] = await analysis.suggest_start_sit(rosters or [])
-        else:
-            trending = await sleeper_tools.get_trending_players.ainvoke({"trend_type": "add", "lookback_hours": 48, "limit": 50})
-            data["trade_suggestions"] = await analysis.suggest_trade_targets(rosters or [], trending)
-            sources.append({"tool": "get_trending_players", "args": {"trend_type": "add", "lookback_hours": 48, "limit": 50}})
+        data["waiver_recommendations"] = await analysis.recommend_waivers(trending, limit=12)
+
+    elif intent == "start_sit":
+        client = sleeper_tools.current_sleeper_client()
+        data["start_sit"] = await analysis.suggest_start_sit(
+            rosters,
+            points_by_roster=lineup.points_by_roster(matchups),
+            roster_positions=league.get("roster_positions") or [],
+            catalog=values.get("get_players"),
+            week=week,
+            points_version=client.data_version(f"matchups:{client.default_league_id}:{week}"),
+        )
+
+    elif intent == "trade":
+        data["trade_suggestions"] = await analysis.suggest_trade_targets(rosters, trending)
 
     t1 = time.perf_counter()
     timings = dict(state.timings)
     timings["fetch_s"] = t1 - t0
+    # Per-tool wall time inside the fan-out
+    for tool_name, seconds in fetched.timings.items():
+        timings[f"tool_{tool_name}_s"] = seconds
     return AgentState(
         question=state.question,
         preferences=state.preferences,
@@ -251,36 +324,75 @@ async def fetch_context(state: AgentState) -> AgentState:
     )
 
 
-async def synthesize(state: AgentState) -> AgentState:
+def degraded_answer(intent: Optional[str], data: Dict[str, Any], preferences: Optional[Dict[str, Any]] = None, catalog: Any = None, timed_out: bool = True) -> str:
+    """Templated answer from already-fetched data, used when synthesis times out or fails."""
+    context, _ = build_context(intent, data, preferences, catalog, budget=DEGRADED_CONTEXT_TOKENS)
+    lines = [line for line in context.splitlines()[1:] if not line.startswith(("Preferences:", "User profile:"))]
+    when = " in time" if timed_out else " right now"
+    if not lines:
+        return f"Sorry, I couldn't put an answer together{when}. Please try again in a moment."
+    return f"I couldn't finish the full analysis{when}, so here is the data I pulled for your question:\n\n" + "\n".join(lines)
+
+
+async def synthesize(state: AgentState, config: RunnableConfig) -> AgentState:
+    client = ((config or {}).get("configurable") or {}).get("sleeper_client")
+    with sleeper_tools.use_sleeper_client(client):
+        return await _synthesize(state, _deadline(config))
+
+
+async def _synthesize(state: AgentState, deadline: Optional[float] = None) -> AgentState:
     t0 = time.perf_counter()
-    llm = _llm()
-    context_lines = [f"Intent: {state.intent}"]
-    prefs = state.preferences or {}
-    if prefs:
-        context_lines.append(f"Preferences: {prefs}")
-    for k, v in state.data.items():
-        snippet = str(v)
-        if len(snippet) > 4000:
-            snippet = snippet[:4000] + "..."
-        context_lines.append(f"{k}: {snippet}")
-    context = "\n\n".join(context_lines)
+    try:
+        # Usually already resident; only used to put names on player_ids
+        catalog = await asyncio.wait_for(sleeper_tools.current_sleeper_client().get_players(), _remaining(deadline))
+    except Exception:
+        catalog = None
+    context, usage = build_context(state.intent, state.data, state.preferences, catalog)
+    human = f"Context:\n{context}\n\nQuestion: {state.question}"
+    usage["prompt_tokens"] = count_tokens(SYNTH_PROMPT) + count_tokens(human)
 
     messages = [
         SystemMessage(content=SYNTH_PROMPT),
-        HumanMessage(content=f"Context:\n{context}\n\nQuestion: {state.question}"),
+        HumanMessage(content=human),
     ]
-    result = await llm.ainvoke(messages)
+    # Stream so graph.astream_events() callers can forward tokens as they arrive
+    parts: List[str] = []
+    first_token_s: Optional[float] = None
+
+    async def consume() -> None:
+        nonlocal first_token_s
+        async for chunk in _llm().astream(messages):
+            if chunk.content and first_token_s is None:
+                first_token_s = time.perf_counter() - t0
+            parts.append(chunk.content or "")
+
+    degraded = False
+    error: Optional[str] = None
+    try:
+        await asyncio.wait_for(consume(), _remaining(deadline))
+    except asyncio.TimeoutError:
+        degraded = True
+    except Exception as e:
+        # Every provider failed (or the stream broke): answer from the data instead of a 500
+        degraded = True
+        error = f"{type(e).__name__}: {e}"
     t1 = time.perf_counter()
     timings = dict(state.timings)
     timings["synthesize_s"] = t1 - t0
+    if first_token_s is not None:
+        timings["synthesize_first_token_s"] = first_token_s
 
-    answer = result.content or ""
+    answer = "".join(parts)
+    if degraded:
+        # Anything already streamed stays; the data summary follows it
+        answer = (answer + " …\n\n" if answer else "") + degraded_answer(state.intent, state.data, state.preferences, catalog, timed_out=error is None)
     append_agent_log(
         question=state.question,
         intent=state.intent,
         preferences=state.preferences,
         sources=state.sources,
         timings=timings,
+        meta={"usage": usage, "degraded": degraded, **({"error": error} if error else {})},
     )
 
     return AgentState(
@@ -291,11 +403,50 @@ async def synthesize(state: AgentState) -> AgentState:
         answer=answer,
         sources=state.sources,
         timings=timings,
+        usage=usage,
+        degraded=degraded,
     )
 
 
-def create_research_graph(sleeper_client) -> Any:
-    sleeper_tools.set_sleeper_client(sleeper_client)
+async def stream_research(graph: Any, inputs: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """Run the graph, yielding ("stage", info) as classify/fetch finish, ("token", text) for each
+    synthesize token, and finally ("result", state_dict) shaped like graph.ainvoke()'s return.
+
+    A degraded answer yields a {"stage": "degraded"} event and its data summary as one more token.
+    """
+    result: Dict[str, Any] = {}
+    streamed: List[str] = []
+    async for event in graph.astream_events(inputs, config=config, version="v2"):
+        kind = event["event"]
+        node = (event.get("metadata") or {}).get("langgraph_node")
+        if kind == "on_chat_model_stream" and node == "synthesize":
+            text = event["data"]["chunk"].content
+            if text:
+                streamed.append(text)
+                yield "token", text
+        elif kind == "on_chain_end" and event["name"] == node and node in ("classify", "fetch", "synthesize"):
+            output = event["data"].get("output")
+            if isinstance(output, AgentState):
+                output = output.model_dump()
+            if not isinstance(output, dict):
+                continue
+            result.update(output)
+            if node == "classify":
+                yield "stage", {"stage": "classify", "intent": output.get("intent")}
+            elif node == "fetch":
+                yield "stage", {"stage": "fetch", "data_keys": list((output.get("data") or {}).keys())}
+            elif output.get("degraded"):
+                yield "stage", {"stage": "degraded"}
+                answer, sent = output.get("answer") or "", "".join(streamed)
+                if answer.startswith(sent) and len(answer) > len(sent):
+                    yield "token", answer[len(sent):]
+    yield "result", result
+
+
+def create_research_graph(sleeper_client=None) -> Any:
+    """Compile the research graph once; pass research_config(client) per ainvoke to pick a league."""
+    if sleeper_client is not None:
+        sleeper_tools.set_sleeper_client(sleeper_client)
 
     graph = StateGraph(AgentState)
     graph.add_node("classify", classify_intent)
@@ -1,5 +1,7 @@
 import os
 import json
+import time
+import asyncio
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, Query, Response, Depends
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,16 +10,23 @@ from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse, Red
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import Any, AsyncIterator, Dict, List
 
-from app.agents.graph import create_research_graph
-from app.services.sleeper_client import SleeperClient
+from app.agents.graph import ASK_DEADLINE_S, create_research_graph, research_config, stream_research
 from app.services.memory import MemoryStore, UserPreferences
+from app.services.answer_cache import AnswerCache
+from app.services.append_writer import get_append_writer
+from app.services import analysis, lineup, season_sim
+from app.services.cache_backends import get_default_backend
+from app.services.fetch_plan import FetchPlan
+from app.services.llm_router import get_llm_router
 from app.services.providers import ProviderRouter, LeagueProvider
 from app.services.yahoo_client import YahooClient
-from app.services.news_aggregator import gather_all_news, filter_news_by_names
+from app.services.news_aggregator import filter_news_by_names
+from app.services.news_ingest import get_news_ingester
+from app.services.prompt_context import warm_encoding
 from app.services.auth import verify_jwt_and_get_user_id
-from app.services.user_memory import append_chat, append_event, build_profile_summary
+from app.services.user_memory import aappend_chat, aappend_event, abuild_profile_summary
 
 load_dotenv()
 
@@ -25,6 +34,17 @@ LEAGUE_ID = os.getenv("SLEEPER_LEAGUE_ID", "1180244317552857088")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
+
+class _GZipExceptStreams(GZipMiddleware):
+    """gzip buffers small writes, which would hold SSE tokens back; event streams go out uncompressed."""
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and scope["path"].endswith("/stream"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
 app = FastAPI(title="Fantasy Research Agent")
 app.add_middleware(
     CORSMiddleware,
@@ -33,7 +53,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-app.add_middleware(GZipMiddleware, minimum_size=500)
+app.add_middleware(_GZipExceptStreams, minimum_size=500)
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
 
@@ -41,6 +61,7 @@ provider_router = ProviderRouter(default_league_id=LEAGUE_ID)
 sleeper_client = provider_router.sleeper
 research_graph = create_research_graph(sleeper_client=sleeper_client)
 memory_store = MemoryStore()
+news_ingester = get_news_ingester()
 
 YAHOO_ENABLED = (
     os.getenv("YAHOO_ENABLED", "false").lower() == "true" or (
@@ -48,8 +69,34 @@ YAHOO_ENABLED = (
     )
 )
 
-# Simple response cache
-_RESPONSE_CACHE: Dict[str, Dict[str, Any]] = {}
+@app.on_event("startup")
+async def warm_caches():
+    # Serve the players catalog from the local snapshot immediately; refresh happens in the background
+    await sleeper_client.warm_start()
+    # tiktoken's BPE file loads (and may download) in a thread instead of during the first synthesis
+    warm_encoding()
+    # Keep NFL state, rosters and current-week matchups fresh so requests rarely wait on Sleeper
+    sleeper_client.start_background_refresh()
+    # Poll news feeds in the background, tagging items with player_ids; /api/news and the cheatsheet read the local store
+    news_ingester.start(catalog_loader=sleeper_client.get_players)
+
+
+@app.on_event("shutdown")
+async def close_clients():
+    # Flush queued log, chat and event lines before anything else goes away
+    await get_append_writer().aclose()
+    await news_ingester.aclose()
+    await provider_router.aclose()
+    await get_default_backend().close()
+    memory_store.close()
+
+
+# Answers keyed by normalized question + team prefs, invalidated when league data changes
+answer_cache = AnswerCache(
+    max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "512")),
+    ttl_s=float(os.getenv("ANSWER_CACHE_TTL_S", "900")),
+    backend=get_default_backend(),
+)
 
 
 class QueryBody(BaseModel):
@@ -93,6 +140,13 @@ async def api_health():
         "openai_configured": bool(OPENAI_API_KEY),
         "model": OPENAI_MODEL,
         "providers": [LeagueProvider.SLEEPER] + ([LeagueProvider.YAHOO] if YAHOO_ENABLED else []),
+        "sleeper_cache": sleeper_client.cache_stats(),
+        "sleeper_league_clients": len(provider_router.sleeper_leagues),
+        "answer_cache": answer_cache.cache_stats(),
+        "memory": memory_store.cache_stats(),
+        "writer": get_append_writer().cache_stats(),
+        "news": news_ingester.stats(),
+        "llm": get_llm_router().snapshot(),
     }
 
 
@@ -109,9 +163,7 @@ async def app_page(request: Request):
 @app.get("/api/rosters")
 async def api_rosters(league_id: str | None = None, provider: str | None = LeagueProvider.SLEEPER):
     try:
-        client = provider_router.get_client(provider or LeagueProvider.SLEEPER)
-        if provider == LeagueProvider.SLEEPER and league_id:
-            client = SleeperClient(default_league_id=league_id)
+        client = provider_router.get_client(provider or LeagueProvider.SLEEPER, league_id=league_id)
         return await client.build_roster_summaries(league_id=league_id)
     except Exception as e:  # pragma: no cover
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -120,7 +172,7 @@ async def api_rosters(league_id: str | None = None, provider: str | None = Leagu
 @app.get("/api/rosters/{roster_id}")
 async def api_roster_detail(roster_id: int, league_id: str | None = None, provider: str | None = LeagueProvider.SLEEPER):
     try:
-        client = provider_router.get_client(provider or LeagueProvider.SLEEPER)
+        client = provider_router.get_client(provider or LeagueProvider.SLEEPER, league_id=league_id)
         return await client.build_roster_detail(roster_id, league_id=league_id)
     except Exception as e:  # pragma: no cover
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -129,7 +181,7 @@ async def api_roster_detail(roster_id: int, league_id: str | None = None, provid
 @app.get("/api/projections")
 async def api_projections(week: int | None = None, league_id: str | None = None, provider: str | None = LeagueProvider.SLEEPER):
     try:
-        client = provider_router.get_client(provider or LeagueProvider.SLEEPER)
+        client = provider_router.get_client(provider or LeagueProvider.SLEEPER, league_id=league_id)
         if week is None and hasattr(client, "get_nfl_state"):
             state = await client.get_nfl_state()
             week = int(state.get("week") or 1)
@@ -139,6 +191,22 @@ async def api_projections(week: int | None = None, league_id: str | None = None,
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+NEWS_FIRST_POLL_WAIT_S = float(os.getenv("NEWS_FIRST_POLL_WAIT_S", "5"))
+
+
+async def _roster_news(player_ids, catalog, lookback_hours: float | None = None, wait_s: float = 0.0) -> List[Dict[str, Any]]:
+    if news_ingester.tagging:
+        # Items were tagged with player_ids at ingest
+        return await news_ingester.player_news(player_ids, lookback_hours=lookback_hours, wait_s=wait_s)
+    items = await news_ingester.get_items(lookback_hours=lookback_hours, wait_s=wait_s)
+    names = []
+    for pid in player_ids:
+        p = catalog.get(pid)
+        if p:
+            names.append(p.get('full_name') or ((p.get('first_name') or '') + ' ' + (p.get('last_name') or '')).strip())
+    return filter_news_by_names(items, names)
+
+
 @app.get("/api/news")
 async def api_news(lookback_hours: int = 48, limit: int = 25, provider: str | None = LeagueProvider.SLEEPER, user_id: str = "default", league_id: str | None = None):
     try:
@@ -148,22 +216,16 @@ async def api_news(lookback_hours: int = 48, limit: int = 25, provider: str | No
             user_id = user_from_token
         except Exception:
             user_id = user_id or "default"
-        prefs = memory_store.get_preferences(user_id=user_id)
+        prefs = await memory_store.aget_preferences(user_id=user_id)
         if not prefs.roster_owner_name:
             return JSONResponse(status_code=400, content={"error": "Select your team first (My Team) to enable the news feed."})
-        client = provider_router.get_client(provider or LeagueProvider.SLEEPER)
+        client = provider_router.get_client(provider or LeagueProvider.SLEEPER, league_id=league_id)
         rosters = await client.build_roster_summaries(league_id=league_id)
         my_roster = next((r for r in rosters if (r.get('owner') or '').lower() == (prefs.roster_owner_name or '').lower()), None)
         team_players = set((my_roster or {}).get('players', []) or [])
         catalog = await client.get_players() if hasattr(client, 'get_players') else {}
-        names = []
-        for pid in team_players:
-            p = catalog.get(pid)
-            if p:
-                names.append(p.get('full_name') or ((p.get('first_name') or '') + ' ' + (p.get('last_name') or '')).strip())
-        # Gather many sources and filter to roster names
-        items = await gather_all_news()
-        filtered = filter_news_by_names(items, names)
+        # Items come from the background ingester; only the very first request after startup waits on it
+        filtered = await _roster_news(team_players, catalog, lookback_hours=lookback_hours, wait_s=NEWS_FIRST_POLL_WAIT_S)
         # Only link-based items with TL;DR
         filtered = [{"title": it.get("title"), "link": it.get("link"), "tldr": it.get("tldr"), "source": it.get("source"), "domain": it.get("domain") } for it in filtered if it.get("link")]
         return {"rss": filtered[: limit]}
@@ -184,24 +246,13 @@ async def options_my_team():
 
 @app.get("/api/my-team")
 async def set_my_team_get(owner_name: str | None = None, roster_id: int | None = None, user_id: str = "default"):
-    prefs = memory_store.get_preferences(user_id=user_id or "default")
-    if owner_name:
-        prefs.roster_owner_name = owner_name
-    if roster_id is not None:
-        setattr(prefs, "roster_id", roster_id)
-    memory_store.set_preferences(prefs, user_id=user_id or "default")
+    await memory_store.aupdate_preferences(user_id or "default", roster_owner_name=owner_name or None, roster_id=roster_id)
     return {"ok": True}
 
 
 @app.post("/api/my-team")
 async def set_my_team(body: SetTeamBody):
-    prefs = memory_store.get_preferences(user_id=body.user_id or "default")
-    if body.owner_name:
-        prefs.roster_owner_name = body.owner_name
-    if body.roster_id is not None:
-        # store roster_id as an ad-hoc field on prefs
-        setattr(prefs, "roster_id", body.roster_id)
-    memory_store.set_preferences(prefs, user_id=body.user_id or "default")
+    await memory_store.aupdate_preferences(body.user_id or "default", roster_owner_name=body.owner_name or None, roster_id=body.roster_id)
     return {"ok": True}
 
 
@@ -212,7 +263,7 @@ async def add_event(kind: str, payload: str = "{}", user_id: str = "default"):
             user_id = verify_jwt_and_get_user_id()
         except Exception:
             user_id = user_id or "default"
-        append_event(user_id, kind=kind, payload=json.loads(payload))
+        await aappend_event(user_id, kind=kind, payload=json.loads(payload))
         return {"ok": True}
     except Exception as e:
         return JSONResponse(status_code=400, content={"error": str(e)})
@@ -225,12 +276,57 @@ async def get_profile(user_id: str = "default"):
             user_id = verify_jwt_and_get_user_id()
         except Exception:
             user_id = user_id or "default"
-        prefs = memory_store.get_preferences(user_id=user_id).model_dump(exclude_none=True)
-        return {"user_id": user_id, "summary": build_profile_summary(user_id, prefs)}
+        prefs = (await memory_store.aget_preferences(user_id=user_id)).model_dump(exclude_none=True)
+        return {"user_id": user_id, "summary": await abuild_profile_summary(user_id, prefs)}
     except Exception as e:
         return JSONResponse(status_code=400, content={"error": str(e)})
 
 
+# Past the graph's own deadline, how long /api/ask waits before answering without it
+ASK_DEADLINE_GRACE_S = 1.0
+# Longest the answer-cache version check may take out of the ask budget
+ASK_VERSIONS_TIMEOUT_S = 2.0
+TIMED_OUT_ANSWER = "Sorry, I couldn't put an answer together in time. Please try again in a moment."
+
+
+def _left(deadline: float) -> float:
+    return max(0.0, deadline - time.monotonic())
+
+
+async def _ask_versions(client: Any, league_id: str | None, deadline: float) -> Dict[str, int]:
+    try:
+        return await asyncio.wait_for(client.data_versions(league_id), min(ASK_VERSIONS_TIMEOUT_S, _left(deadline)))
+    except Exception:
+        # Sleeper unreachable or slow: still answer, but uncached (callers skip the cache on {})
+        return {}
+
+
+async def _until(items: AsyncIterator[Any], deadline: float) -> AsyncIterator[Any]:
+    """Re-yield items, raising asyncio.TimeoutError once deadline passes."""
+    it = items.__aiter__()
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(it.__anext__(), _left(deadline))
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        await it.aclose()
+
+
+def _sse(data: Any, event: str | None = None) -> str:
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data)}\n\n"
+
+
+def _answer_sources(intent: str | None, sources: List[Any] | None) -> List[Dict[str, Any]]:
+    # Only fresh-info intents surface their links
+    if intent not in ("trending", "news"):
+        return []
+    return [s for s in (sources or []) if isinstance(s, dict) and s.get("url")]
+
+
 @app.post("/api/ask")
 async def ask_agent(body: QueryBody):
     try:
@@ -240,28 +336,35 @@ async def ask_agent(body: QueryBody):
             user_id = verify_jwt_and_get_user_id()
         except Exception:
             user_id = body.user_id or "default"
-        prefs = memory_store.get_preferences(user_id=user_id).model_dump(exclude_none=True)
-        profile = build_profile_summary(user_id, prefs)
-        cache_key = json.dumps({"q": body.question, "prefs": prefs, "profile": profile, "league": body.league_id}, sort_keys=True)
-        global _RESPONSE_CACHE
-        if cache_key in _RESPONSE_CACHE:
-            return _RESPONSE_CACHE[cache_key]
-        append_chat(user_id, role="user", content=body.question)
-        if body.league_id:
-            temp_client = SleeperClient(default_league_id=body.league_id)
-            temp_graph = create_research_graph(sleeper_client=temp_client)
-            result = await temp_graph.ainvoke({"question": body.question, "preferences": {**prefs, "profile": profile}})
-        else:
-            result = await research_graph.ainvoke({"question": body.question, "preferences": {**prefs, "profile": profile}})
-        intent = result.get("intent")
-        sources = result.get("sources", [])
-        if intent not in ("trending", "news"):
-            sources = []
+        deadline = time.monotonic() + ASK_DEADLINE_S
+        prefs = (await memory_store.aget_preferences(user_id=user_id)).model_dump(exclude_none=True)
+        profile = await abuild_profile_summary(user_id, prefs)
+        client = provider_router.get_client(LeagueProvider.SLEEPER, league_id=body.league_id)
+        versions = await _ask_versions(client, body.league_id, deadline)
+        cache_key = answer_cache.make_key(body.question, body.league_id or LEAGUE_ID, prefs)
+
+        # Both turns are recorded whether the answer is computed, cached or shared with a concurrent request
+        await aappend_chat(user_id, role="user", content=body.question)
+
+        async def run() -> Dict[str, Any]:
+            inputs = {"question": body.question, "preferences": {**prefs, "profile": profile}}
+            try:
+                # Stages stop at the deadline themselves; this only catches one that doesn't
+                result = await asyncio.wait_for(research_graph.ainvoke(inputs, config=research_config(client, deadline)), _left(deadline) + ASK_DEADLINE_GRACE_S)
+            except asyncio.TimeoutError:
+                result = {"answer": TIMED_OUT_ANSWER, "degraded": True}
+            intent = result.get("intent")
+            sources = _answer_sources(intent, result.get("sources"))
+            response = {"answer": result.get("answer", "No answer produced."), "sources": sources, "intent": intent, "data_keys": list((result.get("data") or {}).keys()), "usage": result.get("usage") or {}, "degraded": bool(result.get("degraded"))}
+            return response
+
+        if not versions:
+            # Without versions an entry couldn't be checked for staleness later, so skip the cache
+            response = await run()
         else:
-            sources = [s for s in (sources or []) if isinstance(s, dict) and s.get("url")]
-        response = {"answer": result.get("answer", "No answer produced."), "sources": sources, "intent": intent, "data_keys": list((result.get("data") or {}).keys())}
-        append_chat(user_id, role="assistant", content=response["answer"])
-        _RESPONSE_CACHE[cache_key] = response
+            # Degraded answers are served once and recomputed next time
+            response, _cached = await answer_cache.get_or_compute(cache_key, versions, run, cacheable=lambda r: not r.get("degraded"))
+        await aappend_chat(user_id, role="assistant", content=response["answer"])
         return response
     except Exception as e:  # pragma: no cover
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -272,39 +375,53 @@ async def ask_agent_stream(question: str, user_id: str = "default", league_id: s
     async def event_gen():
         try:
             if not OPENAI_API_KEY:
-                yield "event: error\n"
-                yield f"data: {json.dumps({'error': 'OPENAI_API_KEY is not configured on the server.'})}\n\n"
+                yield _sse({'error': 'OPENAI_API_KEY is not configured on the server.'}, "error")
+                yield "event: end\n\n"
+                return
+            deadline = time.monotonic() + ASK_DEADLINE_S
+            prefs = (await memory_store.aget_preferences(user_id=user_id)).model_dump(exclude_none=True)
+            yield _sse({'status': 'planning'})
+            client = provider_router.get_client(LeagueProvider.SLEEPER, league_id=league_id)
+            versions = await _ask_versions(client, league_id, deadline)
+            cache_key = answer_cache.make_key(question, league_id or LEAGUE_ID, prefs)
+            cached = answer_cache.lookup(cache_key, versions) if versions else None
+            if cached is not None:
+                await aappend_chat(user_id, role="user", content=question)
+                await aappend_chat(user_id, role="assistant", content=cached.get("answer", ""))
+                yield _sse({'stage': 'cached', 'intent': cached.get("intent")}, "stage")
+                yield _sse({'token': cached.get("answer", "")})
+                yield _sse(cached.get("sources", []), "sources")
                 yield "event: end\n\n"
                 return
-            prefs = memory_store.get_preferences(user_id=user_id).model_dump(exclude_none=True)
-            yield f"data: {json.dumps({'status': 'planning'})}\n\n"
-            if league_id:
-                temp_client = SleeperClient(default_league_id=league_id)
-                temp_graph = create_research_graph(sleeper_client=temp_client)
-                result = await temp_graph.ainvoke({"question": question, "preferences": prefs})
-            else:
-                result = await research_graph.ainvoke({"question": question, "preferences": prefs})
-            answer = result.get("answer", "")
+            await aappend_chat(user_id, role="user", content=question)
+            profile = await abuild_profile_summary(user_id, prefs)
+            result: Dict[str, Any] = {}
+            inputs = {"question": question, "preferences": {**prefs, "profile": profile}}
+            try:
+                async for kind, value in _until(stream_research(research_graph, inputs, research_config(client, deadline)), deadline + ASK_DEADLINE_GRACE_S):
+                    if kind == "stage":
+                        yield _sse(value, "stage")
+                    elif kind == "token":
+                        yield _sse({'token': value})
+                    else:
+                        result = value
+            except asyncio.TimeoutError:
+                result = {"intent": result.get("intent"), "answer": TIMED_OUT_ANSWER, "degraded": True}
+                yield _sse({'stage': 'degraded'}, "stage")
+                yield _sse({'token': TIMED_OUT_ANSWER})
             intent = result.get("intent")
-            sources = result.get("sources", [])
-            # Filter sources same as JSON path
-            if intent not in ("trending", "news"):
-                sources = []
-            else:
-                sources = [s for s in (sources or []) if isinstance(s, dict) and s.get("url")]
-            chunk_size = 200
-            for i in range(0, len(answer), chunk_size):
-                chunk = {"token": answer[i:i+chunk_size]}
-                yield f"data: {json.dumps(chunk)}\n\n"
-            yield f"event: sources\n"
-            yield f"data: {json.dumps(sources)}\n\n"
+            sources = _answer_sources(intent, result.get("sources"))
+            yield _sse(sources, "sources")
             yield "event: end\n\n"
+            response = {"answer": result.get("answer") or "No answer produced.", "sources": sources, "intent": intent, "data_keys": list((result.get("data") or {}).keys()), "usage": result.get("usage") or {}, "degraded": bool(result.get("degraded"))}
+            await aappend_chat(user_id, role="assistant", content=response["answer"])
+            if versions and not response["degraded"]:
+                await answer_cache.put(cache_key, versions, response)
         except Exception as e:  # pragma: no cover
-            yield "event: error\n"
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield _sse({'error': str(e)}, "error")
             yield "event: end\n\n"
 
-    return StreamingResponse(event_gen(), media_type="text/event-stream")
+    return StreamingResponse(event_gen(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @app.get("/api/me")
@@ -319,7 +436,7 @@ async def get_prefs(user_id: str = "default"):
         user_id = user_from_token
     except Exception:
         user_id = user_id or "default"
-    return memory_store.get_preferences(user_id=user_id).model_dump(exclude_none=True)
+    return (await memory_store.aget_preferences(user_id=user_id)).model_dump(exclude_none=True)
 
 
 class PrefsBody(BaseModel):
@@ -340,7 +457,7 @@ async def set_prefs(body: PrefsBody):
         roster_owner_name=body.roster_owner_name,
         risk_tolerance=body.risk_tolerance,
     )
-    memory_store.set_preferences(prefs, user_id=user_id)
+    await memory_store.aset_preferences(prefs, user_id=user_id)
     return {"ok": True}
 
 
@@ -349,22 +466,11 @@ async def api_players_search(q: str, limit: int = 10, provider: str | None = Lea
     try:
         client = provider_router.get_client(provider or LeagueProvider.SLEEPER)
         # Sleeper-only for now
-        if hasattr(client, "get_players"):
-            catalog = await client.get_players()
-            query = (q or "").lower()
-            results: List[Dict[str, Any]] = []
-            for pid, p in catalog.items():
-                name = (p.get("full_name") or ((p.get("first_name") or "") + " " + (p.get("last_name") or "")).strip()).lower()
-                if query in name:
-                    results.append({
-                        "player_id": pid,
-                        "full_name": p.get("full_name") or name.title(),
-                        "position": p.get("position"),
-                        "team": p.get("team"),
-                    })
-                if len(results) >= limit:
-                    break
-            return results
+        if hasattr(client, "search_players"):
+            return [
+                {"player_id": p.player_id, "full_name": p.name, "position": p.position, "team": p.team}
+                for p in await client.search_players(q, limit=limit)
+            ]
         return []
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -383,13 +489,22 @@ async def api_trade_evaluate(body: TradeEvalBody):
         client = provider_router.get_client(body.provider or LeagueProvider.SLEEPER)
         # Build simple value map from players catalog
         catalog = await client.get_players() if hasattr(client, "get_players") else {}
+        # Entries may be player_ids or pasted names; resolve the names in one batch
+        teamA = list(body.teamA or [])
+        teamB = list(body.teamB or [])
+        names = [x for x in teamA + teamB if x not in catalog]
+        if names and hasattr(client, "resolve_player_names"):
+            matches = await client.resolve_player_names(names, score_cutoff=80)
+            by_name = {n: m["player_id"] for n, m in zip(names, matches) if m}
+            teamA = [by_name.get(x, x) for x in teamA]
+            teamB = [by_name.get(x, x) for x in teamB]
         pos_base = {"QB": 60, "RB": 70, "WR": 60, "TE": 45, "K": 10, "DEF": 15}
         def value_for(pid: str) -> float:
             p = catalog.get(pid, {})
             v = float(pos_base.get(p.get("position"), 25))
             return v
-        totalA = sum(value_for(pid) for pid in (body.teamA or []))
-        totalB = sum(value_for(pid) for pid in (body.teamB or []))
+        totalA = sum(value_for(pid) for pid in teamA)
+        totalB = sum(value_for(pid) for pid in teamB)
         diff = round(totalA - totalB, 1)
         verdict = "Fair"
         if diff > 10:
@@ -405,16 +520,17 @@ async def api_trade_evaluate(body: TradeEvalBody):
 @app.get("/api/my-team/week")
 async def my_team_week(week: int | None = None, league_id: str | None = None, user_id: str = "default"):
     try:
+        client = provider_router.get_client(LeagueProvider.SLEEPER, league_id=league_id)
         # Determine week
         if week is None:
-            state = await sleeper_client.get_nfl_state()
+            state = await client.get_nfl_state()
             week = int(state.get("week") or 1)
         # Determine my team roster_id
-        prefs = memory_store.get_preferences(user_id=user_id)
+        prefs = await memory_store.aget_preferences(user_id=user_id)
         roster_id = getattr(prefs, 'roster_id', None)
         if roster_id is None:
             # try lookup by owner name
-            rosters = await sleeper_client.build_roster_summaries(league_id=league_id)
+            rosters = await client.build_roster_summaries(league_id=league_id)
             owner_name = (prefs.roster_owner_name or '').lower()
             for r in rosters:
                 if (r.get('owner') or '').lower() == owner_name:
@@ -422,7 +538,7 @@ async def my_team_week(week: int | None = None, league_id: str | None = None, us
                     break
         if roster_id is None:
             return JSONResponse(status_code=400, content={"error": "Select your team first in the roster drawer."})
-        detail = await sleeper_client.build_roster_detail_for_week(roster_id=int(roster_id), week=int(week), league_id=league_id)
+        detail = await client.build_roster_detail_for_week(roster_id=int(roster_id), week=int(week), league_id=league_id)
         return detail
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -436,84 +552,53 @@ async def api_state():
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
-def _eligible_positions(slot: str) -> set:
-    s = slot.upper()
-    if s in {"QB","RB","WR","TE","K","DEF"}:
-        return {s}
-    if s in {"FLEX","WRRB","WRRBTE"}:
-        return {"RB","WR","TE"}
-    if s in {"SUPER_FLEX","QBRBWRTE"}:
-        return {"QB","RB","WR","TE"}
-    return set()
-
-def _optimal_projected_total(roster: Dict[str, Any], players_points: Dict[str, float], roster_positions: List[str], catalog: Dict[str, Any]) -> float:
-    # Build candidate list: (player_id, position, projected_points)
-    candidates = []
-    for pid in (roster.get('players') or []):
-        p = catalog.get(pid) or {}
-        pos = (p.get('position') or '').upper()
-        pts = float(players_points.get(pid) or 0.0)
-        candidates.append({"player_id": pid, "pos": pos, "pts": pts})
-    used = set()
-    total = 0.0
-    for slot in roster_positions:
-        if slot.upper() == 'BN':
-            continue
-        eligible = _eligible_positions(slot)
-        best = None; best_pts = -1.0
-        for c in candidates:
-            if c['player_id'] in used:
-                continue
-            if c['pos'] in eligible and c['pts'] > best_pts:
-                best_pts = c['pts']; best = c
-        if best is not None:
-            used.add(best['player_id'])
-            total += best['pts']
-    return round(total, 2)
-
 @app.get("/api/league/projections")
-async def league_projections(league_id: str | None = None, start_week: int | None = None, end_week: int | None = None):
+async def league_projections(league_id: str | None = None, start_week: int | None = None, end_week: int | None = None, simulations: int = 20000):
     try:
-        # League profile for roster_positions
-        league = await sleeper_client.get_league(league_id)
+        client = provider_router.get_client(LeagueProvider.SLEEPER, league_id=league_id)
+        league, state, rosters, catalog = await asyncio.gather(
+            client.get_league(league_id),
+            client.get_nfl_state(),
+            client.build_roster_summaries(league_id=league_id),
+            client.get_players(),
+        )
         roster_positions = league.get('roster_positions') or []
-        state = await sleeper_client.get_nfl_state()
         current_week = int(state.get("week") or 1)
         start_w = int(start_week or current_week)
         end_w = int(end_week or 17)
-        rosters = await sleeper_client.build_roster_summaries(league_id=league_id)
-        standings = {r['roster_id']: {"roster_id": r['roster_id'], "owner": r['owner'], "proj_wins": 0, "proj_losses": 0, "proj_ties": 0} for r in rosters}
-        catalog = await sleeper_client.get_players()
-        for w in range(start_w, end_w + 1):
-            matchups = await sleeper_client.get_matchups(week=w, league_id=league_id)
-            by_mid = {}
-            roster_to_pp: Dict[int, Dict[str,float]] = {}
-            for m in matchups:
-                rid = m.get('roster_id')
-                if rid is not None:
-                    roster_to_pp[rid] = m.get('players_points') or {}
-                mid = m.get('matchup_id')
-                if mid is None: continue
-                by_mid.setdefault(mid, []).append(m)
-            for mid, games in by_mid.items():
-                if len(games) != 2: continue
-                a, b = games
-                ra = a.get('roster_id'); rb = b.get('roster_id')
-                ta = next((r for r in rosters if r['roster_id']==ra), None)
-                tb = next((r for r in rosters if r['roster_id']==rb), None)
-                if not ta or not tb: continue
-                sa = _optimal_projected_total(ta, roster_to_pp.get(ra, {}), roster_positions, catalog)
-                sb = _optimal_projected_total(tb, roster_to_pp.get(rb, {}), roster_positions, catalog)
-                if sa > sb:
-                    standings[ra]['proj_wins'] += 1; standings[rb]['proj_losses'] += 1
-                elif sb > sa:
-                    standings[rb]['proj_wins'] += 1; standings[ra]['proj_losses'] += 1
-                else:
-                    standings[ra]['proj_ties'] += 1; standings[rb]['proj_ties'] += 1
-        table = list(standings.values())
-        table.sort(key=lambda x: (x['proj_wins'], -x['proj_losses']), reverse=True)
-        leader = table[0] if table else None
-        return {"weeks": list(range(start_w, end_w+1)), "standings": table, "likely_winner": leader}
+        weeks = list(range(start_w, end_w + 1))
+        # All remaining weeks at once instead of one round trip per week
+        weekly = await asyncio.gather(*(client.get_matchups(week=w, league_id=league_id) for w in weeks))
+        by_roster = {r['roster_id']: r for r in rosters}
+        solver = lineup.get_lineup_solver()
+
+        def lineup_totals(week: int, points: Dict[int, Dict[str, float]]) -> Dict[int, float]:
+            version = client.data_version(f"matchups:{league_id or client.default_league_id}:{week}")
+            lineups = solver.solve_week(rosters, points, roster_positions, catalog, week=week, points_version=version)
+            return {rid: lu["projected_total"] for rid, lu in lineups.items()}
+
+        inputs = season_sim.build_season_inputs(rosters, dict(zip(weeks, weekly)), lineup_totals)
+        playoff_teams = int((league.get('settings') or {}).get('playoff_teams') or 6)
+        sim = await asyncio.to_thread(season_sim.simulate_season, inputs, playoff_teams, max(1000, min(simulations, 100000)))
+        table = [
+            {
+                "roster_id": t["roster_id"],
+                "owner": by_roster[t["roster_id"]]['owner'],
+                # Remaining weeks only, as before; the season totals are expected_wins/losses
+                "proj_wins": t["projected_wins"],
+                "proj_losses": t["projected_losses"],
+                "proj_ties": t["projected_ties"],
+                "expected_wins": t["expected_wins"],
+                "expected_losses": t["expected_losses"],
+                "playoff_odds": t["playoff_odds"],
+                "seed_distribution": t["seed_distribution"],
+                "title_odds": t["title_odds"],
+            }
+            for t in sim["teams"]
+        ]
+        table.sort(key=lambda x: (x['expected_wins'], x['playoff_odds']), reverse=True)
+        leader = max(table, key=lambda x: x['title_odds']) if table else None
+        return {"weeks": weeks, "standings": table, "likely_winner": leader, "simulations": sim["simulations"], "playoff_teams": sim["playoff_teams"]}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
@@ -526,35 +611,52 @@ async def public_config():
     }
 
 
+CHEATSHEET_SLEEPER_TIMEOUT_S = float(os.getenv("CHEATSHEET_SLEEPER_TIMEOUT_S", "8"))
+CHEATSHEET_NEWS_TIMEOUT_S = float(os.getenv("CHEATSHEET_NEWS_TIMEOUT_S", "4"))
+# Fetch step -> cheatsheet sections it feeds
+_CHEATSHEET_SECTIONS = {"trending": ["waivers", "trades"], "trades": ["trades"], "news": ["news"]}
+
+
+def _partial_sections(steps: List[str]) -> List[str]:
+    return sorted({section for step in steps for section in _CHEATSHEET_SECTIONS.get(step, [step])})
+
+
 @app.get("/api/cheatsheet")
 async def cheatsheet(league_id: str | None = None, user_id: str = "default"):
     try:
+        client = provider_router.get_client(LeagueProvider.SLEEPER, league_id=league_id)
         # Resolve user
         try:
             user_id = verify_jwt_and_get_user_id()
         except Exception:
             user_id = user_id or "default"
-        prefs = memory_store.get_preferences(user_id=user_id)
-        # Current week and league info
-        league = await sleeper_client.get_league(league_id)
+        prefs = await memory_store.aget_preferences(user_id=user_id)
+        if not prefs.roster_owner_name:
+            return JSONResponse(status_code=400, content={"error": "Select your team first in the roster drawer."})
+        # Everything the page needs, fetched concurrently; news and trending may come back partial
+        plan = FetchPlan()
+        plan.add("league", lambda: client.get_league(league_id), timeout_s=CHEATSHEET_SLEEPER_TIMEOUT_S)
+        plan.add("state", client.get_nfl_state, timeout_s=CHEATSHEET_SLEEPER_TIMEOUT_S)
+        plan.add("rosters", lambda: client.build_roster_summaries(league_id=league_id), timeout_s=CHEATSHEET_SLEEPER_TIMEOUT_S)
+        plan.add("catalog", client.get_players, timeout_s=CHEATSHEET_SLEEPER_TIMEOUT_S)
+        plan.add("matchups", lambda state: client.get_matchups(week=int(state.get('week') or 1), league_id=league_id), deps=["state"], timeout_s=CHEATSHEET_SLEEPER_TIMEOUT_S)
+        plan.add("trending", lambda: client.get_trending_players(trend_type='add', lookback_hours=72, limit=50), timeout_s=CHEATSHEET_SLEEPER_TIMEOUT_S, required=False, default=[])
+        plan.add("trades", analysis.suggest_trade_targets, deps=["rosters", "trending"], required=False, default={})
+        # Times out (-> partial) only while the news ingester's first poll round is still running
+        plan.add("news", news_ingester.ready, timeout_s=CHEATSHEET_NEWS_TIMEOUT_S, required=False)
+        fetched = await plan.run()
+        league, state, rosters, catalog = fetched["league"], fetched["state"], fetched["rosters"], fetched["catalog"]
+        matchups, trending = fetched["matchups"], fetched["trending"]
         roster_positions = league.get('roster_positions') or []
-        state = await sleeper_client.get_nfl_state()
         week = int(state.get('week') or 1)
-        # Rosters and my team
-        rosters = await sleeper_client.build_roster_summaries(league_id=league_id)
         my = None
-        if prefs.roster_owner_name:
-            for r in rosters:
-                if (r.get('owner') or '').lower() == prefs.roster_owner_name.lower():
-                    my = r; break
+        for r in rosters:
+            if (r.get('owner') or '').lower() == prefs.roster_owner_name.lower():
+                my = r; break
         if not my:
             return JSONResponse(status_code=400, content={"error": "Select your team first in the roster drawer."})
-        # Projected players_points from Sleeper matchups
-        matchups = await sleeper_client.get_matchups(week=week, league_id=league_id)
-        my_pp = {}
-        opp_pp = {}
         my_opp_roster_id = None
-        # map roster_id -> players_points and matchup pairing
+        # Find my opponent via matchup_id pairing
         by_mid = {}
         for m in matchups:
             mid = m.get('matchup_id')
@@ -564,43 +666,23 @@ async def cheatsheet(league_id: str | None = None, user_id: str = "default"):
             if len(pair) != 2: continue
             a,b = pair
             if a.get('roster_id') == my.get('roster_id'):
-                my_pp = a.get('players_points') or {}
-                opp_pp = b.get('players_points') or {}
                 my_opp_roster_id = b.get('roster_id')
                 break
             if b.get('roster_id') == my.get('roster_id'):
-                my_pp = b.get('players_points') or {}
-                opp_pp = a.get('players_points') or {}
                 my_opp_roster_id = a.get('roster_id')
                 break
-        catalog = await sleeper_client.get_players()
-        # Optimal lineup helpers
-        def eligible(slot: str) -> set:
-            return _eligible_positions(slot)
-        def optimal(roster: Dict[str, Any], pp: Dict[str,float]) -> Dict[str, Any]:
-            candidates = []
-            for pid in (roster.get('players') or []):
-                p = catalog.get(pid) or {}
-                pos = (p.get('position') or '').upper()
-                candidates.append({"player_id": pid, "pos": pos, "pts": float(pp.get(pid) or 0.0), "full_name": p.get('full_name'), "team": p.get('team')})
-            used=set(); chosen=[]; total=0.0
-            for slot in roster_positions:
-                if slot.upper()=='BN': continue
-                elig = eligible(slot); best=None; best_pts=-1.0
-                for c in candidates:
-                    if c['player_id'] in used: continue
-                    if c['pos'] in elig and c['pts'] > best_pts:
-                        best=c; best_pts=c['pts']
-                if best:
-                    used.add(best['player_id']); chosen.append(best); total+=best['pts']
-            return {"starters": chosen, "projected_total": round(total,2)}
-        my_lineup = optimal(my, my_pp)
-        opp_lineup = None
-        if my_opp_roster_id is not None:
-            opp = next((r for r in rosters if r['roster_id']==my_opp_roster_id), None)
-            if opp: opp_lineup = optimal(opp, opp_pp)
+        # One batched solve for the whole league-week; the opponent's lineup comes out of the same call
+        lineups = lineup.get_lineup_solver().solve_week(
+            rosters,
+            lineup.points_by_roster(matchups),
+            roster_positions,
+            catalog,
+            week=week,
+            points_version=client.data_version(f"matchups:{league_id or client.default_league_id}:{week}"),
+        )
+        my_lineup = lineups.get(my.get('roster_id'))
+        opp_lineup = lineups.get(my_opp_roster_id) if my_opp_roster_id is not None else None
         # Waivers (trending adds not on any roster)
-        trending = await sleeper_client.get_trending_players(trend_type='add', lookback_hours=72, limit=50)
         owned = {pid for r in rosters for pid in (r.get('players') or [])}
         waiver_targets = []
         for t in trending:
@@ -608,15 +690,8 @@ async def cheatsheet(league_id: str | None = None, user_id: str = "default"):
             if pid and pid not in owned and p:
                 waiver_targets.append({"player_id": pid, "full_name": p.get('full_name'), "position": p.get('position'), "team": p.get('team')})
             if len(waiver_targets) >= 10: break
-        # Trade suggestions (reuse analysis)
-        trade_suggestions = await analysis.suggest_trade_targets(rosters, trending)
         # News TL;DR for roster only
-        names = []
-        for pid in (my.get('players') or []):
-            p = catalog.get(pid) or {}
-            nm = p.get('full_name') or ((p.get('first_name') or '') + ' ' + (p.get('last_name') or '')).strip()
-            if nm: names.append(nm)
-        news_items = filter_news_by_names(await gather_all_news(), names)
+        news_items = await _roster_news(my.get('players') or [], catalog)
         news_links = [{"title": it.get('tldr') or it.get('title'), "link": it.get('link'), "source": it.get('source') or it.get('domain')} for it in news_items if it.get('link')][:10]
         return {
             "week": week,
@@ -624,8 +699,11 @@ async def cheatsheet(league_id: str | None = None, user_id: str = "default"):
             "my_team": {"owner": my.get('owner'), "roster_id": my.get('roster_id'), "lineup": my_lineup},
             "opponent": opp_lineup,
             "waivers": waiver_targets,
-            "trades": trade_suggestions,
+            "trades": fetched["trades"],
             "news": news_links,
+            # Sections built from a source that timed out or failed, e.g. ["news"]
+            "partial": _partial_sections(fetched.partial),
+            "timings": fetched.timings,
         }
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
\ No newline at end of file
@@ -1,16 +1,50 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
+from app.services.lineup import get_lineup_solver
 
-async def suggest_start_sit(rosters: List[Dict[str, Any]]) -> Dict[str, Any]:
-    suggestions: Dict[str, Any] = {}
-    for r in rosters[:10]:
-        starters = r.get("starters", [])
-        bench = [p for p in (r.get("players") or []) if p not in starters]
+async def suggest_start_sit(
+    rosters: List[Dict[str, Any]],
+    points_by_roster: Optional[Dict[Any, Dict[str, float]]] = None,
+    roster_positions: Optional[List[str]] = None,
+    catalog: Any = None,
+    week: Optional[int] = None,
+    points_version: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Compare each roster's current starters with its optimal projected lineup.
+
+    Without projections (points_by_roster/roster_positions/catalog) this falls back to listing
+    current starters and bench players.
+    """
+    rosters = rosters[:10]
+    if not (points_by_roster and roster_positions and catalog is not None):
+        suggestions: Dict[str, Any] = {}
+        for r in rosters:
+            starters = r.get("starters", [])
+            bench = [p for p in (r.get("players") or []) if p not in starters]
+            suggestions[r.get("owner", r.get("roster_id"))] = {
+                "starters": starters[:8],
+                "bench_candidates": bench[:5],
+            }
+        return suggestions
+
+    lineups = get_lineup_solver().solve_week(rosters, points_by_roster, roster_positions, catalog, week=week, points_version=points_version)
+    suggestions = {}
+    for r in rosters:
+        lineup = lineups[r.get("roster_id")]
+        pp = points_by_roster.get(r.get("roster_id")) or {}
+        current = [p for p in (r.get("starters") or []) if p and p != "0"]
+        optimal_ids = [s["player_id"] for s in lineup["starters"]]
+        current_total = sum(float(pp.get(p) or 0.0) for p in current)
         suggestions[r.get("owner", r.get("roster_id"))] = {
-            "starters": starters[:8],
-            "bench_candidates": bench[:5],
+            "starters": [s["player_id"] for s in lineup["starters"]],
+            "optimal_lineup": [{"slot": s["slot"], "player_id": s["player_id"], "full_name": s["full_name"], "projected_points": round(s["pts"], 2)} for s in lineup["starters"]],
+            "start": [p for p in optimal_ids if p not in current],
+            "sit": [p for p in current if p not in optimal_ids],
+            "projected_total": lineup["projected_total"],
+            "projected_gain": round(lineup["projected_total"] - current_total, 2),
+            "bench_candidates": [b["player_id"] for b in lineup["bench"][:5]],
         }
     return suggestions
 
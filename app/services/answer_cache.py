@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.services.cache_backends import CacheBackend
+
+
+_PUNCT = re.compile(r"[^\w\s']+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Case, punctuation and whitespace-insensitive form of a question ("Who should I start??" == "who should i start")."""
+    q = _PUNCT.sub(" ", (question or "").lower())
+    return _SPACES.sub(" ", q).strip()
+
+
+class AnswerCache:
+    """LRU + TTL cache for /api/ask answers.
+
+    Each entry remembers the league data versions it was built from (see
+    SleeperClient.data_versions); a lookup with different versions drops the entry instead of
+    serving an answer about stale rosters or matchups. Concurrent misses on the same key share
+    one computation. With a shared backend (SQLite/Redis), answers computed by other workers
+    are reused too; versions are content fingerprints, so they compare across processes.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_s: float = 900.0, backend: Optional[CacheBackend] = None) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = ttl_s
+        # The local LRU already covers a per-process backend; only a shared one adds anything
+        self.backend = backend if backend is not None and backend.shared else None
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, int], Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "coalesced": 0, "invalidated": 0, "expired": 0, "evicted": 0, "shared_hits": 0}
+
+    @staticmethod
+    def make_key(question: str, league_id: Optional[str], prefs: Optional[Dict[str, Any]] = None) -> str:
+        # Recent-chat profile text is deliberately left out: it changes every turn and would defeat the cache
+        return json.dumps({"q": normalize_question(question), "league": league_id, "prefs": prefs or {}}, sort_keys=True)
+
+    def get(self, key: str, versions: Dict[str, int]) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        ts, built_from, value = entry
+        if time.time() - ts >= self.ttl_s:
+            self.stats["expired"] += 1
+            del self._entries[key]
+            return None
+        if built_from != versions:
+            self.stats["invalidated"] += 1
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def lookup(self, key: str, versions: Dict[str, int]) -> Optional[Any]:
+        """get() that counts a hit, for callers that serve the cached value themselves."""
+        value = self.get(key, versions)
+        if value is not None:
+            self.stats["hits"] += 1
+        return value
+
+    def set(self, key: str, versions: Dict[str, int], value: Any) -> None:
+        self._entries[key] = (time.time(), dict(versions), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evicted"] += 1
+
+    @staticmethod
+    def _backend_key(key: str) -> str:
+        return "answer:" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    async def _get_shared(self, key: str, versions: Dict[str, int]) -> Optional[Any]:
+        if self.backend is None:
+            return None
+        try:
+            remote = await self.backend.get(self._backend_key(key))
+        except Exception:
+            return None
+        if remote is None:
+            return None
+        ts, payload = remote
+        if time.time() - ts >= self.ttl_s or payload.get("versions") != versions:
+            return None
+        self._entries[key] = (ts, dict(versions), payload.get("value"))
+        return payload.get("value")
+
+    async def _set_shared(self, key: str, versions: Dict[str, int], value: Any) -> None:
+        if self.backend is None:
+            return
+        try:
+            await self.backend.set(self._backend_key(key), {"versions": versions, "value": value}, time.time(), self.ttl_s)
+        except Exception:
+            pass
+
+    async def get_or_compute(self, key: str, versions: Dict[str, int], compute: Callable[[], Awaitable[Any]], cacheable: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, bool]:
+        """Return (value, cached). Only one compute() runs per key at a time; errors, and values
+        cacheable() rejects, are not cached."""
+        value = self.lookup(key, versions)
+        if value is not None:
+            return value, True
+        value = await self._get_shared(key, versions)
+        if value is not None:
+            self.stats["shared_hits"] += 1
+            return value, True
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(task), True
+        self.stats["misses"] += 1
+
+        async def run() -> Any:
+            result = await compute()
+            if cacheable is None or cacheable(result):
+                self.set(key, versions, result)
+                await self._set_shared(key, versions, result)
+            return result
+
+        task = asyncio.ensure_future(run())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        return await asyncio.shield(task), False
+
+    async def put(self, key: str, versions: Dict[str, int], value: Any) -> None:
+        """Store a value produced outside get_or_compute (e.g. a streamed answer) locally and in the shared backend."""
+        self.set(key, versions, value)
+        await self._set_shared(key, versions, value)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        served = self.stats["hits"] + self.stats["shared_hits"] + self.stats["coalesced"]
+        lookups = served + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "shared_backend": type(self.backend).__name__ if self.backend is not None else None,
+            "hit_ratio": round(served / lookups, 3) if lookups else 0.0,
+        }
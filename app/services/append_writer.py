@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import glob
+import gzip
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+
+# A file's queue is flushed once it holds this much, and every queue at least this often
+FLUSH_BYTES = int(os.getenv("APPEND_FLUSH_BYTES", str(64 * 1024)))
+FLUSH_INTERVAL_S = float(os.getenv("APPEND_FLUSH_INTERVAL_S", "0.5"))
+# Beyond this much unwritten data (disk stalled or failing) the oldest lines are dropped
+MAX_PENDING_BYTES = 32 * 1024 * 1024
+
+
+class AppendWriter:
+    """Append-only file writes batched off the event loop.
+
+    append() and replace() only queue: lines go to a per-file queue, and replace() keeps the
+    latest full content for a file. A background task writes every queue in one worker-thread
+    pass when any queue reaches FLUSH_BYTES or FLUSH_INTERVAL_S has passed. Files registered with
+    rotate() are renamed and gzipped once they pass max_bytes, keeping `backups` archives.
+    Outside a running event loop (scripts, benches) writes happen immediately instead, and
+    anything still queued at process exit is written then.
+    """
+
+    def __init__(self, flush_bytes: int = FLUSH_BYTES, flush_interval_s: float = FLUSH_INTERVAL_S) -> None:
+        self.flush_bytes = flush_bytes
+        self.flush_interval_s = flush_interval_s
+        self._lines: Dict[str, List[str]] = {}
+        self._bytes: Dict[str, int] = {}
+        self._replace: Dict[str, str] = {}
+        self._in_flight: Set[str] = set()
+        self._rotation: Dict[str, Tuple[int, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._closing = False
+        self.stats: Dict[str, int] = {"lines": 0, "flushes": 0, "bytes_written": 0, "rotations": 0, "errors": 0, "dropped": 0}
+
+    def rotate(self, path: str, max_bytes: int, backups: int = 5) -> None:
+        self._rotation[path] = (max_bytes, backups)
+
+    def _loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = loop.create_task(self._run())
+        return loop
+
+    def append(self, path: str, line: str) -> None:
+        """Queue one line (newline added) for path."""
+        data = line + "\n"
+        self.stats["lines"] += 1
+        if self._loop() is None:
+            self._write({path: [data]}, {})
+            return
+        self._lines.setdefault(path, []).append(data)
+        size = self._bytes.get(path, 0) + len(data.encode("utf-8"))
+        self._bytes[path] = size
+        if size > MAX_PENDING_BYTES:
+            self._drop_oldest(path)
+        if size >= self.flush_bytes and self._wake is not None:
+            self._wake.set()
+
+    def replace(self, path: str, content: str) -> None:
+        """Queue a whole-file rewrite of path; only the latest content per flush is written."""
+        if self._loop() is None:
+            self._write({}, {path: content})
+            return
+        self._replace[path] = content
+
+    def pending_bytes(self, path: str) -> int:
+        return self._bytes.get(path, 0)
+
+    def settled(self, path: str) -> bool:
+        """True when nothing for path is queued or being written, so the file on disk is current."""
+        return path not in self._lines and path not in self._replace and path not in self._in_flight
+
+    def _drop_oldest(self, path: str) -> None:
+        lines = self._lines[path]
+        while lines and self._bytes[path] > MAX_PENDING_BYTES:
+            self._bytes[path] -= len(lines.pop(0).encode("utf-8"))
+            self.stats["dropped"] += 1
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                self.stats["errors"] += 1
+
+    async def flush(self) -> None:
+        if self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            if not self._lines and not self._replace:
+                return
+            lines, replace = self._lines, self._replace
+            self._lines, self._replace = {}, {}
+            # The batch's bytes leave the queue with it; appends made during the write count from zero
+            batch_bytes = {path: self._bytes.pop(path, 0) for path in lines}
+            self._in_flight = set(lines) | set(replace)
+            try:
+                failed = await asyncio.to_thread(self._write, lines, replace)
+            finally:
+                self._in_flight = set()
+            # Failed files go back in front of anything queued meanwhile and are retried next flush
+            for path in failed:
+                if path in lines:
+                    self._lines[path] = lines[path] + self._lines.get(path, [])
+                    self._bytes[path] = self._bytes.get(path, 0) + batch_bytes[path]
+                    self._drop_oldest(path)
+                elif path in replace:
+                    self._replace.setdefault(path, replace[path])
+
+    def _write(self, lines: Dict[str, List[str]], replace: Dict[str, str]) -> List[str]:
+        """Runs in a worker thread (or inline without a loop); returns the paths that failed."""
+        failed: List[str] = []
+        self.stats["flushes"] += 1
+        for path, batch in lines.items():
+            try:
+                Path(os.path.dirname(path) or ".").mkdir(parents=True, exist_ok=True)
+                data = "".join(batch)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(data)
+                    size = f.tell()
+                self.stats["bytes_written"] += len(data)
+                rotation = self._rotation.get(path)
+                if rotation and size >= rotation[0]:
+                    self._rotate(path, rotation[1])
+            except OSError:
+                self.stats["errors"] += 1
+                failed.append(path)
+        for path, content in replace.items():
+            try:
+                Path(os.path.dirname(path) or ".").mkdir(parents=True, exist_ok=True)
+                tmp = path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(content)
+                os.replace(tmp, path)
+            except OSError:
+                self.stats["errors"] += 1
+                failed.append(path)
+        return failed
+
+    def _rotate(self, path: str, backups: int) -> None:
+        # Stamps sort chronologically, which is what pruning relies on
+        rotated = f"{path}.{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+        os.replace(path, rotated)
+        with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(rotated)
+        self.stats["rotations"] += 1
+        for old in sorted(glob.glob(glob.escape(path) + ".*.gz"))[:-backups or None]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    async def aclose(self) -> None:
+        """Stop the background task and write everything still queued."""
+        # Not cancelled: a write already handed to the thread must finish before the last flush
+        task = self._task
+        if task is not None and self._wake is not None:
+            self._closing = True
+            self._wake.set()
+            try:
+                await task
+            finally:
+                self._closing = False
+                self._task = None
+        await self.flush()
+
+    def drain(self) -> None:
+        """Write everything still queued, blocking; for process exit when no loop is left to flush."""
+        lines, replace = self._lines, self._replace
+        self._lines, self._replace, self._bytes = {}, {}, {}
+        if lines or replace:
+            self._write(lines, replace)
+
+    def cache_stats(self) -> Dict[str, int]:
+        return {**self.stats, "pending_files": len(self._lines) + len(self._replace), "pending_bytes": sum(self._bytes.values())}
+
+
+_writer: Optional[AppendWriter] = None
+
+
+def get_append_writer() -> AppendWriter:
+    global _writer
+    if _writer is None:
+        _writer = AppendWriter()
+        # Scripts that end their loop without aclose() (asyncio.run) still get their lines written
+        atexit.register(_writer.drain)
+    return _writer
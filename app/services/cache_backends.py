@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional, Tuple
+from urllib.parse import urlparse
+
+
+class CacheBackend:
+    """Async key -> (stored_ts, value) store shared by SleeperClient and AnswerCache.
+
+    Values must be JSON-serializable. retention_s is how long the backend may keep an entry;
+    freshness is still decided by the caller from stored_ts.
+    """
+
+    shared = False  # True when other processes can see the entries
+
+    async def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ts: float, retention_s: float) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        return None
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process LRU with expiry; the default when no shared store is configured."""
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, float, Any]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        ts, expires, value = entry
+        if time.time() >= expires:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return ts, value
+
+    async def set(self, key: str, value: Any, ts: float, retention_s: float) -> None:
+        self._data[key] = (ts, time.time() + retention_s, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class SQLiteBackend(CacheBackend):
+    """Host-local store in a WAL-mode SQLite file, shared by every worker process on the machine."""
+
+    shared = True
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        Path(os.path.dirname(path) or ".").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, ts REAL NOT NULL, expires REAL NOT NULL, value TEXT NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)")
+        self._writes = 0
+
+    def _get(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT ts, value FROM cache WHERE key = ? AND expires > ?", (key, time.time())).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _set(self, key: str, value: Any, ts: float, retention_s: float) -> None:
+        payload = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO cache (key, ts, expires, value) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET ts = excluded.ts, expires = excluded.expires, value = excluded.value",
+                (key, ts, now + retention_s, payload),
+            )
+            self._writes += 1
+            if self._writes % 500 == 0:
+                self._conn.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    async def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: Any, ts: float, retention_s: float) -> None:
+        await asyncio.to_thread(self._set, key, value, ts, retention_s)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, key)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisBackend(CacheBackend):
+    """Minimal RESP client (GET/SET PX/DEL) for Redis or any protocol-compatible server, e.g. a local stand-in.
+
+    Entries are stored as JSON {"ts": ..., "v": ...}; one connection is reused and re-opened on error.
+    """
+
+    shared = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, db: int = 0, password: Optional[str] = None, prefix: str = "dynasty:", timeout_s: float = 2.0) -> None:
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.prefix = prefix
+        self.timeout_s = timeout_s
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _encode(*args: Any) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for a in args:
+            b = a if isinstance(a, bytes) else str(a).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(b), b))
+        return b"".join(out)
+
+    async def _read_reply(self) -> Any:
+        assert self._reader is not None
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("redis connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RuntimeError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            if n < 0:
+                return None
+            data = await self._reader.readexactly(n + 2)
+            return data[:-2]
+        if kind == b"*":
+            return [await self._read_reply() for _ in range(int(rest))]
+        raise RuntimeError(f"unexpected redis reply: {line!r}")
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            if self.password:
+                await self._roundtrip("AUTH", self.password)
+            if self.db:
+                await self._roundtrip("SELECT", self.db)
+        except BaseException:
+            # Never keep a connection that isn't authenticated and on the right db
+            await self._reset()
+            raise
+
+    async def _roundtrip(self, *args: Any) -> Any:
+        assert self._writer is not None
+        self._writer.write(self._encode(*args))
+        await self._writer.drain()
+        return await self._read_reply()
+
+    async def _command(self, *args: Any) -> Any:
+        async with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._writer is None:
+                        await asyncio.wait_for(self._connect(), self.timeout_s)
+                    return await asyncio.wait_for(self._roundtrip(*args), self.timeout_s)
+                except (ConnectionError, OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    await self._reset()
+                    if attempt:
+                        raise
+                except BaseException:
+                    # Cancelled (e.g. a caller's wait_for) or failed mid-roundtrip: the reply may still be
+                    # unread on the socket and would be handed to the next command, so drop the connection
+                    await self._reset()
+                    raise
+
+    async def _reset(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        raw = await self._command("GET", self.prefix + key)
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        return float(entry["ts"]), entry["v"]
+
+    async def set(self, key: str, value: Any, ts: float, retention_s: float) -> None:
+        payload = json.dumps({"ts": ts, "v": value}, ensure_ascii=False, separators=(",", ":"))
+        await self._command("SET", self.prefix + key, payload, "PX", max(1, int(retention_s * 1000)))
+
+    async def delete(self, key: str) -> None:
+        await self._command("DEL", self.prefix + key)
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._reset()
+
+
+def make_backend(url: Optional[str] = None) -> CacheBackend:
+    """memory:// | sqlite:///abs/path.db | redis://[:password@]host[:port][/db]"""
+    parsed = urlparse(url or "memory://")
+    if parsed.scheme in ("", "memory"):
+        return MemoryBackend()
+    if parsed.scheme == "sqlite":
+        return SQLiteBackend(parsed.path or "/workspace/data/cache.sqlite3")
+    if parsed.scheme == "redis":
+        db = int((parsed.path or "/0").lstrip("/") or 0)
+        return RedisBackend(host=parsed.hostname or "127.0.0.1", port=parsed.port or 6379, db=db, password=parsed.password)
+    raise ValueError(f"Unknown cache backend: {url}")
+
+
+_default_backend: Optional[CacheBackend] = None
+
+
+def get_default_backend() -> CacheBackend:
+    """Process-wide backend built from the CACHE_URL env var."""
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = make_backend(os.getenv("CACHE_URL", "memory://"))
+    return _default_backend
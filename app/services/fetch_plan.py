@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+
+@dataclass
+class _Step:
+    name: str
+    fetch: Callable[..., Awaitable[Any]]
+    deps: Sequence[str]
+    timeout_s: Optional[float]
+    required: bool
+    default: Any
+
+
+class _Skipped(Exception):
+    """Raised inside a step whose dependency came back partial."""
+
+
+@dataclass
+class PlanResult:
+    values: Dict[str, Any]
+    partial: List[str] = field(default_factory=list)   # optional sources that timed out or failed
+    errors: Dict[str, str] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.values[name]
+
+
+class FetchPlan:
+    """Declarative set of named fetches with dependencies, run as concurrently as the graph allows.
+
+    Each step's fetch is called with its dependencies' values as keyword arguments. A required
+    step that fails or times out fails the whole run; an optional one falls back to its default
+    and is listed in PlanResult.partial so the caller can mark that section incomplete.
+
+        plan = FetchPlan()
+        plan.add("state", client.get_nfl_state)
+        plan.add("matchups", lambda state: client.get_matchups(week=state["week"]), deps=["state"])
+        plan.add("news", load_news, timeout_s=4.0, required=False, default=[])
+        result = await plan.run()
+    """
+
+    def __init__(self) -> None:
+        self._steps: Dict[str, _Step] = {}
+
+    def add(
+        self,
+        name: str,
+        fetch: Callable[..., Awaitable[Any]],
+        deps: Sequence[str] = (),
+        timeout_s: Optional[float] = None,
+        required: bool = True,
+        default: Any = None,
+    ) -> "FetchPlan":
+        if name in self._steps:
+            raise ValueError(f"Duplicate fetch step: {name}")
+        missing = [d for d in deps if d not in self._steps]
+        if missing:
+            # Dependencies must be declared first, which also rules out cycles
+            raise ValueError(f"Fetch step {name} depends on undeclared steps: {missing}")
+        self._steps[name] = _Step(name, fetch, tuple(deps), timeout_s, required, default)
+        return self
+
+    async def run(self, deadline: Optional[float] = None) -> PlanResult:
+        """Run every step; with deadline (a time.monotonic() instant) no step runs past it."""
+        result = PlanResult(values={})
+        tasks: Dict[str, asyncio.Task] = {}
+        timeouts: Dict[str, Optional[float]] = {}
+
+        async def run_step(step: _Step) -> Any:
+            dep_values = {}
+            for d in step.deps:
+                dep_values[d] = await tasks[d]
+                if d in result.partial:
+                    # A dependent of a missing section can't be complete either
+                    raise _Skipped(d)
+            timeout = step.timeout_s
+            if deadline is not None:
+                left = max(0.0, deadline - time.monotonic())
+                timeout = left if timeout is None else min(timeout, left)
+            timeouts[step.name] = timeout
+            t0 = time.perf_counter()
+            try:
+                value = await asyncio.wait_for(step.fetch(**dep_values), timeout)
+            finally:
+                result.timings[step.name] = round(time.perf_counter() - t0, 4)
+            return value
+
+        async def guarded(step: _Step) -> Any:
+            try:
+                value = await run_step(step)
+            except _Skipped as e:
+                if step.required:
+                    raise RuntimeError(f"{step.name} needs {e.args[0]}, which is unavailable")
+                result.partial.append(step.name)
+                result.errors[step.name] = f"skipped: {e.args[0]} unavailable"
+                value = step.default
+            except asyncio.TimeoutError:
+                if step.required:
+                    raise TimeoutError(f"{step.name} timed out after {round(timeouts[step.name], 2)}s")
+                result.partial.append(step.name)
+                result.errors[step.name] = f"timed out after {round(timeouts[step.name], 2)}s"
+                value = step.default
+            except Exception as e:
+                if step.required:
+                    raise
+                result.partial.append(step.name)
+                result.errors[step.name] = str(e) or type(e).__name__
+                value = step.default
+            result.values[step.name] = value
+            return value
+
+        for step in self._steps.values():
+            tasks[step.name] = asyncio.ensure_future(guarded(step))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for t in tasks.values():
+                t.cancel()
+            raise
+        return result
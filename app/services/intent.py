@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.services.intent_data import TRAINING_EXAMPLES
+
+
+LABELS = ("league_info", "rosters", "matchups", "players_search", "trending", "nfl_state", "start_sit", "trade", "waivers")
+DEFAULT_INTENT = "rosters"
+# Below this confidence classify_intent asks the LLM instead
+CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.6"))
+RULE_WEIGHT = 3.0
+
+# Strong phrasings; each hit adds RULE_WEIGHT to the label's log score
+_RULES: Dict[str, List[re.Pattern]] = {
+    label: [re.compile(p) for p in patterns]
+    for label, patterns in {
+        "league_info": [r"\bscoring\b", r"\bppr\b", r"\bleague (settings|rules|name)\b", r"\broster positions\b", r"\bsuper ?flex league\b", r"\btrade deadline\b"],
+        "rosters": [r"\broster(s|ed)?\b", r"\bmy team\b", r"\bwho (owns|has)\b"],
+        "matchups": [r"\bmatch ?ups?\b", r"\bopponent\b", r"\bhead to head\b", r"\bwho am i (playing|facing)\b", r"\bprojected to win\b"],
+        "players_search": [r"\b(tell me about|look up|info on|details on|player profile)\b", r"\bwho is [a-z'.-]+ [a-z'.-]+\b"],
+        "trending": [r"\btrending\b", r"\bmost (added|dropped)\b", r"\bbuzz\b"],
+        "nfl_state": [r"\bwhat week\b", r"\bcurrent (nfl )?week\b", r"\b(regular|pre|off) ?season\b", r"\bseason type\b", r"\bnfl state\b"],
+        "start_sit": [r"\bstart(ing)?\b.*\bor\b", r"\b(start|sit|bench|flex)\b", r"\blineup\b", r"\bstarters\b"],
+        "trade": [r"\btrad(e|es|ed|ing)\b", r"\b(sell|buy) (high|low)\b"],
+        "waivers": [r"\bwaivers?\b", r"\bfaab\b", r"\bfree agen(t|ts|cy)\b", r"\bpick ?ups?\b", r"\bclaim\b"],
+    }.items()
+}
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+def _features(text: str) -> List[str]:
+    toks = _TOKEN.findall((text or "").lower())
+    return toks + [f"{a}_{b}" for a, b in zip(toks, toks[1:])]
+
+
+class IntentClassifier:
+    """Multinomial naive Bayes over unigrams + bigrams, nudged by keyword rules.
+
+    classify() returns (label, confidence) where confidence is the softmax probability of the
+    winning label; it runs in tens of microseconds.
+    """
+
+    def __init__(self, examples: Sequence[Tuple[str, str]] = TRAINING_EXAMPLES, alpha: float = 0.5) -> None:
+        counts: Dict[str, Counter] = {label: Counter() for label in LABELS}
+        docs: Counter = Counter()
+        for text, label in examples:
+            counts[label].update(_features(text))
+            docs[label] += 1
+        vocab = set().union(*counts.values())
+        total_docs = sum(docs.values()) or 1
+        self._prior = {label: math.log((docs[label] + 1) / (total_docs + len(LABELS))) for label in LABELS}
+        self._loglik: Dict[str, Dict[str, float]] = {}
+        self._unseen: Dict[str, float] = {}
+        for label in LABELS:
+            denom = sum(counts[label].values()) + alpha * (len(vocab) + 1)
+            self._loglik[label] = {f: math.log((c + alpha) / denom) for f, c in counts[label].items()}
+            self._unseen[label] = math.log(alpha / denom)
+        self._vocab = vocab
+
+    def scores(self, text: str) -> Dict[str, float]:
+        q = (text or "").lower()
+        feats = [f for f in _features(q) if f in self._vocab]
+        out: Dict[str, float] = {}
+        for label in LABELS:
+            ll, unseen = self._loglik[label], self._unseen[label]
+            s = self._prior[label] + sum(ll.get(f, unseen) for f in feats)
+            s += RULE_WEIGHT * sum(1 for rule in _RULES[label] if rule.search(q))
+            out[label] = s
+        return out
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        scores = self.scores(text)
+        top = max(scores, key=scores.__getitem__)
+        z = sum(math.exp(s - scores[top]) for s in scores.values())
+        return top, 1.0 / z
+
+
+_classifier: Optional[IntentClassifier] = None
+
+
+def get_intent_classifier() -> IntentClassifier:
+    global _classifier
+    if _classifier is None:
+        _classifier = IntentClassifier()
+    return _classifier
+
+
+def classify_local(question: str) -> Tuple[str, float]:
+    return get_intent_classifier().classify(question)
+
+
+_LABEL_RE = re.compile(r"\b(" + "|".join(LABELS) + r")\b")
+_ALIASES = [
+    (re.compile(r"\bleague\b"), "league_info"),
+    (re.compile(r"\brosters?\b"), "rosters"),
+    (re.compile(r"\bmatchups?\b"), "matchups"),
+    (re.compile(r"\bplayers?\b"), "players_search"),
+    (re.compile(r"\btrending\b"), "trending"),
+    (re.compile(r"\b(nfl )?state\b"), "nfl_state"),
+    (re.compile(r"\bstart\b"), "start_sit"),
+    (re.compile(r"\btrade\b"), "trade"),
+    (re.compile(r"\bwaivers?\b"), "waivers"),
+]
+
+
+def parse_label(reply: str) -> Optional[str]:
+    """Map an LLM reply to a label: exact label names first, then whole-word aliases."""
+    text = (reply or "").strip().lower()
+    m = _LABEL_RE.search(text)
+    if m:
+        return m.group(1)
+    for pattern, label in _ALIASES:
+        if pattern.search(text):
+            return label
+    return None
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from typing import List, Tuple
+
+# Training examples for the local intent classifier (app/services/intent.py). The held-out
+# evaluation set lives in bench/fixtures/intent_eval.jsonl; keep the two disjoint.
+TRAINING_EXAMPLES: List[Tuple[str, str]] = [
+    # league_info
+    ("what are the scoring settings in my league", "league_info"),
+    ("is this a ppr league", "league_info"),
+    ("how many teams are in the league", "league_info"),
+    ("what are our roster positions", "league_info"),
+    ("how many points per passing touchdown", "league_info"),
+    ("is our league superflex", "league_info"),
+    ("what is the league name", "league_info"),
+    ("how many starters does each team have", "league_info"),
+    ("explain the league settings", "league_info"),
+    ("do we get bonus points for 100 yard games", "league_info"),
+    ("when is the trade deadline in our league", "league_info"),
+    ("how many playoff teams are there", "league_info"),
+    ("is it half ppr or full ppr", "league_info"),
+    ("what season is this league", "league_info"),
+    ("how many bench spots do we have", "league_info"),
+    ("does the league use te premium", "league_info"),
+    # rosters
+    ("show me my roster", "rosters"),
+    ("who is on my team", "rosters"),
+    ("list all the rosters in the league", "rosters"),
+    ("which team owns justin jefferson", "rosters"),
+    ("what does my team look like", "rosters"),
+    ("show every team's players", "rosters"),
+    ("who has the best roster", "rosters"),
+    ("how deep is my running back room", "rosters"),
+    ("what is my record", "rosters"),
+    ("how many wide receivers do i have", "rosters"),
+    ("who rostered bijan robinson", "rosters"),
+    ("give me a summary of my team", "rosters"),
+    ("which teams are strongest at quarterback", "rosters"),
+    ("rank the rosters in my league", "rosters"),
+    ("who is on the team in first place", "rosters"),
+    ("how old is my roster", "rosters"),
+    # matchups
+    ("who am i playing this week", "matchups"),
+    ("what is my matchup this week", "matchups"),
+    ("am i projected to win this week", "matchups"),
+    ("show this week's matchups", "matchups"),
+    ("who is my opponent", "matchups"),
+    ("how did my matchup go last week", "matchups"),
+    ("what are the weekly matchup previews", "matchups"),
+    ("who is favored in my game", "matchups"),
+    ("how many points is my opponent projected for", "matchups"),
+    ("which matchup is closest this week", "matchups"),
+    ("preview my head to head", "matchups"),
+    ("what is the projected margin in my matchup", "matchups"),
+    ("am i the underdog this week", "matchups"),
+    ("scores for this week's games", "matchups"),
+    ("can i beat my opponent this week", "matchups"),
+    ("what did my opponent score", "matchups"),
+    # players_search
+    ("tell me about ja'marr chase", "players_search"),
+    ("who is puka nacua", "players_search"),
+    ("look up breece hall", "players_search"),
+    ("find player amon-ra st. brown", "players_search"),
+    ("what team does deebo samuel play for", "players_search"),
+    ("how old is derrick henry", "players_search"),
+    ("search for a player named london", "players_search"),
+    ("info on jahmyr gibbs", "players_search"),
+    ("what position does taysom hill play", "players_search"),
+    ("is christian mccaffrey injured", "players_search"),
+    ("give me details on garrett wilson", "players_search"),
+    ("which team is drake london on", "players_search"),
+    ("player profile for tyreek hill", "players_search"),
+    ("what is josh allen's status", "players_search"),
+    ("news on travis kelce", "players_search"),
+    ("how is cooper kupp doing", "players_search"),
+    # trending
+    ("who is trending right now", "trending"),
+    ("most added players this week", "trending"),
+    ("who are people dropping", "trending"),
+    ("what players are hot on sleeper", "trending"),
+    ("trending adds in the last day", "trending"),
+    ("who is everyone picking up", "trending"),
+    ("which players have the most buzz", "trending"),
+    ("top trending drops", "trending"),
+    ("who is getting added the most", "trending"),
+    ("what's hot in fantasy right now", "trending"),
+    ("show the trending list", "trending"),
+    ("any breakout players people are grabbing", "trending"),
+    ("who are the most dropped players", "trending"),
+    ("what players are rising", "trending"),
+    ("who's blowing up on the add list", "trending"),
+    ("popular adds today", "trending"),
+    # nfl_state
+    ("what week is it", "nfl_state"),
+    ("what is the current nfl week", "nfl_state"),
+    ("is it the regular season or playoffs", "nfl_state"),
+    ("what season are we in", "nfl_state"),
+    ("has the season started yet", "nfl_state"),
+    ("what week of the nfl season is this", "nfl_state"),
+    ("is it preseason", "nfl_state"),
+    ("current week number", "nfl_state"),
+    ("when does the season end", "nfl_state"),
+    ("which week are we on", "nfl_state"),
+    ("how many weeks are left in the season", "nfl_state"),
+    ("what is the nfl state", "nfl_state"),
+    ("are we in the offseason", "nfl_state"),
+    ("what's the season type right now", "nfl_state"),
+    ("tell me the current week", "nfl_state"),
+    ("what week does the nfl playoffs start", "nfl_state"),
+    # start_sit
+    ("who should i start this week", "start_sit"),
+    ("should i start jaylen waddle or devonta smith", "start_sit"),
+    ("start or sit david montgomery", "start_sit"),
+    ("who should i bench", "start_sit"),
+    ("set my optimal lineup", "start_sit"),
+    ("which running back should i flex", "start_sit"),
+    ("should i sit my quarterback this week", "start_sit"),
+    ("help me pick my starters", "start_sit"),
+    ("who goes in my flex spot", "start_sit"),
+    ("is my lineup optimal", "start_sit"),
+    ("who do i play at wide receiver", "start_sit"),
+    ("should i play kyren williams or james cook", "start_sit"),
+    ("best lineup for week 8", "start_sit"),
+    ("which tight end should i start", "start_sit"),
+    ("start sit advice", "start_sit"),
+    ("do i start the 49ers defense", "start_sit"),
+    # trade
+    ("should i trade my first round pick", "trade"),
+    ("is this trade fair", "trade"),
+    ("who should i trade for", "trade"),
+    ("would you accept mahomes for lamb", "trade"),
+    ("give me trade targets", "trade"),
+    ("evaluate this trade offer", "trade"),
+    ("what can i get for derrick henry", "trade"),
+    ("who should i sell high on", "trade"),
+    ("buy low candidates", "trade"),
+    ("trade ideas for my team", "trade"),
+    ("is it worth trading two wrs for one rb", "trade"),
+    ("should i accept the trade i was offered", "trade"),
+    ("which team should i trade with", "trade"),
+    ("what is my player worth in a trade", "trade"),
+    ("package a deal for a tight end", "trade"),
+    ("who wins this trade", "trade"),
+    # waivers
+    ("who should i pick up off waivers", "waivers"),
+    ("best waiver wire adds", "waivers"),
+    ("how much faab should i bid", "waivers"),
+    ("any free agents worth adding", "waivers"),
+    ("waiver targets at running back", "waivers"),
+    ("who is available on the waiver wire", "waivers"),
+    ("should i claim this player", "waivers"),
+    ("what free agent should i grab", "waivers"),
+    ("who should i drop for a waiver pickup", "waivers"),
+    ("waiver recommendations", "waivers"),
+    ("best streaming defense on waivers", "waivers"),
+    ("which kicker should i pick up", "waivers"),
+    ("unowned players worth a claim", "waivers"),
+    ("who to add from free agency", "waivers"),
+    ("top waiver pickups this week", "waivers"),
+    ("what's my waiver priority strategy", "waivers"),
+]
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+
+_SLOT_POSITIONS: Dict[str, Set[str]] = {
+    "FLEX": {"RB", "WR", "TE"},
+    "WRRB": {"RB", "WR", "TE"},
+    "WRRBTE": {"RB", "WR", "TE"},
+    "WRRB_FLEX": {"RB", "WR"},
+    "REC_FLEX": {"WR", "TE"},
+    "SUPER_FLEX": {"QB", "RB", "WR", "TE"},
+    "QBRBWRTE": {"QB", "RB", "WR", "TE"},
+    "IDP_FLEX": {"DL", "LB", "DB"},
+}
+_SINGLE_POSITIONS = {"QB", "RB", "WR", "TE", "K", "DEF", "DL", "LB", "DB"}
+
+
+def eligible_positions(slot: str) -> Set[str]:
+    """Player positions that can fill a Sleeper roster slot; empty for BN/IR/TAXI and unknown slots."""
+    s = (slot or "").upper()
+    if s in _SINGLE_POSITIONS:
+        return {s}
+    return _SLOT_POSITIONS.get(s, set())
+
+
+def solve_lineup(positions: Sequence[str], points: Sequence[float], slots: Sequence[str]) -> List[int]:
+    """Exact optimal slot assignment: for each slot, the index of the player starting there (-1 if unfillable).
+
+    Sets of players that can all start together form a transversal matroid, so taking players
+    by descending points and keeping each one that still leaves a complete matching (checked
+    with one augmenting-path search) maximizes the starters' total. Unlike filling slots in
+    roster order, a FLEX never takes a player a later dedicated slot needed.
+    """
+    slot_sets = [eligible_positions(s) for s in slots]
+    # player -> slot indexes they can fill
+    fits = [[j for j, elig in enumerate(slot_sets) if pos in elig] for pos in positions]
+    owner = [-1] * len(slots)
+    open_slots = sum(1 for elig in slot_sets if elig)
+
+    def augment(i: int, seen: List[bool]) -> bool:
+        for j in fits[i]:
+            if seen[j]:
+                continue
+            seen[j] = True
+            if owner[j] < 0 or augment(owner[j], seen):
+                owner[j] = i
+                return True
+        return False
+
+    filled = 0
+    for i in sorted(range(len(positions)), key=lambda k: -points[k]):
+        if filled == open_slots:
+            break
+        if fits[i] and augment(i, [False] * len(slots)):
+            filled += 1
+    return owner
+
+
+def optimal_lineup(roster: Dict[str, Any], players_points: Dict[str, float], roster_positions: List[str], catalog: Any) -> Dict[str, Any]:
+    """Best projected lineup for one roster: starters (in roster_positions order, with slot), bench and total."""
+    candidates = []
+    for pid in (roster.get("players") or []):
+        p = catalog.get(pid) or {}
+        candidates.append({
+            "player_id": pid,
+            "pos": (p.get("position") or "").upper(),
+            "position": p.get("position"),
+            "pts": float(players_points.get(pid) or 0.0),
+            "full_name": p.get("full_name"),
+            "team": p.get("team"),
+        })
+    slots = [s for s in roster_positions if (s or "").upper() != "BN"]
+    owner = solve_lineup([c["pos"] for c in candidates], [c["pts"] for c in candidates], slots)
+    starters = [dict(candidates[i], slot=slots[j]) for j, i in enumerate(owner) if i >= 0]
+    started = {i for i in owner if i >= 0}
+    bench = sorted((c for i, c in enumerate(candidates) if i not in started), key=lambda c: -c["pts"])
+    return {
+        "starters": starters,
+        "bench": bench,
+        "projected_total": round(sum(c["pts"] for c in starters), 2),
+    }
+
+
+class LineupSolver:
+    """optimal_lineup() for every roster of a league-week at once, memoized per roster.
+
+    Entries are keyed on (roster_id, week, points_version, roster players, slots), where
+    points_version is the fingerprint of the matchups payload the projections came from
+    (SleeperClient.data_version), so a new projection or roster move simply misses.
+    """
+
+    def __init__(self, max_entries: int = 2048) -> None:
+        self.max_entries = max_entries
+        self._memo: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    def solve_week(
+        self,
+        rosters: List[Dict[str, Any]],
+        points_by_roster: Dict[Any, Dict[str, float]],
+        roster_positions: List[str],
+        catalog: Any,
+        week: Optional[int] = None,
+        points_version: Optional[int] = None,
+    ) -> Dict[Any, Dict[str, Any]]:
+        slots_key = tuple(roster_positions)
+        results: Dict[Any, Dict[str, Any]] = {}
+        for roster in rosters:
+            rid = roster.get("roster_id")
+            pp = points_by_roster.get(rid) or {}
+            key: Optional[Tuple[Any, ...]] = None
+            if points_version:
+                key = (rid, week, points_version, tuple(roster.get("players") or []), slots_key)
+                hit = self._memo.get(key)
+                if hit is not None:
+                    self._memo.move_to_end(key)
+                    self.stats["hits"] += 1
+                    results[rid] = hit
+                    continue
+            self.stats["misses"] += 1
+            lineup = optimal_lineup(roster, pp, roster_positions, catalog)
+            results[rid] = lineup
+            if key is not None:
+                self._memo[key] = lineup
+                while len(self._memo) > self.max_entries:
+                    self._memo.popitem(last=False)
+        return results
+
+    def clear(self) -> None:
+        self._memo.clear()
+
+
+_solver = LineupSolver()
+
+
+def get_lineup_solver() -> LineupSolver:
+    return _solver
+
+
+def points_by_roster(matchups: List[Dict[str, Any]]) -> Dict[Any, Dict[str, float]]:
+    """roster_id -> players_points from a Sleeper matchups payload."""
+    return {m.get("roster_id"): (m.get("players_points") or {}) for m in (matchups or []) if m.get("roster_id") is not None}
@@ -1,8 +1,15 @@
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import Any
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
 
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
 from langchain_openai import ChatOpenAI
 try:
 	from langchain_groq import ChatGroq
@@ -10,11 +17,295 @@ except Exception:
 	ChatGroq = None  # type: ignore
 
 
-def make_llm() -> Any:
-	provider = os.getenv("LLM_PROVIDER", "openai").lower()
-	model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-	if provider == "groq" and ChatGroq is not None:
-		groq_model = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
-		return ChatGroq(model=groq_model, temperature=0.2)
-	# default
-	return ChatOpenAI(model=model, temperature=0.2)
\ No newline at end of file
+STAGES = ("classify", "synthesize")
+DEFAULT_MODELS = {"openai": "gpt-4o-mini", "groq": "llama-3.1-8b-instant"}
+# Request errors that another provider would reject too
+_NON_RETRYABLE = (400, 422)
+
+Candidate = Tuple[str, str]  # (provider, model)
+
+
+def _env_float(name: str, default: float) -> float:
+	try:
+		return float(os.getenv(name, "") or default)
+	except ValueError:
+		return default
+
+
+def _status(exc: BaseException) -> Optional[int]:
+	code = getattr(exc, "status_code", None)
+	if code is None:
+		code = getattr(getattr(exc, "response", None), "status_code", None)
+	return code if isinstance(code, int) else None
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+	headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+	try:
+		return float(headers.get("retry-after"))
+	except (TypeError, ValueError):
+		return None
+
+
+class _Latency:
+	"""Rolling window of recent latencies for one (provider, model)."""
+
+	def __init__(self, size: int = 200) -> None:
+		self.samples: Deque[float] = deque(maxlen=size)
+
+	def add(self, seconds: float) -> None:
+		self.samples.append(seconds)
+
+	def percentile(self, pct: float) -> Optional[float]:
+		if not self.samples:
+			return None
+		ordered = sorted(self.samples)
+		return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))]
+
+
+class LLMRouter:
+	"""Long-lived router over the configured LLM providers.
+
+	- One chat client per (provider, model), created on first use and reused, so HTTP
+	  connections are pooled across requests.
+	- Each graph stage maps to its own model: {PROVIDER}_MODEL_{STAGE}, else {PROVIDER}_MODEL.
+	- Providers are tried in order (LLM_PROVIDER first); errors, timeouts and 429s fail over to
+	  the next one, and a 429 benches the provider for its Retry-After (or LLM_COOLDOWN_S).
+	- With LLM_HEDGE_PERCENTILE set (e.g. 95), an attempt slower than that percentile of its
+	  recent latencies gets a hedged second request (next provider, else the same one);
+	  the first success wins and the other is cancelled. Streams hedge on time to first token
+	  and can only fail over before the first token.
+	- OPENAI_BASE_URL / GROQ_BASE_URL point the clients at a local fake server for testing.
+	"""
+
+	def __init__(self, providers: Optional[List[str]] = None) -> None:
+		self.providers = providers or self._configured_providers()
+		self.timeout_s = _env_float("LLM_TIMEOUT_S", 60.0)
+		self.cooldown_s = _env_float("LLM_COOLDOWN_S", 30.0)
+		self.hedge_percentile = _env_float("LLM_HEDGE_PERCENTILE", 0.0)
+		self.hedge_min_samples = int(_env_float("LLM_HEDGE_MIN_SAMPLES", 20))
+		self._clients: Dict[Candidate, Any] = {}
+		self._latency: Dict[Tuple[Candidate, str], _Latency] = {}
+		self._cooldown_until: Dict[str, float] = {}
+		self.stats: Dict[str, Dict[str, int]] = {}
+
+	@staticmethod
+	def _configured_providers() -> List[str]:
+		available = ["openai"]
+		if ChatGroq is not None and os.getenv("GROQ_API_KEY"):
+			available.append("groq")
+		primary = os.getenv("LLM_PROVIDER", "openai").lower()
+		if primary in available:
+			available.remove(primary)
+			available.insert(0, primary)
+		return available
+
+	def model_for(self, provider: str, stage: str) -> str:
+		prefix = provider.upper()
+		return os.getenv(f"{prefix}_MODEL_{stage.upper()}") or os.getenv(f"{prefix}_MODEL") or DEFAULT_MODELS.get(provider, "")
+
+	def candidates(self, stage: str) -> List[Candidate]:
+		now = time.monotonic()
+		ordered = [(p, self.model_for(p, stage)) for p in self.providers]
+		ready = [c for c in ordered if self._cooldown_until.get(c[0], 0.0) <= now]
+		# Everyone rate limited: try them anyway rather than fail outright
+		return ready or ordered
+
+	def client(self, provider: str, model: str) -> Any:
+		key = (provider, model)
+		client = self._clients.get(key)
+		if client is None:
+			# The router does retries itself (by failing over), so clients give up fast
+			retries = 0 if len(self.providers) > 1 else 2
+			if provider == "groq" and ChatGroq is not None:
+				client = ChatGroq(model=model, temperature=0.2, max_retries=retries, timeout=self.timeout_s, base_url=os.getenv("GROQ_BASE_URL") or None)
+			else:
+				client = ChatOpenAI(model=model, temperature=0.2, max_retries=retries, timeout=self.timeout_s, base_url=os.getenv("OPENAI_BASE_URL") or None)
+			self._clients[key] = client
+		return client
+
+	def llm_for(self, stage: str) -> "RoutedChatModel":
+		return RoutedChatModel(router=self, stage=stage)
+
+	def _count(self, provider: str, name: str) -> None:
+		counts = self.stats.setdefault(provider, {})
+		counts[name] = counts.get(name, 0) + 1
+
+	def _hedge_delay(self, candidate: Candidate, kind: str) -> Optional[float]:
+		if self.hedge_percentile <= 0:
+			return None
+		window = self._latency.get((candidate, kind))
+		if window is None or len(window.samples) < self.hedge_min_samples:
+			return None
+		return window.percentile(self.hedge_percentile)
+
+	def _failed(self, provider: str, exc: BaseException) -> None:
+		self._count(provider, "errors")
+		if _status(exc) == 429:
+			self._count(provider, "rate_limited")
+			self._cooldown_until[provider] = time.monotonic() + (_retry_after(exc) or self.cooldown_s)
+
+	async def run(self, stage: str, kind: str, attempt: Callable[[Any], Awaitable[Any]], discard: Optional[Callable[[Any], Awaitable[None]]] = None) -> Any:
+		"""Run attempt(client) with failover and optional hedging; kind names the latency window."""
+		queue = list(self.candidates(stage))
+		tasks: Dict[asyncio.Task, Tuple[Candidate, float]] = {}
+		hedged = False
+		last_exc: Optional[BaseException] = None
+
+		def launch(candidate: Candidate) -> None:
+			self._count(candidate[0], "requests")
+			task = asyncio.ensure_future(attempt(self.client(*candidate)))
+			tasks[task] = (candidate, time.monotonic())
+
+		launch(queue.pop(0))
+		try:
+			while tasks:
+				delay = None
+				if not hedged:
+					first = next(iter(tasks.values()))
+					delay = self._hedge_delay(first[0], kind)
+					if delay is not None:
+						delay = max(0.0, delay - (time.monotonic() - first[1]))
+				done, _ = await asyncio.wait(tasks, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+				if not done:
+					hedged = True
+					target = queue.pop(0) if queue else next(iter(tasks.values()))[0]
+					self._count(target[0], "hedges")
+					launch(target)
+					continue
+				winner = None
+				for task in done:
+					candidate, started = tasks.pop(task)
+					exc = task.exception()
+					if exc is None:
+						if winner is None:
+							winner = (candidate, task.result())
+							self._latency.setdefault((candidate, kind), _Latency()).add(time.monotonic() - started)
+							if hedged:
+								self._count(candidate[0], "hedge_wins")
+						elif discard is not None:
+							await discard(task.result())
+						continue
+					last_exc = exc
+					self._failed(candidate[0], exc)
+					if _status(exc) in _NON_RETRYABLE:
+						raise exc
+				if winner is not None:
+					return winner[1]
+				if not tasks and queue:
+					nxt = queue.pop(0)
+					self._count(nxt[0], "failovers")
+					launch(nxt)
+			raise last_exc or RuntimeError("no LLM provider configured")
+		finally:
+			for task in tasks:
+				task.cancel()
+			for task in tasks:
+				try:
+					result = await task
+				except BaseException:
+					continue
+				if discard is not None:
+					await discard(result)
+
+	def run_sync(self, stage: str, kind: str, attempt: Callable[[Any], Any]) -> Any:
+		"""Blocking run(): the same ordered failover, without hedging."""
+		last_exc: Optional[BaseException] = None
+		for i, candidate in enumerate(self.candidates(stage)):
+			if i:
+				self._count(candidate[0], "failovers")
+			self._count(candidate[0], "requests")
+			started = time.monotonic()
+			try:
+				result = attempt(self.client(*candidate))
+			except Exception as exc:
+				last_exc = exc
+				self._failed(candidate[0], exc)
+				if _status(exc) in _NON_RETRYABLE:
+					raise
+				continue
+			self._latency.setdefault((candidate, kind), _Latency()).add(time.monotonic() - started)
+			return result
+		raise last_exc or RuntimeError("no LLM provider configured")
+
+	def snapshot(self) -> Dict[str, Any]:
+		now = time.monotonic()
+		return {
+			"providers": self.providers,
+			"models": {stage: {p: self.model_for(p, stage) for p in self.providers} for stage in STAGES},
+			"clients": len(self._clients),
+			"cooling_down": [p for p, until in self._cooldown_until.items() if until > now],
+			"hedge_percentile": self.hedge_percentile or None,
+			"p50_s": {f"{c[0]}:{c[1]}:{kind}": round(w.percentile(50) or 0.0, 3) for (c, kind), w in self._latency.items()},
+			"stats": self.stats,
+		}
+
+
+class RoutedChatModel(BaseChatModel):
+	"""Chat model for one graph stage that delegates to the router's pooled clients.
+
+	Calls go to the clients' _agenerate/_astream directly, so callbacks (and astream_events)
+	only see this model's output: the winning attempt, never a hedged or failed one.
+	"""
+
+	router: Any
+	stage: str = "synthesize"
+
+	@property
+	def _llm_type(self) -> str:
+		return "routed"
+
+	def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+		def attempt(client: Any) -> ChatResult:
+			return client._generate(messages, stop=stop, **kwargs)
+		return self.router.run_sync(self.stage, "generate", attempt)
+
+	async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+		async def attempt(client: Any) -> ChatResult:
+			return await client._agenerate(messages, stop=stop, **kwargs)
+		return await self.router.run(self.stage, "generate", attempt)
+
+	async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+		async def attempt(client: Any) -> Tuple[List[ChatGenerationChunk], AsyncIterator[ChatGenerationChunk]]:
+			stream = client._astream(messages, stop=stop, **kwargs)
+			head: List[ChatGenerationChunk] = []
+			try:
+				async for chunk in stream:
+					head.append(chunk)
+					# The first chunk carrying text decides the race; role-only chunks come instantly
+					if chunk.text:
+						break
+				return head, stream
+			except BaseException:
+				await stream.aclose()
+				raise
+
+		async def discard(result: Tuple[List[ChatGenerationChunk], AsyncIterator[ChatGenerationChunk]]) -> None:
+			await result[1].aclose()
+
+		head, stream = await self.router.run(self.stage, "first_token", attempt, discard)
+		try:
+			for chunk in head:
+				if run_manager:
+					await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+				yield chunk
+			async for chunk in stream:
+				if run_manager:
+					await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+				yield chunk
+		finally:
+			await stream.aclose()
+
+
+_router: Optional[LLMRouter] = None
+
+
+def get_llm_router() -> LLMRouter:
+	global _router
+	if _router is None:
+		_router = LLMRouter()
+	return _router
+
+
+def make_llm(stage: str = "synthesize") -> Any:
+	return get_llm_router().llm_for(stage)
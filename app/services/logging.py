@@ -3,11 +3,17 @@ from __future__ import annotations
 import json
 import os
 import time
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from app.services.append_writer import get_append_writer
+
 
 LOG_PATH = "/workspace/data/logs.jsonl"
+# Past LOG_MAX_BYTES the log is rotated to logs.jsonl.<stamp>.gz, keeping LOG_BACKUPS archives
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "5"))
+
+get_append_writer().rotate(LOG_PATH, LOG_MAX_BYTES, LOG_BACKUPS)
 
 
 def append_agent_log(
@@ -18,7 +24,6 @@ def append_agent_log(
 	timings: Dict[str, float],
 	meta: Optional[Dict[str, Any]] = None,
 ) -> None:
-	Path(os.path.dirname(LOG_PATH)).mkdir(parents=True, exist_ok=True)
 	entry = {
 		"ts": time.time(),
 		"question": question,
@@ -29,5 +34,5 @@ def append_agent_log(
 	}
 	if meta:
 		entry["meta"] = meta
-	with open(LOG_PATH, "a", encoding="utf-8") as f:
-		f.write(json.dumps(entry, ensure_ascii=False) + "\n")
\ No newline at end of file
+	# Queued; the append writer batches it to disk off the event loop
+	get_append_writer().append(LOG_PATH, json.dumps(entry, ensure_ascii=False))
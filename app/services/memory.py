@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from pydantic import BaseModel
 
@@ -16,31 +21,134 @@ class UserPreferences(BaseModel):
 
 
 class MemoryStore:
-    def __init__(self, filepath: str = "/workspace/data/memory.json") -> None:
+    """Per-user preferences in a WAL-mode SQLite table, fronted by an LRU write-through cache.
+
+    Reads hit the cache (no row read) unless another connection has committed since, which
+    PRAGMA data_version reveals; writes are single-row upserts, so users never overwrite each
+    other. The a*-variants run all of it, cache lookups included, off the event loop. The
+    legacy memory.json is imported once into the table on first open.
+    """
+
+    def __init__(self, filepath: str = "/workspace/data/memory.json", db_path: Optional[str] = None, cache_size: int = 4096) -> None:
         self.filepath = filepath
-        Path(os.path.dirname(filepath)).mkdir(parents=True, exist_ok=True)
-        if not os.path.exists(filepath):
-            self._write({})
-
-    def _read(self) -> Dict[str, Any]:
-        try:
-            with open(self.filepath, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {}
-
-    def _write(self, data: Dict[str, Any]) -> None:
-        tmp_path = self.filepath + ".tmp"
-        with open(tmp_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        os.replace(tmp_path, self.filepath)
+        self.db_path = db_path or os.path.splitext(filepath)[0] + ".sqlite3"
+        self.cache_size = cache_size
+        Path(os.path.dirname(self.db_path) or ".").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS preferences (user_id TEXT PRIMARY KEY, prefs TEXT NOT NULL, updated REAL NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._migrate_json()
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "writes": 0, "invalidations": 0}
+
+    def _migrate_json(self) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                done = self._conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+                if done is None:
+                    legacy: Dict[str, Any] = {}
+                    if os.path.exists(self.filepath):
+                        try:
+                            with open(self.filepath, "r", encoding="utf-8") as f:
+                                legacy = json.load(f)
+                        except Exception:
+                            legacy = {}
+                    now = time.time()
+                    # OR IGNORE: never clobber rows written through the store
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO preferences (user_id, prefs, updated) VALUES (?, ?, ?)",
+                        [(str(uid), json.dumps(raw, ensure_ascii=False), now) for uid, raw in legacy.items() if isinstance(raw, dict)],
+                    )
+                    self._conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (json.dumps({"ts": now, "users": len(legacy)}),))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _cached(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._data_version:
+                # Another process wrote; its rows may be in our cache
+                self._data_version = version
+                self._cache.clear()
+                self.stats["invalidations"] += 1
+                return None
+            raw = self._cache.get(user_id)
+            if raw is not None:
+                self._cache.move_to_end(user_id)
+                self.stats["hits"] += 1
+            return raw
+
+    def _remember(self, user_id: str, raw: Dict[str, Any]) -> None:
+        # Caller holds the lock
+        self._cache[user_id] = raw
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _load(self, user_id: str) -> Dict[str, Any]:
+        with self._lock:
+            self.stats["misses"] += 1
+            row = self._conn.execute("SELECT prefs FROM preferences WHERE user_id = ?", (user_id,)).fetchone()
+            raw = json.loads(row[0]) if row else {}
+            self._remember(user_id, raw)
+            return raw
+
+    def _store(self, user_id: str, raw: Dict[str, Any], merge: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if merge:
+                    row = self._conn.execute("SELECT prefs FROM preferences WHERE user_id = ?", (user_id,)).fetchone()
+                    raw = {**(json.loads(row[0]) if row else {}), **raw}
+                self._conn.execute(
+                    "INSERT INTO preferences (user_id, prefs, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET prefs = excluded.prefs, updated = excluded.updated",
+                    (user_id, json.dumps(raw, ensure_ascii=False), time.time()),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            # Our own commit bumps nothing in data_version, so the cache stays valid
+            self._remember(user_id, raw)
+            self.stats["writes"] += 1
+            return raw
+
+    def _get(self, user_id: str) -> Dict[str, Any]:
+        raw = self._cached(user_id)
+        if raw is None:
+            raw = self._load(user_id)
+        return raw
 
     def get_preferences(self, user_id: str = "default") -> UserPreferences:
-        data = self._read()
-        raw = data.get(user_id, {})
-        return UserPreferences(**raw)
+        return UserPreferences(**self._get(user_id))
 
     def set_preferences(self, prefs: UserPreferences, user_id: str = "default") -> None:
-        data = self._read()
-        data[user_id] = prefs.model_dump(exclude_none=True)
-        self._write(data)
\ No newline at end of file
+        self._store(user_id, prefs.model_dump(exclude_none=True))
+
+    async def aget_preferences(self, user_id: str = "default") -> UserPreferences:
+        # Even a cache hit takes the lock and checks data_version, either of which can wait on a writer
+        return UserPreferences(**await asyncio.to_thread(self._get, user_id))
+
+    async def aset_preferences(self, prefs: UserPreferences, user_id: str = "default") -> None:
+        await asyncio.to_thread(self._store, user_id, prefs.model_dump(exclude_none=True))
+
+    async def aupdate_preferences(self, user_id: str = "default", **changes: Any) -> UserPreferences:
+        """Merge the non-None changes into the stored preferences in one transaction."""
+        changes = {k: v for k, v in changes.items() if v is not None}
+        raw = await asyncio.to_thread(self._store, user_id, UserPreferences(**changes).model_dump(exclude_none=True), True)
+        return UserPreferences(**raw)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "size": len(self._cache), "max_entries": self.cache_size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import asyncio
+import codecs
 import re
 import time
-from typing import Any, Dict, List
-from urllib.parse import urlparse
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urljoin, urlparse
 
 import httpx
 from xml.etree import ElementTree as ET
@@ -20,6 +23,11 @@ HTML_SOURCES = [
 	{"name": "The Huddle", "url": "https://tools.thehuddle.com/nfl-fantasy-football-player-news/?feed=0"},
 ]
 
+# Caps per fetched source: bytes read off the wire and items kept
+MAX_FEED_BYTES = 2 * 1024 * 1024
+MAX_FEED_ITEMS = 200
+PARSE_CHUNK = 64 * 1024
+
 
 def _domain(url: str) -> str:
 	try:
@@ -39,29 +47,185 @@ def _tl_dr(text: str, max_len: int = 180) -> str:
 	return res
 
 
+def _chunks(content: Union[bytes, str, Iterable[Any]]) -> Iterable[Any]:
+	if isinstance(content, (bytes, str)):
+		return (content[i:i + PARSE_CHUNK] for i in range(0, len(content), PARSE_CHUNK))
+	return content
+
+
+def _local(tag: Any) -> str:
+	# "{namespace}item" -> "item"
+	return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def parse_rss(content: Union[bytes, Iterable[bytes]], source_name: str, max_items: int = MAX_FEED_ITEMS) -> List[Dict[str, Any]]:
+	"""Incrementally parse RSS <item>s, stopping after max_items; a truncated document yields what parsed so far."""
+	items: List[Dict[str, Any]] = []
+	parser = ET.XMLPullParser(events=("end",))
+	try:
+		for chunk in _chunks(content):
+			parser.feed(chunk)
+			for _, el in parser.read_events():
+				if _local(el.tag) != "item":
+					continue
+				fields = {_local(child.tag): (child.text or "").strip() for child in el}
+				# Parsed items are not needed in the tree any more
+				el.clear()
+				title = fields.get("title", "")
+				link = fields.get("link", "")
+				desc = fields.get("description", "")
+				items.append({
+					"source": source_name,
+					"title": title,
+					"link": link,
+					"description": desc,
+					"published": fields.get("pubDate", ""),
+					"tldr": _tl_dr(desc or title),
+					"domain": _domain(link),
+				})
+				if len(items) >= max_items:
+					return items
+		parser.close()
+	except ET.ParseError:
+		pass
+	return items
+
+
+class _AnchorCollector(HTMLParser):
+	"""Collects text-only <a href> anchors (8-120 chars) with about 200 chars of following text as the snippet."""
+
+	CONTEXT = 200
+
+	def __init__(self, source_name: str, base_url: str, max_items: int) -> None:
+		super().__init__(convert_charrefs=True)
+		self.source_name = source_name
+		self.base_url = base_url
+		self.max_items = max_items
+		self.items: List[Dict[str, Any]] = []
+		self._href: Optional[str] = None
+		self._title: List[str] = []
+		self._nested = False
+		self._skip = 0  # inside <script>/<style>
+		self._before = ""
+		self._pending: List[Dict[str, Any]] = []
+
+	@property
+	def done(self) -> bool:
+		return len(self.items) >= self.max_items and not self._pending
+
+	def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+		if tag in ("script", "style"):
+			self._skip += 1
+		elif tag == "a":
+			href = dict(attrs).get("href")
+			self._href = href or None
+			self._title = []
+			self._nested = False
+		elif self._href is not None:
+			self._nested = True
+
+	def handle_endtag(self, tag: str) -> None:
+		if tag in ("script", "style"):
+			self._skip = max(0, self._skip - 1)
+		elif tag == "a" and self._href is not None:
+			title = " ".join("".join(self._title).split())
+			if not self._nested and 8 <= len(title) <= 120 and len(self.items) + len(self._pending) < self.max_items:
+				self._pending.append({"link": urljoin(self.base_url, self._href), "title": title, "before": self._before, "after": ""})
+			self._href = None
+			self._text(title)
+
+	def handle_data(self, data: str) -> None:
+		if self._skip:
+			return
+		if self._href is not None:
+			self._title.append(data)
+		else:
+			self._text(" ".join(data.split()))
+
+	def _text(self, text: str) -> None:
+		if not text:
+			return
+		self._before = (self._before + " " + text)[-self.CONTEXT:]
+		# Pending anchors (whose "after" starts with their own title) wait for trailing context
+		still: List[Dict[str, Any]] = []
+		for p in self._pending:
+			p["after"] = f"{p['after']} {text}"
+			if len(p["after"]) >= self.CONTEXT:
+				self._emit(p)
+			else:
+				still.append(p)
+		self._pending = still
+
+	def finish(self) -> None:
+		for p in self._pending:
+			self._emit(p)
+		self._pending = []
+
+	def _emit(self, p: Dict[str, Any]) -> None:
+		# Text following the headline is usually its blurb; fall back to the lead-in near the page end
+		after = " ".join(p["after"].split())
+		snippet = after if len(after) >= 80 else " ".join(f"{p['before']} {after}".split())
+		self.items.append({
+			"source": self.source_name,
+			"title": p["title"],
+			"link": p["link"],
+			"description": snippet[:240],
+			"published": "",
+			"tldr": _tl_dr(snippet or p["title"]),
+			"domain": _domain(p["link"]),
+		})
+
+
+def parse_html(content: Union[bytes, str, Iterable[Any]], source_name: str, base_url: str, max_items: int = MAX_FEED_ITEMS, encoding: str = "utf-8") -> List[Dict[str, Any]]:
+	"""Tokenize HTML chunk by chunk (no whole-page regex), keeping at most max_items anchors."""
+	collector = _AnchorCollector(source_name, base_url, max_items)
+	decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+	for chunk in _chunks(content):
+		collector.feed(decoder.decode(chunk) if isinstance(chunk, bytes) else chunk)
+		if collector.done:
+			break
+	else:
+		collector.feed(decoder.decode(b"", final=True))
+		collector.close()
+	collector.finish()
+	return collector.items[:max_items]
+
+
+async def read_capped(resp: httpx.Response, max_bytes: int = MAX_FEED_BYTES) -> List[bytes]:
+	"""Body of a streamed response as chunks, truncated at max_bytes."""
+	chunks: List[bytes] = []
+	total = 0
+	async for chunk in resp.aiter_bytes():
+		chunk = chunk[: max_bytes - total]
+		chunks.append(chunk)
+		total += len(chunk)
+		if total >= max_bytes:
+			break
+	return chunks
+
+
+async def fetch_source(client: httpx.AsyncClient, src: Dict[str, Any], kind: str, headers: Optional[Dict[str, str]] = None) -> Tuple[httpx.Response, Optional[List[Dict[str, Any]]]]:
+	"""Stream one source with size caps and parse it off the event loop; items is None on 304."""
+	async with client.stream("GET", src["url"], headers=headers) as resp:
+		if resp.status_code == 304:
+			return resp, None
+		resp.raise_for_status()
+		chunks = await read_capped(resp)
+	if kind == "html":
+		items = await asyncio.to_thread(parse_html, chunks, src["name"], src["url"], MAX_FEED_ITEMS, resp.encoding or "utf-8")
+	else:
+		items = await asyncio.to_thread(parse_rss, chunks, src["name"])
+	return resp, items
+
+
 async def fetch_rss_news(sources: List[Dict[str, str]] | None = None, timeout_s: float = 10.0) -> List[Dict[str, Any]]:
 	items: List[Dict[str, Any]] = []
 	sources = sources or RSS_SOURCES
 	async with httpx.AsyncClient(timeout=timeout_s) as client:
 		for src in sources:
 			try:
-				resp = await client.get(src["url"])  # type: ignore
-				resp.raise_for_status()
-				root = ET.fromstring(resp.content)
-				for it in root.findall(".//item"):
-					title = (it.findtext("title") or "").strip()
-					link = (it.findtext("link") or "").strip()
-					desc = (it.findtext("description") or "").strip()
-					pub = (it.findtext("pubDate") or "").strip()
-					items.append({
-						"source": src["name"],
-						"title": title,
-						"link": link,
-						"description": desc,
-						"published": pub,
-						"tldr": _tl_dr(desc or title),
-						"domain": _domain(link),
-					})
+				_, parsed = await fetch_source(client, src, "rss")
+				items.extend(parsed or [])
 			except Exception:
 				continue
 	return items
@@ -72,32 +236,8 @@ async def fetch_html_news(timeout_s: float = 10.0) -> List[Dict[str, Any]]:
 	async with httpx.AsyncClient(timeout=timeout_s) as client:
 		for src in HTML_SOURCES:
 			try:
-				r = await client.get(src["url"])  # type: ignore
-				r.raise_for_status()
-				html = r.text
-				# Naive extraction of article links and titles
-				for m in re.finditer(r'<a[^>]+href="([^"]+)"[^>]*>([^<]{8,120})</a>', html, flags=re.IGNORECASE):
-					link = m.group(1)
-					title = re.sub(r"\s+", " ", m.group(2)).strip()
-					if not title or not link: continue
-					if not link.startswith('http'):
-						# best-effort absolute link
-						base = src["url"]
-						u = urlparse(base)
-						link = f"{u.scheme}://{u.hostname}{link}"
-					# build short snippet by grabbing 140 chars around the anchor
-					start = max(0, m.start() - 200); end = min(len(html), m.end() + 200)
-					snippet = re.sub(r"<[^>]+>", " ", html[start:end])
-					snippet = re.sub(r"\s+", " ", snippet).strip()
-					items.append({
-						"source": src["name"],
-						"title": title,
-						"link": link,
-						"description": snippet[:240],
-						"published": "",
-						"tldr": _tl_dr(snippet or title),
-						"domain": _domain(link),
-					})
+				_, parsed = await fetch_source(client, src, "html")
+				items.extend(parsed or [])
 			except Exception:
 				continue
 	return items
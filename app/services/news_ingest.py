@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+import httpx
+
+from app.services.news_aggregator import HTML_SOURCES, RSS_SOURCES, fetch_source
+from app.services.news_tagger import NewsTagger, get_news_tagger
+from app.services.player_catalog import PlayerCatalog
+
+
+RSS_POLL_S = 300.0
+HTML_POLL_S = 600.0
+MAX_BACKOFF_S = 3600.0
+NEWS_MAX_AGE_S = 72 * 3600.0
+NEWS_MAX_ITEMS = 3000
+
+
+def _published_ts(published: str) -> Optional[float]:
+    if not published:
+        return None
+    try:
+        return parsedate_to_datetime(published).timestamp()
+    except Exception:
+        return None
+
+
+class NewsStore:
+    """Deduplicated, time-bounded feed items, newest first.
+
+    Items are keyed by link (title for link-less items); re-ingesting a known item keeps its
+    first_seen time. Anything older than max_age_s, or beyond max_items, is dropped. Tagged
+    items (player_ids, see NewsTagger) are also indexed by player for for_players().
+    """
+
+    def __init__(self, max_age_s: float = NEWS_MAX_AGE_S, max_items: int = NEWS_MAX_ITEMS) -> None:
+        self.max_age_s = max_age_s
+        self.max_items = max_items
+        self._items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._by_player: Dict[str, Set[str]] = {}
+        self.version = 0  # bumped whenever items are added or dropped
+
+    @staticmethod
+    def _key(item: Dict[str, Any]) -> str:
+        return item.get("link") or f"{item.get('source')}:{item.get('title')}"
+
+    def add(self, items: List[Dict[str, Any]]) -> int:
+        """Insert new items; returns how many were not already stored."""
+        now = time.time()
+        added = 0
+        for it in items:
+            key = self._key(it)
+            if not key or key in self._items:
+                continue
+            it = dict(it)
+            it["first_seen"] = now
+            it["ts"] = _published_ts(it.get("published") or "") or now
+            self._items[key] = it
+            self._index(key, it)
+            added += 1
+        if added:
+            self.version += 1
+        self.prune(now)
+        return added
+
+    def prune(self, now: Optional[float] = None) -> None:
+        cutoff = (now or time.time()) - self.max_age_s
+        stale = [k for k, it in self._items.items() if it["ts"] < cutoff]
+        for k in stale:
+            self._drop(k)
+        overflow = len(self._items) - self.max_items
+        if overflow > 0:
+            for k, _ in sorted(self._items.items(), key=lambda kv: kv[1]["ts"])[:overflow]:
+                self._drop(k)
+        if stale or overflow > 0:
+            self.version += 1
+
+    def _index(self, key: str, item: Dict[str, Any]) -> None:
+        for pid in item.get("player_ids") or ():
+            self._by_player.setdefault(pid, set()).add(key)
+
+    def _unindex(self, key: str, item: Dict[str, Any]) -> None:
+        for pid in item.get("player_ids") or ():
+            keys = self._by_player.get(pid)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_player[pid]
+
+    def _drop(self, key: str) -> None:
+        self._unindex(key, self._items.pop(key))
+
+    def reindex(self) -> None:
+        """Rebuild the player index after items were (re)tagged in place."""
+        self._by_player = {}
+        for key, it in self._items.items():
+            self._index(key, it)
+        self.version += 1
+
+    def items(self, lookback_s: Optional[float] = None) -> List[Dict[str, Any]]:
+        cutoff = time.time() - lookback_s if lookback_s else 0.0
+        return sorted((it for it in self._items.values() if it["ts"] >= cutoff), key=lambda it: it["ts"], reverse=True)
+
+    def for_players(self, player_ids: Iterable[str], lookback_s: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Items tagged with any of player_ids, newest first."""
+        keys: Set[str] = set()
+        for pid in player_ids:
+            keys |= self._by_player.get(pid, set())
+        cutoff = time.time() - lookback_s if lookback_s else 0.0
+        hits = (self._items[k] for k in keys)
+        return sorted((it for it in hits if it["ts"] >= cutoff), key=lambda it: it["ts"], reverse=True)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class NewsIngester:
+    """Polls every news source concurrently on its own schedule and feeds a NewsStore.
+
+    Requests are conditional (ETag / If-Modified-Since), so unchanged feeds cost a 304. A
+    failing source backs off exponentially (with jitter) up to MAX_BACKOFF_S without slowing
+    the others. Endpoints read the store instead of crawling per request.
+
+    With a catalog_loader (e.g. SleeperClient.get_players), new items are tagged with the
+    player_ids they mention at ingest; a refreshed catalog retags the whole store.
+    """
+
+    def __init__(self, sources: Optional[List[Dict[str, Any]]] = None, store: Optional[NewsStore] = None, timeout_s: float = 10.0) -> None:
+        if sources is None:
+            sources = [dict(s, kind="rss", interval_s=RSS_POLL_S) for s in RSS_SOURCES]
+            sources += [dict(s, kind="html", interval_s=HTML_POLL_S) for s in HTML_SOURCES]
+        self.sources = sources
+        self.store = store or NewsStore()
+        self.timeout_s = timeout_s
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tasks: List[asyncio.Task] = []
+        self._state: Dict[str, Dict[str, Any]] = {
+            s["name"]: {"etag": None, "last_modified": None, "failures": 0, "last_ok": None, "last_error": None, "not_modified": 0, "polls": 0}
+            for s in sources
+        }
+        self._first_round: Optional[asyncio.Event] = None
+        self._pending_first = len(sources)
+        self._catalog_loader: Optional[Callable[[], Awaitable[PlayerCatalog]]] = None
+        self._tagged_catalog: Optional[PlayerCatalog] = None
+        self._tag_lock = asyncio.Lock()
+
+    @property
+    def tagging(self) -> bool:
+        """True once stored items carry player_ids."""
+        return self._tagged_catalog is not None
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    def start(self, catalog_loader: Optional[Callable[[], Awaitable[PlayerCatalog]]] = None) -> None:
+        if catalog_loader is not None:
+            self._catalog_loader = catalog_loader
+        if self.running:
+            return
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout_s, follow_redirects=True, headers={"User-Agent": "dynasty-agent/1.0"})
+        self._first_round = asyncio.Event()
+        self._pending_first = len(self.sources)
+        if not self.sources:
+            self._first_round.set()
+        self._tasks = [asyncio.ensure_future(self._poll_loop(src)) for src in self.sources]
+
+    async def aclose(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def poll_source(self, src: Dict[str, Any]) -> int:
+        """One conditional fetch of a source; returns the number of new items stored."""
+        assert self._client is not None
+        state = self._state[src["name"]]
+        headers = {}
+        if state["etag"]:
+            headers["If-None-Match"] = state["etag"]
+        if state["last_modified"]:
+            headers["If-Modified-Since"] = state["last_modified"]
+        state["polls"] += 1
+        resp, items = await fetch_source(self._client, src, src.get("kind") or "rss", headers=headers)
+        if items is None:
+            state["not_modified"] += 1
+            return 0
+        state["etag"] = resp.headers.get("ETag")
+        state["last_modified"] = resp.headers.get("Last-Modified")
+        tagger = await self._tagger()
+        if tagger is not None:
+            await asyncio.to_thread(tagger.tag_items, items)
+        return self.store.add(items)
+
+    async def _tagger(self) -> Optional[NewsTagger]:
+        if self._catalog_loader is None:
+            return None
+        try:
+            catalog = await self._catalog_loader()
+        except Exception:
+            return None
+        if catalog is None or not hasattr(catalog, "derived"):
+            return None
+        if catalog is not self._tagged_catalog:
+            async with self._tag_lock:
+                if catalog is not self._tagged_catalog:
+                    # First catalog, or a refreshed one: build its automaton off the loop and retag what's stored
+                    tagger = await asyncio.to_thread(get_news_tagger, catalog)
+                    await asyncio.to_thread(tagger.tag_items, self.store.items())
+                    self.store.reindex()
+                    self._tagged_catalog = catalog
+        return get_news_tagger(catalog)
+
+    async def _poll_loop(self, src: Dict[str, Any]) -> None:
+        state = self._state[src["name"]]
+        interval = float(src.get("interval_s") or RSS_POLL_S)
+        first = True
+        while True:
+            try:
+                await self.poll_source(src)
+                state["failures"] = 0
+                state["last_ok"] = time.time()
+                state["last_error"] = None
+                delay = interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                state["failures"] += 1
+                state["last_error"] = str(e) or type(e).__name__
+                delay = min(MAX_BACKOFF_S, interval * (2 ** min(state["failures"], 6)))
+            if first:
+                first = False
+                self._pending_first -= 1
+                if self._pending_first <= 0 and self._first_round is not None:
+                    self._first_round.set()
+            # Jitter keeps sources (and workers) from polling in lockstep
+            await asyncio.sleep(delay * random.uniform(0.9, 1.1))
+
+    async def ready(self) -> None:
+        """Wait until every source has been polled once since start()."""
+        if self._first_round is not None and not self._first_round.is_set():
+            await asyncio.shield(self._first_round.wait())
+
+    async def get_items(self, lookback_hours: Optional[float] = None, wait_s: float = 0.0) -> List[Dict[str, Any]]:
+        """Stored items, newest first. Right after startup, waits up to wait_s for the first poll round."""
+        if wait_s > 0:
+            try:
+                await asyncio.wait_for(self.ready(), wait_s)
+            except asyncio.TimeoutError:
+                pass
+        return self.store.items(lookback_hours * 3600.0 if lookback_hours else None)
+
+    async def player_news(self, player_ids: Iterable[str], lookback_hours: Optional[float] = None, wait_s: float = 0.0) -> List[Dict[str, Any]]:
+        """Stored items tagged with any of player_ids, newest first."""
+        if wait_s > 0:
+            try:
+                await asyncio.wait_for(self.ready(), wait_s)
+            except asyncio.TimeoutError:
+                pass
+        return self.store.for_players(player_ids, lookback_hours * 3600.0 if lookback_hours else None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "tagging": self.tagging,
+            "items": len(self.store),
+            "sources": {name: dict(st) for name, st in self._state.items()},
+        }
+
+
+_ingester: Optional[NewsIngester] = None
+
+
+def get_news_ingester() -> NewsIngester:
+    global _ingester
+    if _ingester is None:
+        _ingester = NewsIngester()
+    return _ingester
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, List, Set
+
+from app.services.player_catalog import PlayerCatalog
+from app.services.player_search import FANTASY_POSITIONS, fuzzy_key, normalize_name
+
+# "Jefferson's" -> "Jefferson s", so the possessive doesn't glue onto the name once normalized
+_POSSESSIVE = re.compile(r"['\u2019]s\b", re.IGNORECASE)
+
+
+class NewsTagger:
+    """Aho-Corasick automaton over player names, built once per PlayerCatalog.
+
+    Patterns are the normalized full name, the name without a generational suffix, and
+    "first-initial last" ("B. Robinson" -> "b robinson") for players on an NFL team when no other
+    such player shares it, all padded with spaces so they only match whole words. One pass over an item's normalized text finds
+    every player mentioned, however many names are compiled in.
+    """
+
+    def __init__(self, catalog: PlayerCatalog) -> None:
+        patterns: Dict[str, Set[str]] = {}
+        initials: Dict[str, Set[str]] = {}
+        for rec in catalog.values():
+            if (rec.position or "").upper() not in FANTASY_POSITIONS:
+                continue
+            full = normalize_name(rec.name)
+            if " " not in full:
+                continue
+            for form in {full, fuzzy_key(rec.name)}:
+                if " " in form:
+                    patterns.setdefault(f" {form} ", set()).add(rec.player_id)
+            if rec.team and rec.first_name and rec.last_name:
+                initials.setdefault(normalize_name(f"{rec.first_name[0]} {rec.last_name}"), set()).add(rec.player_id)
+        # "B. Robinson" could be Bijan or Brian: an ambiguous initial tags nobody
+        for form, pids in initials.items():
+            if len(pids) == 1 and " " in form:
+                patterns.setdefault(f" {form} ", set()).update(pids)
+        self._build(patterns)
+        self.patterns = len(patterns)
+
+    def _build(self, patterns: Dict[str, Set[str]]) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Set[str]] = [set()]
+        for pattern, pids in patterns.items():
+            node = 0
+            for ch in pattern:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append(set())
+                node = nxt
+            out[node] |= pids
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                queue.append(nxt)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0) if goto[f].get(ch, 0) != nxt else 0
+                out[nxt] |= out[fail[nxt]]
+        self._goto = goto
+        self._fail = fail
+        self._out = [frozenset(o) for o in out]
+
+    def tag(self, text: str) -> Set[str]:
+        """player_ids of every player named in text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[str] = set()
+        node = 0
+        for ch in f" {normalize_name(_POSSESSIVE.sub(' s', text or ''))} ":
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found |= out[node]
+        return found
+
+    def tag_items(self, items: Iterable[Dict[str, Any]]) -> None:
+        """Set item["player_ids"] from its title and description."""
+        for it in items:
+            it["player_ids"] = sorted(self.tag(f"{it.get('title') or ''} \n {it.get('description') or ''}"))
+
+
+def get_news_tagger(catalog: PlayerCatalog) -> NewsTagger:
+    return catalog.derived("news_tagger", NewsTagger)
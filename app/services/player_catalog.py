@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+FIELDS = ("player_id", "full_name", "first_name", "last_name", "position", "team", "status", "age")
+
+
+def _intern(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return sys.intern(str(value))
+
+
+def _age(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class PlayerRecord:
+    """The handful of player fields the app reads, with a dict-like .get() so call sites stay unchanged."""
+
+    # full_name is only stored when it isn't simply "first last", which is true for nearly every player
+    __slots__ = ("player_id", "_full_name", "first_name", "last_name", "position", "team", "status", "age")
+
+    def __init__(self, player_id, full_name=None, first_name=None, last_name=None, position=None, team=None, status=None, age=None) -> None:
+        self.player_id = player_id
+        self._full_name = None if full_name == f"{first_name} {last_name}" else full_name
+        self.first_name = first_name
+        self.last_name = last_name
+        self.position = position
+        self.team = team
+        self.status = status
+        self.age = age
+
+    @classmethod
+    def from_raw(cls, player_id: str, p: Dict[str, Any]) -> "PlayerRecord":
+        return cls(
+            _intern(player_id),
+            _intern(p.get("full_name")),
+            _intern(p.get("first_name")),
+            _intern(p.get("last_name")),
+            _intern(p.get("position")),
+            _intern(p.get("team")),
+            _intern(p.get("status")),
+            _age(p.get("age")),
+        )
+
+    @property
+    def full_name(self) -> Optional[str]:
+        if self._full_name is not None:
+            return self._full_name
+        if self.first_name is not None and self.last_name is not None:
+            return f"{self.first_name} {self.last_name}"
+        return None
+
+    @property
+    def name(self) -> str:
+        return self.full_name or f"{self.first_name or ''} {self.last_name or ''}".strip()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Missing and null fields both fall back to default (e.g. p.get("first_name", ""))
+        value = getattr(self, key) if key in FIELDS else None
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in FIELDS
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {f: getattr(self, f) for f in FIELDS}
+
+    def __repr__(self) -> str:
+        return f"PlayerRecord({self.player_id!r}, {self.name!r}, {self.position!r}, {self.team!r})"
+
+
+class PlayerCatalog(Mapping):
+    """Read-only player_id -> PlayerRecord map built from the Sleeper /players/nfl payload.
+
+    Only the fields in FIELDS are kept resident; full Sleeper records are written to a JSONL
+    side file and read back one line at a time through raw().
+    """
+
+    def __init__(self, records: Dict[str, PlayerRecord], fetched_ts: float = 0.0, raw_path: Optional[str] = None, raw_offsets: Optional[Dict[str, int]] = None) -> None:
+        self._records = records
+        self.fetched_ts = fetched_ts
+        self.raw_path = raw_path
+        self._raw_offsets = raw_offsets or {}
+        # Indexes built from this catalog (search, fuzzy, ...); a refresh creates a new catalog so they rebuild
+        self._derived: Dict[str, Any] = {}
+
+    def derived(self, name: str, build: Callable[["PlayerCatalog"], Any]) -> Any:
+        """Return the index registered under name, building it from this catalog on first use."""
+        index = self._derived.get(name)
+        if index is None:
+            index = self._derived[name] = build(self)
+        return index
+
+    def has_derived(self, name: str) -> bool:
+        return name in self._derived
+
+    @classmethod
+    def from_raw(cls, players: Dict[str, Any], fetched_ts: float = 0.0) -> "PlayerCatalog":
+        records = {sys.intern(str(pid)): PlayerRecord.from_raw(pid, p or {}) for pid, p in (players or {}).items()}
+        return cls(records, fetched_ts=fetched_ts)
+
+    # Mapping interface
+    def __getitem__(self, player_id: str) -> PlayerRecord:
+        return self._records[player_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, player_id: object) -> bool:
+        return player_id in self._records
+
+    def get(self, player_id: str, default: Any = None) -> Any:
+        return self._records.get(player_id, default)
+
+    # Raw records, loaded on demand
+    def write_raw(self, players: Dict[str, Any], raw_path: str) -> None:
+        """Write full Sleeper records as JSONL and remember each line's byte offset."""
+        Path(os.path.dirname(raw_path)).mkdir(parents=True, exist_ok=True)
+        offsets: Dict[str, int] = {}
+        tmp_path = raw_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for pid, p in players.items():
+                offsets[sys.intern(str(pid))] = f.tell()
+                f.write(json.dumps(p, ensure_ascii=False).encode("utf-8") + b"\n")
+        os.replace(tmp_path, raw_path)
+        self.raw_path = raw_path
+        self._raw_offsets = offsets
+
+    def raw(self, player_id: str) -> Optional[Dict[str, Any]]:
+        offset = self._raw_offsets.get(player_id)
+        if offset is None or not self.raw_path:
+            return None
+        try:
+            with open(self.raw_path, "rb") as f:
+                f.seek(offset)
+                return json.loads(f.readline())
+        except Exception:
+            return None
+
+    # Snapshot (de)serialization as columns; far smaller and faster to unpickle than objects
+    def to_snapshot(self) -> Dict[str, Any]:
+        columns: Dict[str, List[Any]] = {f: [] for f in FIELDS}
+        for rec in self._records.values():
+            for f in FIELDS:
+                columns[f].append(getattr(rec, f))
+        return {
+            "format": "columns",
+            "ts": self.fetched_ts,
+            "columns": columns,
+            "raw_path": self.raw_path,
+            "raw_offsets": self._raw_offsets,
+        }
+
+    @classmethod
+    def from_snapshot(cls, snap: Dict[str, Any]) -> "PlayerCatalog":
+        ts = float(snap.get("ts") or 0.0)
+        if snap.get("format") != "columns":
+            # Older snapshots stored the raw payload
+            return cls.from_raw(snap.get("players") or {}, fetched_ts=ts)
+        columns = snap["columns"]
+        records: Dict[str, PlayerRecord] = {}
+        for row in zip(*(columns[f] for f in FIELDS)):
+            rec = PlayerRecord(*(_intern(v) if isinstance(v, str) else v for v in row))
+            records[rec.player_id] = rec
+        return cls(records, fetched_ts=ts, raw_path=snap.get("raw_path"), raw_offsets=snap.get("raw_offsets"))
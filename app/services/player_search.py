@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import heapq
+import re
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from rapidfuzz import fuzz, process
+
+from app.services.player_catalog import PlayerCatalog, PlayerRecord
+
+
+FANTASY_POSITIONS = {"QB", "RB", "WR", "TE", "K", "DEF"}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9 ]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, drop punctuation ("St. Brown" -> "st brown", "Ja'Marr" -> "jamarr"), collapse spaces."""
+    s = (name or "").lower().replace("-", " ")
+    s = _NON_ALNUM.sub("", s)
+    return _SPACES.sub(" ", s).strip()
+
+
+def _trigrams(s: str) -> Set[str]:
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+class PlayerSearchIndex:
+    """Prefix + trigram index over catalog names, built once per PlayerCatalog instance.
+
+    Ranking: exact name > name prefix > every query word prefixes a name word > substring,
+    then active status, fantasy-relevant position, and having an NFL team.
+    """
+
+    def __init__(self, catalog: PlayerCatalog) -> None:
+        self._records: List[PlayerRecord] = []
+        self._names: List[str] = []
+        boost: List[int] = []
+        token_pairs: List[Tuple[str, int]] = []
+        trigrams: Dict[str, List[int]] = {}
+        for rec in catalog.values():
+            norm = normalize_name(rec.name)
+            if not norm:
+                continue
+            row = len(self._records)
+            self._records.append(rec)
+            self._names.append(norm)
+            boost.append(
+                (10 if (rec.status or "").lower() == "active" else 0)
+                + (8 if (rec.position or "").upper() in FANTASY_POSITIONS else 0)
+                + (4 if rec.team else 0)
+            )
+            for tok in set(norm.split(" ")):
+                token_pairs.append((tok, row))
+            for tri in _trigrams(norm):
+                trigrams.setdefault(tri, []).append(row)
+        self._boost = boost
+        token_pairs.sort()
+        self._tokens = [t for t, _ in token_pairs]
+        self._token_rows = [r for _, r in token_pairs]
+        by_name = sorted(range(len(self._names)), key=self._names.__getitem__)
+        self._sorted_names = [self._names[r] for r in by_name]
+        self._sorted_name_rows = by_name
+        self._trigrams = {k: frozenset(v) for k, v in trigrams.items()}
+        # Tie-break within equal scores: shorter, then alphabetical names first
+        order = sorted(range(len(self._names)), key=lambda r: (len(self._names[r]), self._names[r]))
+        self._order = [0] * len(order)
+        for rank, r in enumerate(order):
+            self._order[r] = rank
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @staticmethod
+    def _prefix_range(keys: List[str], prefix: str) -> Tuple[int, int]:
+        lo = bisect_left(keys, prefix)
+        return lo, bisect_left(keys, prefix + "\uffff", lo)
+
+    def _token_prefix_rows(self, prefix: str) -> Set[int]:
+        lo, hi = self._prefix_range(self._tokens, prefix)
+        return set(self._token_rows[lo:hi])
+
+    def _name_prefix_rows(self, prefix: str) -> Set[int]:
+        lo, hi = self._prefix_range(self._sorted_names, prefix)
+        return set(self._sorted_name_rows[lo:hi])
+
+    def _substring_rows(self, q: str) -> Set[int]:
+        tris = sorted(_trigrams(q), key=lambda t: len(self._trigrams.get(t, ())))
+        if not tris:
+            return set()
+        rows = set(self._trigrams.get(tris[0], ()))
+        for t in tris[1:]:
+            if not rows:
+                break
+            rows &= self._trigrams.get(t, frozenset())
+        return {r for r in rows if q in self._names[r]}
+
+    def search(self, query: str, limit: int = 10) -> List[PlayerRecord]:
+        q = normalize_name(query)
+        if not q or limit <= 0:
+            return []
+        token_rows: Optional[Set[int]] = None
+        for qt in q.split(" "):
+            hits = self._token_prefix_rows(qt)
+            token_rows = hits if token_rows is None else token_rows & hits
+            if not token_rows:
+                break
+        token_rows = token_rows or set()
+        name_rows = self._name_prefix_rows(q)
+        candidates = token_rows | name_rows
+        if len(candidates) < limit and len(q) >= 3:
+            candidates |= self._substring_rows(q)
+        names, boost, order = self._names, self._boost, self._order
+
+        def score(r: int) -> int:
+            if r in name_rows:
+                tier = 100 if names[r] == q else 80
+            else:
+                tier = 60 if r in token_rows else 40
+            return tier + boost[r]
+
+        ranked = heapq.nsmallest(limit, candidates, key=lambda r: (-score(r), order[r]))
+        return [self._records[r] for r in ranked]
+
+
+def get_search_index(catalog: PlayerCatalog) -> PlayerSearchIndex:
+    return catalog.derived("search", PlayerSearchIndex)
+
+
+_SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "v"}
+_TEAM_CODES = {
+    "ARI", "ATL", "BAL", "BUF", "CAR", "CHI", "CIN", "CLE", "DAL", "DEN", "DET", "GB", "HOU", "IND", "JAX", "KC",
+    "LAC", "LAR", "LV", "MIA", "MIN", "NE", "NO", "NYG", "NYJ", "PHI", "PIT", "SEA", "SF", "TB", "TEN", "WAS",
+}
+_HINT_POSITIONS = FANTASY_POSITIONS | {"LB", "DL", "DB", "DE", "DT", "CB", "OL", "FB"}
+_HINT_SPLIT = re.compile(r"[\s,/()\[\]-]+")
+
+
+def fuzzy_key(name: str) -> str:
+    """normalize_name() without generational suffixes, so "Marvin Harrison Jr." matches "Marvin Harrison"."""
+    toks = normalize_name(name).split(" ")
+    while len(toks) > 1 and toks[-1] in _SUFFIXES:
+        toks.pop()
+    return " ".join(toks)
+
+
+def split_hints(query: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Peel position/team hints off a pasted name: "Josh Allen (QB, BUF)" -> ("Josh Allen", "QB", "BUF")."""
+    words = [w for w in _HINT_SPLIT.split(query or "") if w]
+    position = team = None
+    while len(words) > 1:
+        w = words[-1].upper()
+        if position is None and w in _HINT_POSITIONS:
+            position = w
+        elif team is None and w in _TEAM_CODES:
+            team = w
+        else:
+            break
+        words.pop()
+    return " ".join(words), position, team
+
+
+class PlayerNameIndex:
+    """Normalized name -> players map for rapidfuzz lookups, built once per PlayerCatalog.
+
+    Players sharing a name are kept together and disambiguated by position/team hints, then by
+    fantasy relevance, instead of the last one silently winning.
+    """
+
+    def __init__(self, catalog: PlayerCatalog) -> None:
+        groups: Dict[str, List[PlayerRecord]] = {}
+        for rec in catalog.values():
+            key = fuzzy_key(rec.name)
+            if key:
+                groups.setdefault(key, []).append(rec)
+        self.choices: List[str] = list(groups)
+        self._groups = groups
+
+    def __len__(self) -> int:
+        return len(self.choices)
+
+    @staticmethod
+    def _pick(group: List[PlayerRecord], position: Optional[str], team: Optional[str]) -> PlayerRecord:
+        def rank(rec: PlayerRecord) -> Tuple[int, ...]:
+            return (
+                1 if position and (rec.position or "").upper() == position else 0,
+                1 if team and (rec.team or "").upper() == team else 0,
+                1 if (rec.position or "").upper() in FANTASY_POSITIONS else 0,
+                1 if (rec.status or "").lower() == "active" else 0,
+                1 if rec.team else 0,
+            )
+
+        return max(group, key=rank)
+
+    def _result(self, choice: str, score: float, position: Optional[str], team: Optional[str]) -> Dict[str, Any]:
+        group = self._groups[choice]
+        rec = self._pick(group, position, team)
+        return {
+            "player_id": rec.player_id,
+            "full_name": rec.name,
+            "position": rec.position,
+            "team": rec.team,
+            "score": round(float(score), 1),
+            "ambiguous": len(group) > 1 and not (position or team),
+        }
+
+    def resolve(self, query: str, score_cutoff: float = 0.0) -> Optional[Dict[str, Any]]:
+        name, position, team = split_hints(query)
+        key = fuzzy_key(name)
+        if not key or not self.choices:
+            return None
+        if key in self._groups:
+            return self._result(key, 100.0, position, team)
+        nearest = process.extractOne(key, self.choices, scorer=fuzz.WRatio, processor=None, score_cutoff=score_cutoff)
+        if not nearest:
+            return None
+        return self._result(nearest[0], nearest[1], position, team)
+
+    def resolve_many(self, queries: List[str], score_cutoff: float = 0.0, chunk_size: int = 64) -> List[Optional[Dict[str, Any]]]:
+        """Resolve many names with one rapidfuzz cdist pass per chunk instead of a full scan per name."""
+        parsed = [split_hints(q) for q in queries]
+        keys = [fuzzy_key(name) for name, _, _ in parsed]
+        best: Dict[str, Tuple[str, float]] = {key: (key, 100.0) for key in set(keys) if key in self._groups}
+        pending = sorted({key for key in keys if key and key not in best})
+        if pending and self.choices:
+            for start in range(0, len(pending), chunk_size):
+                chunk = pending[start:start + chunk_size]
+                scores = process.cdist(chunk, self.choices, scorer=fuzz.WRatio, processor=None, score_cutoff=score_cutoff, workers=-1)
+                for row, col in enumerate(scores.argmax(axis=1)):
+                    score = float(scores[row, col])
+                    if score > 0:
+                        best[chunk[row]] = (self.choices[col], score)
+        results: List[Optional[Dict[str, Any]]] = []
+        for key, (_, position, team) in zip(keys, parsed):
+            hit = best.get(key)
+            results.append(self._result(hit[0], hit[1], position, team) if hit else None)
+        return results
+
+
+def get_name_index(catalog: PlayerCatalog) -> PlayerNameIndex:
+    return catalog.derived("fuzzy", PlayerNameIndex)
@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+try:
+    import tiktoken
+except Exception:  # pragma: no cover - optional
+    tiktoken = None  # type: ignore
+
+
+# Tokens of rendered context handed to synthesize (system prompt and question come on top)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("SYNTH_CONTEXT_TOKENS", "2500"))
+
+# Sections in the order they are rendered and trimmed; the intent's own sections go first
+DEFAULT_ORDER = (
+    "my_team", "start_sit", "matchup_previews", "waiver_recommendations", "trade_suggestions",
+    "trending", "players", "web_results", "nfl_state", "rosters", "league_profile", "preferences", "unavailable",
+)
+INTENT_PRIORITY: Dict[str, Tuple[str, ...]] = {
+    "league_info": ("league_profile",),
+    "rosters": ("my_team", "rosters"),
+    "matchups": ("matchup_previews", "my_team", "nfl_state"),
+    "players_search": ("players",),
+    "trending": ("trending", "web_results"),
+    "nfl_state": ("nfl_state",),
+    "start_sit": ("start_sit", "my_team"),
+    "trade": ("trade_suggestions", "my_team", "rosters"),
+    "waivers": ("waiver_recommendations", "my_team"),
+}
+# Share of the budget reserved for each of the intent's priority sections vs everything else
+PRIORITY_WEIGHT = 3.0
+
+# Scoring keys worth naming; the full scoring_settings map is mostly zeros and defaults
+_SCORING_KEYS = ("rec", "pass_td", "pass_yd", "pass_int", "rush_yd", "rec_yd", "bonus_rec_te", "fum_lost")
+
+# None: not loaded yet; False: unavailable, estimate instead; otherwise the tiktoken encoding
+_encoding: Any = None
+_encoding_lock = threading.Lock()
+_encoding_loading = False
+
+
+def _load_encoding() -> Any:
+    # Blocking: tiktoken downloads and parses its BPE file on first use; when that fails, estimate from then on
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            enc: Any = False
+            if tiktoken is not None:
+                try:
+                    enc = tiktoken.encoding_for_model(os.getenv("OPENAI_MODEL", "gpt-4o-mini"))
+                except KeyError:
+                    try:
+                        enc = tiktoken.get_encoding("cl100k_base")
+                    except Exception:
+                        pass
+                except Exception:
+                    pass
+            _encoding = enc
+    return _encoding
+
+
+def warm_encoding() -> None:
+    """Start loading the encoding in a background thread (called at startup)."""
+    global _encoding_loading
+    if _encoding is None and not _encoding_loading:
+        _encoding_loading = True
+        threading.Thread(target=_load_encoding, name="tiktoken-warm", daemon=True).start()
+
+
+def _get_encoding() -> Any:
+    if _encoding is not None:
+        return _encoding
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return _load_encoding()
+    # On the event loop: never wait for the download; estimate until the background load lands
+    warm_encoding()
+    return False
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when available, otherwise the usual ~4 chars/token estimate."""
+    enc = _get_encoding()
+    if enc:
+        return len(enc.encode(text or "", disallowed_special=()))
+    return (len(text or "") + 3) // 4
+
+
+def _fmt(x: Any) -> str:
+    if isinstance(x, float):
+        return f"{x:.1f}".rstrip("0").rstrip(".")
+    return "" if x is None else str(x)
+
+
+class _Names:
+    """player_id -> 'Name POS TEAM' through the catalog, falling back to whatever the row carries."""
+
+    def __init__(self, catalog: Optional[Mapping[str, Any]]) -> None:
+        self.catalog = catalog
+
+    def __call__(self, pid: Any, row: Optional[Dict[str, Any]] = None) -> str:
+        row = row or {}
+        p = self.catalog.get(pid) if (self.catalog is not None and pid) else None
+        if not row.get("full_name") and p is not None:
+            name = p.get("full_name") or f"{p.get('first_name', '')} {p.get('last_name', '')}".strip() or str(pid)
+        else:
+            name = row.get("full_name") or str(pid)
+        pos = row.get("position") or (p.get("position") if p is not None else None)
+        team = row.get("team") or (p.get("team") if p is not None else None)
+        tag = " ".join(t for t in (pos, team) if t)
+        return f"{name} {tag}" if tag else name
+
+
+def _record(r: Dict[str, Any]) -> str:
+    w, l, t = r.get("wins"), r.get("losses"), r.get("ties")
+    if w is None and l is None:
+        return ""
+    return f"{w or 0}-{l or 0}" + (f"-{t}" if t else "")
+
+
+def _league_profile(v: Dict[str, Any], ctx: Dict[str, Any]) -> List[str]:
+    scoring = v.get("scoring_settings") or {}
+    key_scoring = ", ".join(f"{k}={_fmt(scoring[k])}" for k in _SCORING_KEYS if scoring.get(k))
+    line = f"League: {v.get('name') or v.get('league_id')} {v.get('season') or ''}, {v.get('total_rosters')} teams, {v.get('roster_size')} roster spots"
+    lines = [line, f"Starting slots: {' '.join(str(s) for s in v.get('starting_slots') or [])}"]
+    if key_scoring:
+        lines.append(f"Scoring: {key_scoring}")
+    return lines
+
+
+def _my_team(v: Dict[str, Any], ctx: Dict[str, Any]) -> List[str]:
+    head = f"My team: {v.get('owner')} (roster {v.get('roster_id')}) {_record(v)}, {v.get('num_players')} players"
+    if v.get("projected_points") is not None:
+        head += f", projected {_fmt(v['projected_points'])}"
+    lines = [head]
+    for s in v.get("starters") or []:
+        pts = s.get("projected_points")
+        lines.append(f"- {ctx['names'](s.get('player_id'), s)}" + (f" {_fmt(pts)}" if pts is not None else ""))
+    return lines
+
+
+def _rosters(v: List[Dict[str, Any]], ctx: Dict[str, Any]) -> List[str]:
+    names = ctx["names"]
+    mine = ctx.get("my_roster_id")
+    ordered = sorted(v or [], key=lambda r: r.get("roster_id") != mine)
+    lines = ["Rosters (owner record pts: starters | bench):"]
+    for r in ordered:
+        starters = [p for p in (r.get("starters") or []) if p and p != "0"]
+        bench = [p for p in (r.get("players") or []) if p not in starters]
+        fpts = f" {r['fpts']}pts" if r.get("fpts") is not None else ""
+        lines.append(f"{r.get('owner')} {_record(r)}{fpts}: {', '.join(names(p) for p in starters)} | {', '.join(names(p) for p in bench)}")
+    return lines
+
+
+def _matchup_previews(v: List[Dict[str, Any]], ctx: Dict[str, Any]) -> List[str]:
+    owners = ctx["owners"]
+    mine = ctx.get("my_roster_id")
+    ordered = sorted(v or [], key=lambda m: mine not in (m["team_a"]["roster_id"], m["team_b"]["roster_id"]))
+    lines = ["Matchups (points, favored, margin):"]
+    for m in ordered:
+        a, b = m["team_a"], m["team_b"]
+        lines.append(
+            f"{owners.get(a['roster_id'], a['roster_id'])} {_fmt(a.get('points'))} vs {owners.get(b['roster_id'], b['roster_id'])} {_fmt(b.get('points'))}; "
+            f"favored {owners.get(m.get('favored_roster_id'), m.get('favored_roster_id'))} by {_fmt(m.get('projected_margin'))}"
+        )
+    return lines
+
+
+def _adds(title: str) -> Callable[[Any, Dict[str, Any]], List[str]]:
+    def render(v: Any, ctx: Dict[str, Any]) -> List[str]:
+        rows = v.get("trending_targets") if isinstance(v, dict) else v
+        lines = [title]
+        for t in rows or []:
+            count = t.get("count", t.get("adds"))
+            lines.append(f"- {ctx['names'](t.get('player_id'), t)}" + (f" ({count} adds)" if count is not None else ""))
+        return lines
+    return render
+
+
+def _start_sit(v: Dict[str, Any], ctx: Dict[str, Any]) -> List[str]:
+    names = ctx["names"]
+    mine = ctx.get("my_owner")
+    ordered = sorted((v or {}).items(), key=lambda kv: str(kv[0]).lower() != (mine or "").lower())
+    lines = ["Start/sit (optimal lineup from projections):"]
+    for owner, s in ordered:
+        if "optimal_lineup" not in s:
+            lines.append(f"{owner}: starters {', '.join(names(p) for p in s.get('starters') or [])}; bench {', '.join(names(p) for p in s.get('bench_candidates') or [])}")
+            continue
+        lineup = ", ".join(f"{o['slot']} {names(o['player_id'], o)} {_fmt(o.get('projected_points'))}" for o in s["optimal_lineup"])
+        line = f"{owner}: total {_fmt(s.get('projected_total'))} (+{_fmt(s.get('projected_gain'))} vs current): {lineup}"
+        if s.get("start"):
+            line += f"; start {', '.join(names(p) for p in s['start'])}"
+        if s.get("sit"):
+            line += f"; sit {', '.join(names(p) for p in s['sit'])}"
+        lines.append(line)
+    return lines
+
+
+def _players(v: List[Any], ctx: Dict[str, Any]) -> List[str]:
+    lines = ["Players:"]
+    for p in v or []:
+        p = p.to_dict() if hasattr(p, "to_dict") else p
+        extra = ", ".join(f"{k} {p[k]}" for k in ("status", "age") if p.get(k))
+        lines.append(f"- {ctx['names'](p.get('player_id'), p)}" + (f" ({extra})" if extra else ""))
+    return lines
+
+
+def _nfl_state(v: Dict[str, Any], ctx: Dict[str, Any]) -> List[str]:
+    return [f"NFL: season {v.get('season')} week {v.get('week')} ({v.get('season_type')})"]
+
+
+def _web_results(v: List[Dict[str, Any]], ctx: Dict[str, Any]) -> List[str]:
+    lines = ["Web:"]
+    for r in v or []:
+        body = " ".join(str(r.get("content") or r.get("snippet") or "").split())[:240]
+        lines.append(f"- {r.get('title') or r.get('url')}: {body}")
+    return lines
+
+
+def _preferences(v: Dict[str, Any], ctx: Dict[str, Any]) -> List[str]:
+    lines = []
+    prefs = ", ".join(f"{k}={v[k]}" for k in sorted(v) if k != "profile" and v[k] not in (None, "", [], {}))
+    if prefs:
+        lines.append(f"Preferences: {prefs}")
+    if v.get("profile"):
+        lines.append(f"User profile: {v['profile']}")
+    return lines
+
+
+def _unavailable(v: List[str], ctx: Dict[str, Any]) -> List[str]:
+    return [f"Unavailable (timed out or failed): {', '.join(v)}"]
+
+
+RENDERERS: Dict[str, Callable[[Any, Dict[str, Any]], List[str]]] = {
+    "league_profile": _league_profile,
+    "my_team": _my_team,
+    "rosters": _rosters,
+    "matchup_previews": _matchup_previews,
+    "waiver_recommendations": _adds("Waiver candidates (trending adds):"),
+    "trending": _adds("Trending adds:"),
+    "trade_suggestions": _adds("Trade targets (trending, unrostered):"),
+    "start_sit": _start_sit,
+    "players": _players,
+    "nfl_state": _nfl_state,
+    "web_results": _web_results,
+    "preferences": _preferences,
+    "unavailable": _unavailable,
+}
+
+
+def _render_other(v: Any, ctx: Dict[str, Any]) -> List[str]:
+    return [" ".join(str(v).split())[:1000]]
+
+
+def _order(intent: Optional[str], keys: List[str]) -> List[str]:
+    first = [k for k in INTENT_PRIORITY.get(intent or "", ()) if k in keys]
+    rest = [k for k in DEFAULT_ORDER if k in keys and k not in first]
+    return first + rest + [k for k in keys if k not in first and k not in rest]
+
+
+def build_context(
+    intent: Optional[str],
+    data: Dict[str, Any],
+    preferences: Optional[Dict[str, Any]] = None,
+    catalog: Optional[Mapping[str, Any]] = None,
+    budget: int = CONTEXT_TOKEN_BUDGET,
+) -> Tuple[str, Dict[str, int]]:
+    """Render state.data into compact, name-resolved lines that fit `budget` tokens.
+
+    Each section gets a share of the budget (the intent's own sections PRIORITY_WEIGHT times
+    more), keeping its first lines; budget a section leaves unused goes to the others in
+    priority order. Returns (context, {"context_tokens", "budget", "dropped_lines"}).
+    """
+    data = {k: v for k, v in (data or {}).items() if v not in (None, [], {})}
+    data["preferences"] = preferences or data.get("preferences") or {}
+    my_team = data.get("my_team") or {}
+    ctx = {
+        "names": _Names(catalog),
+        "owners": {r.get("roster_id"): r.get("owner") for r in data.get("rosters") or []},
+        "my_roster_id": my_team.get("roster_id"),
+        "my_owner": my_team.get("owner") or (preferences or {}).get("roster_owner_name"),
+    }
+    order = _order(intent, list(data))
+    sections: Dict[str, List[Tuple[str, int]]] = {}
+    for key in order:
+        lines = RENDERERS.get(key, _render_other)(data[key], ctx)
+        if key not in RENDERERS:
+            lines = [f"{key}: {lines[0]}"]
+        sections[key] = [(line, count_tokens(line) + 1) for line in lines if line]
+
+    header = f"Intent: {intent}"
+    remaining = budget - count_tokens(header) - 1
+    priority = set(INTENT_PRIORITY.get(intent or "", ()))
+    weights = {k: PRIORITY_WEIGHT if k in priority else 1.0 for k in sections}
+    total_w = sum(weights.values()) or 1.0
+    taken: Dict[str, int] = {k: 0 for k in sections}
+    # First pass: proportional shares; second pass: leftovers in priority order
+    shares = {k: int(remaining * weights[k] / total_w) for k in sections}
+    for first_pass in (True, False):
+        for key in order:
+            lines = sections[key]
+            while taken[key] < len(lines):
+                cost = lines[taken[key]][1]
+                if cost > remaining or (first_pass and cost > shares[key]):
+                    break
+                if first_pass:
+                    shares[key] -= cost
+                remaining -= cost
+                taken[key] += 1
+
+    out = [header]
+    dropped = 0
+    for key in order:
+        out.extend(line for line, _ in sections[key][: taken[key]])
+        dropped += len(sections[key]) - taken[key]
+    text = "\n".join(out)
+    return text, {"context_tokens": count_tokens(text), "budget": budget, "dropped_lines": dropped}
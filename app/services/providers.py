@@ -1,26 +1,94 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set
 
 from app.services.sleeper_client import SleeperClient
 from app.services.yahoo_client import YahooClient
 
+logger = logging.getLogger(__name__)
+
 
 class LeagueProvider:
 	SLEEPER = "sleeper"
 	YAHOO = "yahoo"
 
 
+class SleeperRegistry:
+	"""Bounded LRU of per-league SleeperClients that share the root client's HTTP pool and global data.
+
+	An evicted client may still be serving a request, so it is only retired: its warmer stops and
+	it is closed on a later get() once no fetch of its is in flight.
+	"""
+
+	def __init__(self, root: SleeperClient, max_size: int = 32) -> None:
+		self.root = root
+		self.max_size = max(1, max_size)
+		self._clients: "OrderedDict[str, SleeperClient]" = OrderedDict()
+		self._retired: List[SleeperClient] = []
+		self._closing: Set[asyncio.Task] = set()
+
+	def get(self, league_id: Optional[str] = None) -> SleeperClient:
+		if self._retired:
+			self._sweep()
+		if not league_id or league_id == self.root.default_league_id:
+			return self.root
+		client = self._clients.get(league_id)
+		if client is not None:
+			self._clients.move_to_end(league_id)
+			return client
+		client = SleeperClient(default_league_id=league_id, shared=self.root)
+		if self.root.background_refresh_running:
+			client.start_background_refresh()
+		self._clients[league_id] = client
+		while len(self._clients) > self.max_size:
+			_, evicted = self._clients.popitem(last=False)
+			evicted.stop_background_refresh()
+			self._retired.append(evicted)
+		return client
+
+	def _sweep(self) -> None:
+		"""Close retired clients that have nothing in flight."""
+		idle = [c for c in self._retired if not c.busy]
+		for client in idle:
+			self._retired.remove(client)
+			task = asyncio.ensure_future(client.close())
+			self._closing.add(task)
+			task.add_done_callback(self._closed)
+
+	def _closed(self, task: asyncio.Task) -> None:
+		self._closing.discard(task)
+		if not task.cancelled() and task.exception() is not None:
+			logger.warning("closing an evicted Sleeper client failed", exc_info=task.exception())
+
+	def __len__(self) -> int:
+		return len(self._clients)
+
+	async def aclose(self) -> None:
+		clients = list(self._clients.values()) + self._retired
+		self._clients.clear()
+		self._retired = []
+		await asyncio.gather(*(c.close() for c in clients), *self._closing, return_exceptions=True)
+		await self.root.close()
+
+
 class ProviderRouter:
 	def __init__(self, default_league_id: Optional[str] = None) -> None:
 		self.sleeper = SleeperClient(default_league_id=default_league_id)
+		self.sleeper_leagues = SleeperRegistry(self.sleeper, max_size=int(os.getenv("SLEEPER_MAX_LEAGUE_CLIENTS", "32")))
 		self.yahoo = None  # constructed after OAuth
 
-	def get_client(self, provider: str) -> Any:
+	def get_client(self, provider: str, league_id: Optional[str] = None) -> Any:
 		if provider == LeagueProvider.SLEEPER or not provider:
-			return self.sleeper
+			return self.sleeper_leagues.get(league_id)
 		if provider == LeagueProvider.YAHOO:
 			if not self.yahoo:
 				self.yahoo = YahooClient()
 			return self.yahoo
-		raise ValueError(f"Unknown provider: {provider}")
\ No newline at end of file
+		raise ValueError(f"Unknown provider: {provider}")
+
+	async def aclose(self) -> None:
+		await self.sleeper_leagues.aclose()
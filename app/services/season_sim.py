@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+# Weekly fantasy scores: sd = max(SCORE_SD_FLOOR, SCORE_CV * projected mean)
+SCORE_CV = 0.2
+SCORE_SD_FLOOR = 12.0
+
+
+@dataclass
+class SeasonInputs:
+    roster_ids: List[int]
+    weeks: List[int]
+    mean: np.ndarray       # (W, T) projected lineup total per week and team
+    opponent: np.ndarray   # (W, T) column index of the opponent, -1 for no game
+    wins: np.ndarray       # (T,) wins so far
+    losses: np.ndarray     # (T,) losses so far
+    points_for: np.ndarray  # (T,) points so far, used as the standings tiebreak
+
+
+def build_season_inputs(
+    rosters: List[Dict[str, Any]],
+    matchups_by_week: Dict[int, List[Dict[str, Any]]],
+    lineup_totals: Callable[[int, Dict[int, Dict[str, float]]], Dict[int, float]],
+) -> SeasonInputs:
+    """Turn roster summaries and per-week Sleeper matchups into simulation arrays.
+
+    lineup_totals(week, {roster_id: players_points}) returns each roster's projected optimal
+    lineup total for that week. Weeks without projections fall back to the team's season
+    points-per-game so far.
+    """
+    roster_ids = [r["roster_id"] for r in rosters]
+    col = {rid: i for i, rid in enumerate(roster_ids)}
+    weeks = sorted(matchups_by_week)
+    T, W = len(roster_ids), len(weeks)
+    wins = np.array([float(r.get("wins") or 0) for r in rosters])
+    losses = np.array([float(r.get("losses") or 0) for r in rosters])
+    points_for = np.array([float(r.get("fpts") or 0) for r in rosters])
+    games = np.array([float((r.get("wins") or 0) + (r.get("losses") or 0) + (r.get("ties") or 0)) for r in rosters])
+    ppg = np.divide(points_for, games, out=np.zeros(T), where=games > 0)
+    fallback = np.where(ppg > 0, ppg, ppg[ppg > 0].mean() if (ppg > 0).any() else 100.0)
+
+    mean = np.tile(fallback, (W, 1))
+    opponent = np.full((W, T), -1, dtype=np.int64)
+    for wi, week in enumerate(weeks):
+        by_mid: Dict[Any, List[int]] = {}
+        points: Dict[int, Dict[str, float]] = {}
+        for m in matchups_by_week[week] or []:
+            rid = m.get("roster_id")
+            if rid not in col:
+                continue
+            points[rid] = m.get("players_points") or {}
+            if m.get("matchup_id") is not None:
+                by_mid.setdefault(m["matchup_id"], []).append(col[rid])
+        for pair in by_mid.values():
+            if len(pair) == 2:
+                a, b = pair
+                opponent[wi, a], opponent[wi, b] = b, a
+        for rid, total in lineup_totals(week, points).items():
+            if rid in col and total > 0:
+                mean[wi, col[rid]] = total
+    return SeasonInputs(roster_ids, weeks, mean, opponent, wins, losses, points_for)
+
+
+def _bracket_order(size: int) -> List[int]:
+    """Seed order (0-based) for a standard single-elimination bracket: 8 -> [0, 7, 3, 4, 1, 6, 2, 5]."""
+    order = [0]
+    while len(order) < size:
+        n = len(order) * 2
+        order = [s for seed in order for s in (seed, n - 1 - seed)]
+    return order
+
+
+def projected_record(inputs: SeasonInputs) -> np.ndarray:
+    """(T, 3) wins, losses and ties over the simulated weeks if every team scored exactly its projection."""
+    has_game = inputs.opponent >= 0
+    opp_mean = np.take_along_axis(inputs.mean, np.where(has_game, inputs.opponent, 0), axis=1)
+    return np.stack([
+        ((inputs.mean > opp_mean) & has_game).sum(axis=0),
+        ((inputs.mean < opp_mean) & has_game).sum(axis=0),
+        ((inputs.mean == opp_mean) & has_game).sum(axis=0),
+    ], axis=1)
+
+
+def simulate_season(inputs: SeasonInputs, playoff_teams: int = 6, simulations: int = 20000, seed: Optional[int] = None, chunk: int = 5000) -> Dict[str, Any]:
+    """Monte Carlo the remaining regular season and playoff bracket in vectorized chunks.
+
+    Returns per-team expected season wins/losses, the projected record over the remaining
+    weeks (projected_record), playoff odds, seed distribution and title odds.
+    """
+    rng = np.random.default_rng(seed)
+    T, W = len(inputs.roster_ids), len(inputs.weeks)
+    playoff_teams = max(1, min(playoff_teams, T))
+    sd = np.maximum(SCORE_SD_FLOOR, inputs.mean * SCORE_CV).astype(np.float32)
+    mean = inputs.mean.astype(np.float32)
+    has_game = inputs.opponent >= 0
+    opp_idx = np.where(has_game, inputs.opponent, 0)
+    # Playoff strength: average projected weekly score over the simulated weeks
+    strength = (mean.mean(axis=0) if W else np.full(T, 100.0, dtype=np.float32)).astype(np.float32)
+    strength_sd = np.maximum(SCORE_SD_FLOOR, strength * SCORE_CV)
+    bracket = 1 << (playoff_teams - 1).bit_length()
+    order = np.array(_bracket_order(bracket))
+
+    total_wins = np.zeros(T)
+    seed_counts = np.zeros((T, playoff_teams), dtype=np.int64)
+    titles = np.zeros(T, dtype=np.int64)
+    done = 0
+    while done < simulations:
+        n = min(chunk, simulations - done)
+        done += n
+        if W:
+            scores = rng.normal(mean, sd, size=(n, W, T)).astype(np.float32)
+            opp_scores = np.take_along_axis(scores, np.broadcast_to(opp_idx, (n, W, T)), axis=2)
+            won = ((scores > opp_scores) & has_game).sum(axis=1) + 0.5 * ((scores == opp_scores) & has_game).sum(axis=1)
+            wins = inputs.wins + won
+            pf = inputs.points_for + scores.sum(axis=1)
+        else:
+            wins = np.broadcast_to(inputs.wins, (n, T))
+            pf = np.broadcast_to(inputs.points_for, (n, T))
+        total_wins += wins.sum(axis=0)
+        # Standings: wins, then points for
+        ranking = np.lexsort((-pf, -wins), axis=1)  # (n, T) team columns in seed order
+        seeded = ranking[:, :playoff_teams]
+        np.add.at(seed_counts, (seeded, np.broadcast_to(np.arange(playoff_teams), seeded.shape)), 1)
+        # Bracket: slots past playoff_teams are byes (-1) for the top seeds
+        field = np.full((n, bracket), -1, dtype=np.int64)
+        field[:, :playoff_teams] = seeded
+        alive = field[:, order]
+        while alive.shape[1] > 1:
+            a, b = alive[:, 0::2], alive[:, 1::2]
+            ia, ib = np.where(a >= 0, a, 0), np.where(b >= 0, b, 0)
+            sa = rng.normal(strength[ia], strength_sd[ia])
+            sb = rng.normal(strength[ib], strength_sd[ib])
+            a_wins = (b < 0) | ((a >= 0) & (sa >= sb))
+            alive = np.where(a_wins, a, b)
+        np.add.at(titles, alive[:, 0], 1)
+
+    playoff = seed_counts.sum(axis=1) / simulations
+    expected_wins = total_wins / simulations
+    expected_losses = inputs.losses + has_game.sum(axis=0) - (expected_wins - inputs.wins)
+    record = projected_record(inputs)
+    teams = []
+    for i, rid in enumerate(inputs.roster_ids):
+        teams.append({
+            "roster_id": rid,
+            "expected_wins": round(float(expected_wins[i]), 2),
+            "expected_losses": round(float(expected_losses[i]), 2),
+            "projected_wins": int(record[i, 0]),
+            "projected_losses": int(record[i, 1]),
+            "projected_ties": int(record[i, 2]),
+            "playoff_odds": round(float(playoff[i]), 4),
+            "seed_distribution": [round(float(c / simulations), 4) for c in seed_counts[i]],
+            "title_odds": round(float(titles[i] / simulations), 4),
+        })
+    return {"simulations": simulations, "playoff_teams": playoff_teams, "teams": teams}
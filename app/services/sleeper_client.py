@@ -1,28 +1,72 @@
 from __future__ import annotations
 
 import asyncio
+import json
+import os
+import pickle
 import time
+import zlib
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Callable, Awaitable
 
 import httpx
-from rapidfuzz import process, fuzz
+
+from app.services.cache_backends import CacheBackend, get_default_backend
+from app.services.player_catalog import PlayerCatalog, PlayerRecord
+from app.services.player_search import PlayerNameIndex, PlayerSearchIndex, get_name_index, get_search_index
+
+
+PLAYERS_SNAPSHOT_PATH = os.getenv("PLAYERS_SNAPSHOT_PATH", "/workspace/data/players_nfl.pickle")
+PLAYERS_TTL_S = 24 * 3600
+# Serve expired entries (up to STALE_FACTOR x their TTL old) while one background fetch refreshes them
+STALE_WHILE_REVALIDATE = os.getenv("SLEEPER_STALE_WHILE_REVALIDATE", "true").lower() == "true"
+STALE_FACTOR = 10.0
+# Keys kept warm by the background refresher while they keep being read
+WARM_KEY_PREFIXES = ("state:", "rosters:", "matchups:", "users:")
+WARM_IDLE_S = 600.0
 
 
 class SleeperClient:
 	base_url: str = "https://api.sleeper.app/v1"
 
-	def __init__(self, default_league_id: Optional[str] = None) -> None:
+	def __init__(self, default_league_id: Optional[str] = None, players_snapshot_path: Optional[str] = PLAYERS_SNAPSHOT_PATH, shared: Optional["SleeperClient"] = None, backend: Optional[CacheBackend] = None) -> None:
+		"""shared: a root client whose HTTP pool and league-independent data (players catalog,
+		NFL state, trending) this client reuses instead of keeping its own copies.
+		backend: second-level cache behind the in-process one (defaults to CACHE_URL), so other
+		clients and worker processes can reuse each other's fetches."""
 		self.default_league_id = default_league_id
-		self._client = httpx.AsyncClient(
-			timeout=httpx.Timeout(20.0),
-			limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
-		)
-		self._players_cache: Optional[Dict[str, Any]] = None
+		self._backend = backend or (shared._backend if shared is not None else get_default_backend())
+		self.players_snapshot_path = players_snapshot_path
+		self._snapshot_task: Optional[asyncio.Task] = None
+		self._shared = shared
+		if shared is not None:
+			self._client = shared._client
+		else:
+			self._client = httpx.AsyncClient(
+				timeout=httpx.Timeout(20.0),
+				limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+			)
+		self._players_cache: Optional[PlayerCatalog] = None
 		self._players_cache_ts: float = 0.0
 		self._cache: Dict[str, tuple[float, Any]] = {}
+		# In-flight fetches keyed like _cache so concurrent misses share one upstream call
+		self._inflight: Dict[str, asyncio.Task] = {}
+		self.stats: Dict[str, int] = {"issued": 0, "coalesced": 0}
+		# Content fingerprint per key; changes when a refetch returns different data and is
+		# comparable across processes, so derived caches can detect changes cheaply
+		self._versions: Dict[str, int] = {}
+		# key -> (ttl_s, fetch_and_store, last_read_ts) for keys the background refresher may keep warm
+		self._hot: Dict[str, tuple[float, Callable[[], Awaitable[Any]], float]] = {}
+		self._warmer: Optional[asyncio.Task] = None
+		self.stats.update({"stale_served": 0, "background_refreshes": 0})
 
 	async def close(self) -> None:
-		await self._client.aclose()
+		self.stop_background_refresh()
+		self._cache.clear()
+		self._hot.clear()
+		# Borrowed HTTP pools belong to the shared root client
+		if self._shared is None:
+			await self._client.aclose()
 
 	async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
 		url = f"{self.base_url}{path}"
@@ -42,15 +86,163 @@ class SleeperClient:
 					continue
 				raise
 
-	async def _cached(self, key: str, ttl_s: float, fetch: Callable[[], Awaitable[Any]], *, force_refresh: bool = False) -> Any:
+	def _start_flight(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+		"""Return the in-flight fetch task for key, starting one if none is running."""
+		task = self._inflight.get(key)
+		if task is not None:
+			self.stats["coalesced"] += 1
+			return task
+		self.stats["issued"] += 1
+		task = asyncio.ensure_future(fetch())
+		self._inflight[key] = task
+		task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+		return task
+
+	async def _single_flight(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+		"""Run fetch once per key; concurrent callers for the same key await the same task."""
+		# Shield so one caller being cancelled doesn't cancel the fetch for everyone else
+		return await asyncio.shield(self._start_flight(key, fetch))
+
+	def _refresh_in_background(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+		task = self._start_flight(key, fetch)
+		# Errors are retried on the next stale read; don't surface them as unhandled
+		task.add_done_callback(lambda t: t.cancelled() or t.exception())
+		return task
+
+	@staticmethod
+	def _fingerprint(data: Any) -> int:
+		return zlib.crc32(json.dumps(data, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8"))
+
+	def _store(self, key: str, ts: float, data: Any) -> None:
+		self._versions[key] = self._fingerprint(data)
+		self._cache[key] = (ts, data)
+
+	async def _backend_get(self, key: str) -> Optional[tuple[float, Any]]:
+		try:
+			return await self._backend.get(key)
+		except Exception:
+			return None
+
+	async def _backend_set(self, key: str, data: Any, ts: float, retention_s: float) -> None:
+		try:
+			await self._backend.set(key, data, ts, retention_s)
+		except Exception:
+			pass
+
+	async def _cached(self, key: str, ttl_s: float, fetch: Callable[[], Awaitable[Any]], *, force_refresh: bool = False, allow_stale: bool = True) -> Any:
+		"""allow_stale=False waits for the in-flight or a new fetch instead of serving an expired entry."""
 		now = time.time()
-		if not force_refresh and (entry := self._cache.get(key)):
+
+		async def fetch_and_store() -> Any:
+			data = await fetch()
+			ts = time.time()
+			self._store(key, ts, data)
+			await self._backend_set(key, data, ts, ttl_s * STALE_FACTOR)
+			return data
+
+		if key.startswith(WARM_KEY_PREFIXES):
+			self._hot[key] = (ttl_s, fetch_and_store, now)
+		entry = self._cache.get(key)
+		if not force_refresh and (entry is None or now - entry[0] >= ttl_s):
+			# Another client or worker may already have fetched a fresher copy
+			remote = await self._backend_get(key)
+			if remote is not None and (entry is None or remote[0] > entry[0]):
+				self._store(key, remote[0], remote[1])
+				entry = self._cache[key]
+		if not force_refresh and entry:
 			ts, data = entry
-			if now - ts < ttl_s:
+			age = now - ts
+			if age < ttl_s:
 				return data
-		data = await fetch()
-		self._cache[key] = (now, data)
-		return data
+			if STALE_WHILE_REVALIDATE and allow_stale and age < ttl_s * STALE_FACTOR:
+				if key not in self._inflight:
+					self.stats["background_refreshes"] += 1
+				self._refresh_in_background(key, fetch_and_store)
+				self.stats["stale_served"] += 1
+				return data
+
+		return await self._single_flight(key, fetch_and_store)
+
+	def start_background_refresh(self, interval_s: float = 5.0) -> None:
+		"""Keep recently read hot keys (NFL state, rosters, users, current-week matchups) fresh before they expire."""
+		if self._warmer is None or self._warmer.done():
+			self._warmer = asyncio.ensure_future(self._warm_loop(interval_s))
+
+	@property
+	def background_refresh_running(self) -> bool:
+		return self._warmer is not None and not self._warmer.done()
+
+	def stop_background_refresh(self) -> None:
+		if self._warmer is not None:
+			self._warmer.cancel()
+			self._warmer = None
+
+	@property
+	def busy(self) -> bool:
+		"""True while a fetch (a caller's or a background refresh) is in flight."""
+		return bool(self._inflight)
+
+	async def _warm_loop(self, interval_s: float) -> None:
+		while True:
+			await asyncio.sleep(interval_s)
+			try:
+				self._warm_once(lead_s=interval_s * 2)
+			except Exception:
+				pass
+
+	def _warm_once(self, lead_s: float) -> None:
+		now = time.time()
+		state = self._cache.get("state:nfl") or (self._shared._cache.get("state:nfl") if self._shared is not None else None)
+		week = (state[1] or {}).get("week") if state else None
+		for key, (ttl_s, fetch, last_read) in list(self._hot.items()):
+			if now - last_read > WARM_IDLE_S:
+				del self._hot[key]
+				continue
+			# Only the current week's matchups are hot; past/future weeks are read rarely
+			if key.startswith("matchups:") and week is not None and not key.endswith(f":{week}"):
+				continue
+			entry = self._cache.get(key)
+			if entry and now - entry[0] < ttl_s - min(lead_s, ttl_s / 2):
+				continue
+			if key not in self._inflight:
+				self.stats["background_refreshes"] += 1
+				self._refresh_in_background(key, fetch)
+
+	def data_version(self, key: str) -> int:
+		"""Content fingerprint for a cache key (0 if never fetched)."""
+		if key not in self._versions and self._shared is not None:
+			return self._shared.data_version(key)
+		return self._versions.get(key, 0)
+
+	async def data_versions(self, league_id: Optional[str] = None) -> Dict[str, int]:
+		"""Versions of the league data answers depend on (NFL state, rosters, this week's matchups).
+
+		Read with stale-while-revalidate off: expired entries are refetched (or the refresh already
+		in flight awaited) first, so a changed roster or matchup shows up as a new version within
+		its TTL.
+		"""
+		league_id = league_id or self.default_league_id
+		state, _ = await asyncio.gather(self.get_nfl_state(allow_stale=False), self.get_rosters(league_id, allow_stale=False))
+		week = int(state.get("week") or 1)
+		await self.get_matchups(week=week, league_id=league_id, allow_stale=False)
+		keys = ["state:nfl", f"rosters:{league_id}", f"matchups:{league_id}:{week}"]
+		return {k: self.data_version(k) for k in keys}
+
+	def cache_stats(self) -> Dict[str, Any]:
+		issued = self.stats["issued"]
+		coalesced = self.stats["coalesced"]
+		total = issued + coalesced
+		return {
+			"issued": issued,
+			"coalesced": coalesced,
+			"saved_ratio": round(coalesced / total, 3) if total else 0.0,
+			"stale_served": self.stats["stale_served"],
+			"background_refreshes": self.stats["background_refreshes"],
+			"inflight": len(self._inflight),
+			"entries": len(self._cache),
+			"hot_keys": len(self._hot),
+			"backend": type(self._backend).__name__,
+		}
 
 	# League-level endpoints
 	async def get_league(self, league_id: Optional[str] = None, *, force_refresh: bool = False) -> Dict[str, Any]:
@@ -63,34 +255,97 @@ class SleeperClient:
 		key = f"users:{league_id}"
 		return await self._cached(key, 600.0, lambda: self._get(f"/league/{league_id}/users"), force_refresh=force_refresh)
 
-	async def get_rosters(self, league_id: Optional[str] = None, *, force_refresh: bool = False) -> List[Dict[str, Any]]:
+	async def get_rosters(self, league_id: Optional[str] = None, *, force_refresh: bool = False, allow_stale: bool = True) -> List[Dict[str, Any]]:
 		league_id = league_id or self.default_league_id
 		key = f"rosters:{league_id}"
-		return await self._cached(key, 120.0, lambda: self._get(f"/league/{league_id}/rosters"), force_refresh=force_refresh)
+		return await self._cached(key, 120.0, lambda: self._get(f"/league/{league_id}/rosters"), force_refresh=force_refresh, allow_stale=allow_stale)
 
-	async def get_matchups(self, week: int, league_id: Optional[str] = None, *, force_refresh: bool = False) -> List[Dict[str, Any]]:
+	async def get_matchups(self, week: int, league_id: Optional[str] = None, *, force_refresh: bool = False, allow_stale: bool = True) -> List[Dict[str, Any]]:
 		league_id = league_id or self.default_league_id
 		key = f"matchups:{league_id}:{week}"
-		return await self._cached(key, 120.0, lambda: self._get(f"/league/{league_id}/matchups/{week}"), force_refresh=force_refresh)
+		return await self._cached(key, 120.0, lambda: self._get(f"/league/{league_id}/matchups/{week}"), force_refresh=force_refresh, allow_stale=allow_stale)
 
 	async def get_transactions(self, week: int, league_id: Optional[str] = None, *, force_refresh: bool = False) -> List[Dict[str, Any]]:
 		league_id = league_id or self.default_league_id
 		key = f"transactions:{league_id}:{week}"
 		return await self._cached(key, 300.0, lambda: self._get(f"/league/{league_id}/transactions/{week}"), force_refresh=force_refresh)
 
-	async def get_nfl_state(self, *, force_refresh: bool = False) -> Dict[str, Any]:
+	async def get_nfl_state(self, *, force_refresh: bool = False, allow_stale: bool = True) -> Dict[str, Any]:
+		if self._shared is not None:
+			return await self._shared.get_nfl_state(force_refresh=force_refresh, allow_stale=allow_stale)
 		key = "state:nfl"
-		return await self._cached(key, 30.0, lambda: self._get("/state/nfl"), force_refresh=force_refresh)
+		return await self._cached(key, 30.0, lambda: self._get("/state/nfl"), force_refresh=force_refresh, allow_stale=allow_stale)
 
-	# Players catalog is large; keep separate daily cache
-	async def get_players(self, force_refresh: bool = False) -> Dict[str, Any]:
-		now = time.time()
-		if not force_refresh and self._players_cache and (now - self._players_cache_ts) < 24 * 3600:
-			return self._players_cache
+	# Players catalog is large; keep separate daily cache backed by an on-disk snapshot
+	def _read_players_snapshot(self) -> Optional[PlayerCatalog]:
+		if not self.players_snapshot_path:
+			return None
+		try:
+			with open(self.players_snapshot_path, "rb") as f:
+				return PlayerCatalog.from_snapshot(pickle.load(f))
+		except Exception:
+			return None
+
+	def _write_players_snapshot(self, catalog: PlayerCatalog) -> None:
+		if not self.players_snapshot_path:
+			return
+		try:
+			Path(os.path.dirname(self.players_snapshot_path)).mkdir(parents=True, exist_ok=True)
+			tmp_path = self.players_snapshot_path + ".tmp"
+			with open(tmp_path, "wb") as f:
+				pickle.dump(catalog.to_snapshot(), f, protocol=pickle.HIGHEST_PROTOCOL)
+			os.replace(tmp_path, self.players_snapshot_path)
+		except Exception:
+			pass
+
+	def _build_players_catalog(self, players: Dict[str, Any], ts: float) -> PlayerCatalog:
+		catalog = PlayerCatalog.from_raw(players, fetched_ts=ts)
+		if self.players_snapshot_path:
+			try:
+				catalog.write_raw(players, os.path.splitext(self.players_snapshot_path)[0] + ".raw.jsonl")
+			except Exception:
+				pass
+			self._write_players_snapshot(catalog)
+		return catalog
+
+	async def _load_players_snapshot(self) -> None:
+		catalog = await asyncio.to_thread(self._read_players_snapshot)
+		if catalog and not self._players_cache:
+			self._players_cache = catalog
+			self._players_cache_ts = catalog.fetched_ts
+
+	async def warm_start(self) -> None:
+		"""Load the players snapshot from disk (if any) and kick off a background refresh when stale."""
+		if self._shared is not None:
+			return await self._shared.warm_start()
+		if self._snapshot_task is None:
+			self._snapshot_task = asyncio.ensure_future(self._load_players_snapshot())
+		await asyncio.shield(self._snapshot_task)
+		if time.time() - self._players_cache_ts >= PLAYERS_TTL_S:
+			self._refresh_players_in_background()
+
+	def _refresh_players_in_background(self) -> None:
+		self._refresh_in_background("players:nfl", self._fetch_players)
+
+	async def _fetch_players(self) -> PlayerCatalog:
 		data = await self._get("/players/nfl")
-		self._players_cache = data
-		self._players_cache_ts = now
-		return data
+		# The raw payload is only kept long enough to compact it and spill full records to disk
+		catalog = await asyncio.to_thread(self._build_players_catalog, data, time.time())
+		self._players_cache = catalog
+		self._players_cache_ts = catalog.fetched_ts
+		return catalog
+
+	async def get_players(self, force_refresh: bool = False) -> PlayerCatalog:
+		if self._shared is not None:
+			return await self._shared.get_players(force_refresh=force_refresh)
+		if self._snapshot_task is None or not self._snapshot_task.done():
+			await self.warm_start()
+		if not force_refresh and self._players_cache:
+			# Serve a stale catalog right away and refresh behind it
+			if (time.time() - self._players_cache_ts) >= PLAYERS_TTL_S:
+				self._refresh_players_in_background()
+			return self._players_cache
+		return await self._single_flight("players:nfl", self._fetch_players)
 
 	async def get_user_id_to_display_name(self, league_id: Optional[str] = None) -> Dict[str, str]:
 		users = await self.get_users(league_id)
@@ -117,6 +372,8 @@ class SleeperClient:
 		return summaries
 
 	async def get_trending_players(self, sport: str = "nfl", trend_type: str = "add", lookback_hours: int = 24, limit: int = 25, *, force_refresh: bool = False) -> List[Dict[str, Any]]:
+		if self._shared is not None:
+			return await self._shared.get_trending_players(sport, trend_type, lookback_hours, limit, force_refresh=force_refresh)
 		params = {"lookback_hours": lookback_hours, "limit": limit}
 		key = f"trending:{sport}:{trend_type}:{lookback_hours}:{limit}"
 		async def fetch() -> Any:
@@ -131,9 +388,25 @@ class SleeperClient:
 				raise
 		return await self._cached(key, 300.0, fetch, force_refresh=force_refresh)
 
-	async def get_player_lookup(self) -> Dict[str, Any]:
+	async def get_player_lookup(self) -> PlayerCatalog:
 		return await self.get_players()
 
+	async def get_search_index(self) -> PlayerSearchIndex:
+		catalog = await self.get_players()
+		if not catalog.has_derived("search"):
+			await asyncio.to_thread(get_search_index, catalog)
+		return get_search_index(catalog)
+
+	async def search_players(self, query: str, limit: int = 10) -> List[PlayerRecord]:
+		"""Ranked name search over the players catalog (shared by the API and agent tool)."""
+		index = await self.get_search_index()
+		return index.search(query, limit=limit)
+
+	async def get_player_raw(self, player_id: str) -> Optional[Dict[str, Any]]:
+		"""Full Sleeper record for one player, read from the on-disk side file."""
+		catalog = await self.get_players()
+		return await asyncio.to_thread(catalog.raw, player_id)
+
 	@staticmethod
 	def _player_view(p: Dict[str, Any]) -> Dict[str, Any]:
 		return {
@@ -230,26 +503,20 @@ class SleeperClient:
 		)
 		return {"adds": adds, "drops": drops}
 
-	async def get_player_id_fuzzy(self, name_query: str) -> Optional[Dict[str, str]]:
+	async def get_name_index(self) -> PlayerNameIndex:
 		catalog = await self.get_players()
-		# Build name lists lazily
-		names = []
-		name_to_id = {}
-		for pid, p in catalog.items():
-			full = p.get("full_name") or ((p.get("first_name") or "") + " " + (p.get("last_name") or "")).strip()
-			if full:
-				names.append(full)
-				name_to_id[full] = pid
-		if not names:
-			return None
-		nearest = process.extractOne(name_query, names, scorer=fuzz.WRatio)
-		if not nearest:
-			return None
-		best_name = nearest[0]
-		pid = name_to_id.get(best_name)
-		if not pid:
-			return None
-		return {"player_id": pid, "full_name": best_name}
+		if not catalog.has_derived("fuzzy"):
+			await asyncio.to_thread(get_name_index, catalog)
+		return get_name_index(catalog)
+
+	async def get_player_id_fuzzy(self, name_query: str) -> Optional[Dict[str, Any]]:
+		index = await self.get_name_index()
+		return index.resolve(name_query)
+
+	async def resolve_player_names(self, names: List[str], score_cutoff: float = 0.0) -> List[Optional[Dict[str, Any]]]:
+		"""Fuzzy-resolve many names (e.g. a pasted trade) in one batched rapidfuzz pass."""
+		index = await self.get_name_index()
+		return await asyncio.to_thread(index.resolve_many, list(names or []), score_cutoff)
 
 	async def build_roster_detail_for_week(self, roster_id: int, week: int, league_id: Optional[str] = None) -> Dict[str, Any]:
 		rosters = await self.get_rosters(league_id)
@@ -1,64 +1,190 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.append_writer import get_append_writer
 
 USER_DATA_ROOT = "/workspace/data/users"
 
 
 def _user_dir(user_id: str) -> Path:
-    p = Path(USER_DATA_ROOT) / user_id
-    p.mkdir(parents=True, exist_ok=True)
-    return p
+    # Created by the append writer on first flush
+    return Path(USER_DATA_ROOT) / user_id
 
 
-def append_chat(user_id: str, role: str, content: str) -> None:
+# What the profile summary covers: user questions among the last RECENT_CHAT chat lines and
+# event kinds among the last RECENT_EVENTS events
+RECENT_CHAT = 8
+RECENT_EVENTS = 50
+TAIL_BLOCK = 8192
+
+# user_id -> profile state, validated against the JSONL sizes whenever no write of ours is pending
+_profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_PROFILE_CACHE_SIZE = 1024
+
+
+def _tail_lines(fp: Path, limit: int) -> List[str]:
+    """Last `limit` non-empty lines, reading backwards in blocks; I/O is bounded by the lines returned."""
+    if limit <= 0 or not fp.exists():
+        return []
+    with open(fp, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = b""
+        while pos > 0 and buf.count(b"\n") <= limit:
+            step = min(TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+    lines = [x for x in buf.decode("utf-8", errors="replace").splitlines() if x.strip()]
+    # The first line may be cut mid-way unless we reached the start of the file
+    if pos > 0 and lines:
+        lines = lines[1:]
+    return lines[-limit:]
+
+
+def _read_tail(fp: Path, limit: int) -> List[Dict[str, Any]]:
+    out = []
+    for x in _tail_lines(fp, limit):
+        try:
+            out.append(json.loads(x))
+        except ValueError:
+            continue
+    return out
+
+
+def _size(fp: Path) -> int:
+    try:
+        return fp.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def _load_state(user_id: str, state: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+    """Validate state (or profile.json) against the JSONL sizes, rebuilding it from the file
+    tails if they moved on without us (another process appended, or no profile.json yet).
+    Blocking; returns (state, rebuilt)."""
     d = _user_dir(user_id)
-    fp = d / "chat_history.jsonl"
-    with open(fp, "a", encoding="utf-8") as f:
-        f.write(json.dumps({"ts": time.time(), "role": role, "content": content}, ensure_ascii=False) + "\n")
+    chat_fp, events_fp = d / "chat_history.jsonl", d / "events.jsonl"
+    chat_size, events_size = _size(chat_fp), _size(events_fp)
+    if state is None:
+        try:
+            with open(d / "profile.json", "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = None
+    if state is not None and state.get("chat_size") == chat_size and state.get("events_size") == events_size:
+        return state, False
+    return {
+        "chat_size": chat_size,
+        "events_size": events_size,
+        "chats": [[c.get("role"), (c.get("content") or "")[:120]] for c in _read_tail(chat_fp, RECENT_CHAT)],
+        "event_kinds": [e.get("kind") for e in _read_tail(events_fp, RECENT_EVENTS) if e.get("kind")],
+    }, True
+
+
+def _pending(user_id: str) -> bool:
+    # While our own appends are still queued in the writer the files lag the in-memory state
+    d, writer = _user_dir(user_id), get_append_writer()
+    return not (writer.settled(str(d / "chat_history.jsonl")) and writer.settled(str(d / "events.jsonl")))
+
+
+def _profile_state(user_id: str) -> Dict[str, Any]:
+    """Incrementally maintained summary inputs; blocking, for callers outside the event loop."""
+    state = _profiles.get(user_id)
+    if state is None or not _pending(user_id):
+        state, rebuilt = _load_state(user_id, state)
+        if rebuilt:
+            _save_profile(user_id, state)
+    _remember_profile(user_id, state)
+    return state
+
+
+async def _aprofile_state(user_id: str) -> Dict[str, Any]:
+    """_profile_state with the stat/read/rebuild in a worker thread."""
+    cached = _profiles.get(user_id)
+    if cached is not None and _pending(user_id):
+        _remember_profile(user_id, cached)
+        return cached
+    state, rebuilt = await asyncio.to_thread(_load_state, user_id, cached)
+    current = _profiles.get(user_id)
+    if current is not None and current is not cached:
+        # Another coroutine loaded or updated it meanwhile; don't fork the state
+        state = current
+    elif rebuilt:
+        _save_profile(user_id, state)
+    _remember_profile(user_id, state)
+    return state
+
+
+def _remember_profile(user_id: str, state: Dict[str, Any]) -> None:
+    _profiles[user_id] = state
+    _profiles.move_to_end(user_id)
+    while len(_profiles) > _PROFILE_CACHE_SIZE:
+        _profiles.popitem(last=False)
+
+
+def _save_profile(user_id: str, state: Dict[str, Any]) -> None:
+    get_append_writer().replace(str(_user_dir(user_id) / "profile.json"), json.dumps(state, ensure_ascii=False))
+
+
+def _append(fp: Path, entry: Dict[str, Any], size: int) -> int:
+    """Queue one JSON line; returns the file size once it is written."""
+    line = json.dumps(entry, ensure_ascii=False)
+    get_append_writer().append(str(fp), line)
+    return size + len(line.encode("utf-8")) + 1
+
+
+def _add_chat(user_id: str, state: Dict[str, Any], role: str, content: str) -> None:
+    fp = _user_dir(user_id) / "chat_history.jsonl"
+    state["chat_size"] = _append(fp, {"ts": time.time(), "role": role, "content": content}, state["chat_size"])
+    state["chats"] = (state["chats"] + [[role, (content or "")[:120]]])[-RECENT_CHAT:]
+    _save_profile(user_id, state)
+
+
+def _add_event(user_id: str, state: Dict[str, Any], kind: str, payload: Dict[str, Any]) -> None:
+    fp = _user_dir(user_id) / "events.jsonl"
+    state["events_size"] = _append(fp, {"ts": time.time(), "kind": kind, "data": payload}, state["events_size"])
+    if kind:
+        state["event_kinds"] = (state["event_kinds"] + [kind])[-RECENT_EVENTS:]
+    _save_profile(user_id, state)
+
+
+def append_chat(user_id: str, role: str, content: str) -> None:
+    _add_chat(user_id, _profile_state(user_id), role, content)
 
 
 def append_event(user_id: str, kind: str, payload: Dict[str, Any]) -> None:
-    d = _user_dir(user_id)
-    fp = d / "events.jsonl"
-    with open(fp, "a", encoding="utf-8") as f:
-        f.write(json.dumps({"ts": time.time(), "kind": kind, "data": payload}, ensure_ascii=False) + "\n")
+    _add_event(user_id, _profile_state(user_id), kind, payload)
+
+
+async def aappend_chat(user_id: str, role: str, content: str) -> None:
+    _add_chat(user_id, await _aprofile_state(user_id), role, content)
+
+
+async def aappend_event(user_id: str, kind: str, payload: Dict[str, Any]) -> None:
+    _add_event(user_id, await _aprofile_state(user_id), kind, payload)
 
 
 def read_recent_chat(user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
-    d = _user_dir(user_id)
-    fp = d / "chat_history.jsonl"
-    if not fp.exists():
-        return []
-    lines = fp.read_text(encoding="utf-8").splitlines()[-limit:]
-    return [json.loads(x) for x in lines if x.strip()]
+    return _read_tail(_user_dir(user_id) / "chat_history.jsonl", limit)
 
 
 def read_recent_events(user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
-    d = _user_dir(user_id)
-    fp = d / "events.jsonl"
-    if not fp.exists():
-        return []
-    lines = fp.read_text(encoding="utf-8").splitlines()[-limit:]
-    return [json.loads(x) for x in lines if x.strip()]
+    return _read_tail(_user_dir(user_id) / "events.jsonl", limit)
 
 
-def build_profile_summary(user_id: str, prefs: Dict[str, Any]) -> str:
-    chats = read_recent_chat(user_id, limit=8)
-    events = read_recent_events(user_id, limit=50)
-    recent_topics = []
-    for c in chats:
-        if c.get("role") == "user":
-            recent_topics.append(c.get("content", "")[:120])
-    event_kinds = {}
-    for e in events:
-        k = e.get("kind")
-        if k:
-            event_kinds[k] = event_kinds.get(k, 0) + 1
+def _summary(state: Dict[str, Any], prefs: Dict[str, Any]) -> str:
+    recent_topics = [content for role, content in state["chats"] if role == "user"]
+    event_kinds: Dict[str, int] = {}
+    for k in state["event_kinds"]:
+        event_kinds[k] = event_kinds.get(k, 0) + 1
     parts = []
     if prefs:
         parts.append(f"prefs={prefs}")
@@ -66,4 +192,12 @@ def build_profile_summary(user_id: str, prefs: Dict[str, Any]) -> str:
         parts.append(f"recent_questions={recent_topics}")
     if event_kinds:
         parts.append(f"events={event_kinds}")
-    return "; ".join(parts)
\ No newline at end of file
+    return "; ".join(parts)
+
+
+def build_profile_summary(user_id: str, prefs: Dict[str, Any]) -> str:
+    return _summary(_profile_state(user_id), prefs)
+
+
+async def abuild_profile_summary(user_id: str, prefs: Dict[str, Any]) -> str:
+    return _summary(await _aprofile_state(user_id), prefs)
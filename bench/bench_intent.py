@@ -0,0 +1,94 @@
+"""Accuracy and latency of the local intent classifier on the labeled eval set.
+
+Usage:
+    python bench/bench_intent.py [--threshold 0.6] [--llm-ms 700] [--live-llm]
+
+Reports overall accuracy, how many questions clear the confidence threshold (and their
+accuracy), local latency, and the LLM round trips saved. Without --live-llm the time saved is only an
+estimate from --llm-ms, the assumed classify round trip; with --live-llm (needs OPENAI_API_KEY)
+the below-threshold questions are sent to the configured LLM and its measured latency and
+accuracy are used instead.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.intent import CONFIDENCE_THRESHOLD, get_intent_classifier  # noqa: E402
+
+
+EVAL_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "intent_eval.jsonl")
+
+
+async def _llm_labels(questions, local_labels):
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    from app.agents.graph import SYSTEM_PROMPT, _llm
+    from app.services.intent import parse_label
+
+    llm = _llm("classify")
+    out = []
+    for q, local in zip(questions, local_labels):
+        t0 = time.perf_counter()
+        # Same fallbacks as classify_intent: an error or unparseable reply keeps the local label
+        try:
+            reply = await llm.ainvoke([SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=f"Question: {q}\nRespond with only the intent label.")])
+            label = parse_label(reply.content) or local
+        except Exception:
+            label = local
+        out.append((label, (time.perf_counter() - t0) * 1000))
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+    ap.add_argument("--llm-ms", type=float, default=700.0)
+    ap.add_argument("--live-llm", action="store_true")
+    args = ap.parse_args()
+
+    rows = [json.loads(line) for line in open(EVAL_PATH) if line.strip()]
+    clf = get_intent_classifier()
+    clf.classify("warm up")
+    preds, lat_us = [], []
+    for r in rows:
+        t0 = time.perf_counter()
+        label, conf = clf.classify(r["question"])
+        lat_us.append((time.perf_counter() - t0) * 1e6)
+        preds.append((label, conf))
+
+    n = len(rows)
+    correct = sum(p[0] == r["intent"] for p, r in zip(preds, rows))
+    confident = [(p, r) for p, r in zip(preds, rows) if p[1] >= args.threshold]
+    confident_ok = sum(p[0] == r["intent"] for p, r in confident)
+    fallback = [(p[0], r) for p, r in zip(preds, rows) if p[1] < args.threshold]
+
+    print(f"eval questions:            {n}")
+    print(f"local accuracy (all):      {correct / n:.1%}")
+    print(f"threshold:                 {args.threshold}")
+    print(f"answered locally:          {len(confident)} ({len(confident) / n:.1%}), accuracy {confident_ok / max(1, len(confident)):.1%}")
+    print(f"local latency:             p50 {statistics.median(lat_us):.0f} us, max {max(lat_us):.0f} us")
+
+    llm_ms = args.llm_ms
+    basis = f"estimate: assumed {llm_ms:.0f} ms each (--llm-ms)"
+    combined_ok = confident_ok
+    if args.live_llm and fallback:
+        results = asyncio.run(_llm_labels([r["question"] for _, r in fallback], [label for label, _ in fallback]))
+        llm_ms = statistics.mean(ms for _, ms in results)
+        basis = f"measured: mean of {len(results)} live calls, {llm_ms:.0f} ms each"
+        combined_ok += sum(label == r["intent"] for (label, _), (_, r) in zip(results, fallback))
+        print(f"LLM fallback:              {len(fallback)} calls, mean {llm_ms:.0f} ms")
+        print(f"combined accuracy:         {combined_ok / n:.1%}")
+    saved_s = len(confident) * llm_ms / 1000
+    print(f"LLM round trips saved:     {len(confident)}/{n}, ~{saved_s:.1f} s total ({basis})")
+
+
+if __name__ == "__main__":
+    main()
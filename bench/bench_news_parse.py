@@ -0,0 +1,90 @@
+"""Parse time and peak memory per news source: legacy whole-document parsing vs the streaming parsers.
+
+Usage:
+    python bench/bench_news_parse.py [fixtures_dir]
+
+Fixtures default to bench/fixtures/news (*.xml are RSS, *.html are player-news pages). A
+synthetic 20 MB page is also parsed to show the byte/item caps bounding the work.
+"""
+from __future__ import annotations
+
+import gc
+import os
+import re
+import sys
+import time
+import tracemalloc
+from xml.etree import ElementTree as ET
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.news_aggregator import MAX_FEED_BYTES, PARSE_CHUNK, parse_html, parse_rss  # noqa: E402
+
+
+def legacy_rss(content: bytes) -> int:
+    root = ET.fromstring(content)
+    return sum(1 for _ in root.findall(".//item"))
+
+
+def legacy_html(html: str) -> int:
+    n = 0
+    for m in re.finditer(r'<a[^>]+href="([^"]+)"[^>]*>([^<]{8,120})</a>', html, flags=re.IGNORECASE):
+        start = max(0, m.start() - 200); end = min(len(html), m.end() + 200)
+        snippet = re.sub(r"<[^>]+>", " ", html[start:end])
+        re.sub(r"\s+", " ", snippet).strip()
+        n += 1
+    return n
+
+
+def measure(fn, *args, repeat: int = 5):
+    gc.collect()
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best * 1000, peak / 1e6
+
+
+def capped_chunks(data: bytes):
+    data = data[:MAX_FEED_BYTES]
+    return [data[i:i + PARSE_CHUNK] for i in range(0, len(data), PARSE_CHUNK)]
+
+
+def main() -> None:
+    fixtures = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "fixtures", "news")
+    rows = []
+    for name in sorted(os.listdir(fixtures)):
+        path = os.path.join(fixtures, name)
+        with open(path, "rb") as f:
+            data = f.read()
+        if name.endswith(".xml"):
+            old = measure(legacy_rss, data)
+            new = measure(lambda d: len(parse_rss(capped_chunks(d), name)), data)
+        else:
+            old = measure(legacy_html, data.decode("utf-8", "replace"))
+            new = measure(lambda d: len(parse_html(capped_chunks(d), name, "https://example.com/news")), data)
+        rows.append((name, len(data), old, new))
+
+    # Oversized page: the legacy path parses all of it, the streaming path stops at the caps
+    big = b"<html><body>" + (b'<div><a href="/x">Some player headline here</a><p>' + b"filler " * 200 + b"</p></div>") * 12000
+    old = measure(legacy_html, big.decode(), repeat=1)
+    new = measure(lambda d: len(parse_html(capped_chunks(d), "big", "https://example.com")), big, repeat=1)
+    rows.append(("synthetic-20MB.html", len(big), old, new))
+    # Unclosed "<a " tags make the legacy regex rescan to the end of the page from every one of them
+    hostile = b"<html><body>" + (b"<a " + b"x" * 96 + b"\n") * 3000 + b"</body></html>"
+    old = measure(legacy_html, hostile.decode(), repeat=1)
+    new = measure(lambda d: len(parse_html(capped_chunks(d), "hostile", "https://example.com")), hostile, repeat=1)
+    rows.append(("synthetic-unclosed.html", len(hostile), old, new))
+
+    print(f"{'source':<22}{'bytes':>10}  {'legacy items':>12}{'ms':>9}{'peak MB':>9}  {'stream items':>12}{'ms':>9}{'peak MB':>9}")
+    for name, size, (o_items, o_ms, o_mb), (n_items, n_ms, n_mb) in rows:
+        print(f"{name:<22}{size:>10}  {o_items:>12}{o_ms:>9.1f}{o_mb:>9.2f}  {n_items:>12}{n_ms:>9.1f}{n_mb:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Compare resident memory of the raw /players/nfl payload vs PlayerCatalog.
+
+Usage:
+    python bench/bench_player_catalog.py [path/to/players_nfl.json]
+
+Without a path, a synthetic catalog shaped like Sleeper's (about 10k players with the usual
+field set) is generated.
+"""
+from __future__ import annotations
+
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.player_catalog import PlayerCatalog  # noqa: E402
+
+
+POSITIONS = ["QB", "RB", "WR", "TE", "K", "DEF", "LB", "DB", "DL", "OL"]
+TEAMS = ["ARI", "ATL", "BAL", "BUF", "CAR", "CHI", "CIN", "CLE", "DAL", "DEN", "DET", "GB", "HOU", "IND", "JAX", "KC",
+         "LAC", "LAR", "LV", "MIA", "MIN", "NE", "NO", "NYG", "NYJ", "PHI", "PIT", "SEA", "SF", "TB", "TEN", "WAS", None]
+FIRST = ["Josh", "Patrick", "Justin", "Christian", "Tyreek", "Travis", "Davante", "Derrick", "Saquon", "Jalen", "Amon-Ra", "CeeDee"]
+LAST = ["Allen", "Mahomes", "Jefferson", "McCaffrey", "Hill", "Kelce", "Adams", "Henry", "Barkley", "Hurts", "St. Brown", "Lamb"]
+
+
+def synthetic_players(n: int = 10_000) -> dict:
+    rnd = random.Random(7)
+    players = {}
+    for i in range(n):
+        pid = str(1000 + i)
+        first = rnd.choice(FIRST)
+        last = f"{rnd.choice(LAST)}{i}"
+        pos = rnd.choice(POSITIONS)
+        players[pid] = {
+            "player_id": pid, "first_name": first, "last_name": last, "full_name": f"{first} {last}",
+            "search_first_name": first.lower(), "search_last_name": last.lower(), "search_full_name": f"{first}{last}".lower(),
+            "search_rank": rnd.randint(1, 9_999_999), "position": pos, "fantasy_positions": [pos], "team": rnd.choice(TEAMS),
+            "status": rnd.choice(["Active", "Inactive", "Injured Reserve", None]), "injury_status": rnd.choice([None, "Questionable", "Out"]),
+            "injury_body_part": None, "injury_notes": None, "injury_start_date": None, "practice_participation": None,
+            "practice_description": None, "age": rnd.randint(21, 38), "birth_date": f"199{rnd.randint(0, 9)}-0{rnd.randint(1, 9)}-1{rnd.randint(0, 9)}",
+            "birth_city": None, "birth_state": None, "birth_country": None, "height": str(rnd.randint(68, 78)), "weight": str(rnd.randint(180, 320)),
+            "college": rnd.choice(["Alabama", "Ohio State", "LSU", "Georgia", "Wyoming"]), "high_school": None, "years_exp": rnd.randint(0, 15),
+            "number": rnd.randint(1, 99), "depth_chart_position": pos, "depth_chart_order": rnd.randint(1, 4), "active": rnd.random() > 0.3,
+            "sport": "nfl", "hashtag": f"#{first}{last}-NFL-{pos}", "metadata": {"channel_id": str(rnd.getrandbits(60))},
+            "news_updated": rnd.randint(1_600_000_000_000, 1_700_000_000_000), "espn_id": rnd.randint(1, 5_000_000),
+            "yahoo_id": rnd.randint(1, 50_000), "sportradar_id": f"{rnd.getrandbits(128):032x}", "gsis_id": None,
+            "rotowire_id": rnd.randint(1, 20_000), "rotoworld_id": None, "fantasy_data_id": rnd.randint(1, 30_000),
+            "stats_id": None, "swish_id": rnd.randint(1, 1_000_000), "pandascore_id": None, "oddsjam_id": None,
+            "opta_id": None, "team_abbr": None, "team_changed_at": None, "competitions": [],
+        }
+    return players
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current, elapsed
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as f:
+            payload = f.read()
+    else:
+        payload = json.dumps(synthetic_players()).encode("utf-8")
+
+    raw, raw_bytes, raw_s = measure(lambda: json.loads(payload))
+    catalog, cat_bytes, cat_s = measure(lambda: PlayerCatalog.from_raw(json.loads(payload)))
+    del raw
+
+    print(f"players:            {len(catalog)}")
+    print(f"raw dict resident:  {raw_bytes / 1e6:8.2f} MB  (parse {raw_s * 1000:.0f} ms)")
+    print(f"PlayerCatalog:      {cat_bytes / 1e6:8.2f} MB  (parse+compact {cat_s * 1000:.0f} ms)")
+    print(f"reduction:          {raw_bytes / max(cat_bytes, 1):8.1f}x")
+
+    t0 = time.perf_counter()
+    snap = PlayerCatalog.from_snapshot(catalog.to_snapshot())
+    print(f"snapshot reload:    {(time.perf_counter() - t0) * 1000:8.1f} ms ({len(snap)} players)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""OpenAI-compatible fake chat completions server for exercising the LLM router locally.
+
+Usage:
+    python bench/fake_llm_server.py [--port 8901] [--ttft-ms 300] [--token-ms 20] [--status-rate 0.0] [--status 429] [--slow-rate 0.0] [--slow-ms 3000]
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8901/v1 (any OPENAI_API_KEY), and
+a second instance with GROQ_BASE_URL=http://127.0.0.1:8902 plus GROQ_API_KEY to test failover.
+--status-rate answers that fraction of requests with --status (429 sends Retry-After: 1);
+--slow-rate delays that fraction by --slow-ms to trigger hedging.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def build_app(args: argparse.Namespace) -> FastAPI:
+    app = FastAPI()
+    counts = {"requests": 0, "errors": 0, "slow": 0}
+
+    @app.get("/stats")
+    async def stats():
+        return counts
+
+    @app.post("/v1/chat/completions")
+    @app.post("/openai/v1/chat/completions")
+    async def chat(request: Request):
+        body = await request.json()
+        counts["requests"] += 1
+        if random.random() < args.status_rate:
+            counts["errors"] += 1
+            headers = {"retry-after": "1"} if args.status == 429 else {}
+            return JSONResponse(status_code=args.status, headers=headers, content={"error": {"message": "fake error", "type": "fake", "code": str(args.status)}})
+        ttft = args.ttft_ms
+        if random.random() < args.slow_rate:
+            counts["slow"] += 1
+            ttft = args.slow_ms
+        question = str((body.get("messages") or [{}])[-1].get("content", ""))[-60:]
+        words = f"[{args.name}] answer to: {question}".split()
+        cid, model, created = f"chatcmpl-{uuid.uuid4().hex[:12]}", body.get("model", "fake"), int(time.time())
+        if not body.get("stream"):
+            await asyncio.sleep((ttft + args.token_ms * len(words)) / 1000)
+            return {
+                "id": cid, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": len(words), "total_tokens": 10 + len(words)},
+            }
+
+        async def events():
+            def chunk(delta, finish=None):
+                return "data: " + json.dumps({"id": cid, "object": "chat.completion.chunk", "created": created, "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}) + "\n\n"
+            yield chunk({"role": "assistant", "content": ""})
+            await asyncio.sleep(ttft / 1000)
+            for i, w in enumerate(words):
+                yield chunk({"content": ("" if i == 0 else " ") + w})
+                await asyncio.sleep(args.token_ms / 1000)
+            yield chunk({}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8901)
+    ap.add_argument("--name", default="fake")
+    ap.add_argument("--ttft-ms", type=float, default=300)
+    ap.add_argument("--token-ms", type=float, default=20)
+    ap.add_argument("--status-rate", type=float, default=0.0)
+    ap.add_argument("--status", type=int, default=429)
+    ap.add_argument("--slow-rate", type=float, default=0.0)
+    ap.add_argument("--slow-ms", type=float, default=3000)
+    args = ap.parse_args()
+    uvicorn.run(build_app(args), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
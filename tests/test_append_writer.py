@@ -0,0 +1,104 @@
+import asyncio
+import gzip
+import threading
+
+from app.services.append_writer import AppendWriter
+
+
+def _slow(writer, gate):
+    write = writer._write
+
+    def slow_write(lines, replace):
+        gate.wait(5)
+        return write(lines, replace)
+
+    writer._write = slow_write
+
+
+def test_appends_during_a_slow_flush_stay_counted(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    writer = AppendWriter(flush_bytes=1 << 30, flush_interval_s=60)
+    gate = threading.Event()
+
+    async def run():
+        writer.append(path, "a" * 9)
+        _slow(writer, gate)
+        flushing = asyncio.create_task(writer.flush())
+        await asyncio.sleep(0.05)
+        assert not writer.settled(path)
+        writer.append(path, "b" * 19)
+        writer.append(path, "c" * 29)
+        gate.set()
+        await flushing
+        assert writer.pending_bytes(path) == 50
+        assert writer.cache_stats()["pending_bytes"] == 50
+        await writer.aclose()
+        assert writer.pending_bytes(path) == 0
+
+    asyncio.run(run())
+    assert open(path).read().split() == ["a" * 9, "b" * 19, "c" * 29]
+
+
+def test_size_trigger_still_fires_after_a_flush_during_appends(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    writer = AppendWriter(flush_bytes=100, flush_interval_s=60)
+    gate = threading.Event()
+
+    async def run():
+        writer.append(path, "x" * 99)  # reaches flush_bytes, wakes the flusher
+        _slow(writer, gate)
+        await asyncio.sleep(0.05)
+        for _ in range(10):
+            writer.append(path, "y" * 9)
+        gate.set()
+        for _ in range(50):
+            await asyncio.sleep(0.02)
+            if writer.settled(path):
+                break
+        assert writer.settled(path)
+        await writer.aclose()
+
+    asyncio.run(run())
+    assert sum(1 for _ in open(path)) == 11
+
+
+def test_rotation_keeps_the_newest_archives(tmp_path):
+    path = str(tmp_path / "logs.jsonl")
+    writer = AppendWriter(flush_bytes=1000, flush_interval_s=0.01)
+    writer.rotate(path, 2000, backups=2)
+
+    async def run():
+        for i in range(2000):
+            writer.append(path, f"{i:05d}")
+            if i % 50 == 0:
+                await asyncio.sleep(0.02)
+        await writer.aclose()
+
+    asyncio.run(run())
+    archives = sorted(tmp_path.glob("logs.jsonl.*.gz"))
+    assert len(archives) == 2
+    kept = [int(x) for a in archives for x in gzip.open(a).read().split()]
+    kept += [int(x) for x in open(path).read().split()] if (tmp_path / "logs.jsonl").exists() else []
+    assert kept == list(range(kept[0], 2000))
+
+
+def test_writes_inline_without_a_loop(tmp_path):
+    path = str(tmp_path / "sub" / "log.jsonl")
+    writer = AppendWriter()
+    writer.append(path, "one")
+    writer.replace(str(tmp_path / "sub" / "state.json"), "{}")
+    assert open(path).read() == "one\n"
+    assert writer.settled(path)
+
+
+def test_drain_writes_what_a_finished_loop_left_queued(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    writer = AppendWriter(flush_bytes=1 << 30, flush_interval_s=60)
+
+    async def run():
+        writer.append(path, "queued")
+
+    asyncio.run(run())
+    writer.drain()
+    assert open(path).read() == "queued\n"
+    assert writer.settled(path) and writer.pending_bytes(path) == 0
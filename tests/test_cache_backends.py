@@ -0,0 +1,228 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.cache_backends import MemoryBackend, RedisBackend, SQLiteBackend, make_backend
+
+
+class RespStandIn:
+    """In-process RESP server with just what RedisBackend uses: AUTH, SELECT, GET, SET [PX], DEL."""
+
+    def __init__(self, password=None):
+        self.password = password
+        self.dbs = {}
+        self.commands = []
+        self.connections = 0
+        self.reply_delay = {}  # key -> seconds to wait before answering a GET for it
+        self._writers = []
+        self._server = None
+        self.port = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.drop_connections()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def drop_connections(self):
+        for w in self._writers:
+            w.close()
+        self._writers.clear()
+
+    async def _read_command(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        assert line[:1] == b"*"
+        args = []
+        for _ in range(int(line[1:-2])):
+            size = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(size + 2))[:-2])
+        return args
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        self._writers.append(writer)
+        db, authed = 0, self.password is None
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    return
+                cmd = args[0].decode().upper()
+                self.commands.append(cmd)
+                data = self.dbs.setdefault(db, {})
+                if cmd == "AUTH":
+                    authed = args[1].decode() == self.password
+                    writer.write(b"+OK\r\n" if authed else b"-WRONGPASS invalid password\r\n")
+                elif not authed:
+                    writer.write(b"-NOAUTH Authentication required.\r\n")
+                elif cmd == "SELECT":
+                    db = int(args[1])
+                    writer.write(b"+OK\r\n")
+                elif cmd == "GET":
+                    await asyncio.sleep(self.reply_delay.get(args[1], 0))
+                    value, expires = data.get(args[1], (None, None))
+                    if value is None or (expires is not None and time.time() >= expires):
+                        data.pop(args[1], None)
+                        writer.write(b"$-1\r\n")
+                    else:
+                        writer.write(b"$%d\r\n%s\r\n" % (len(value), value))
+                elif cmd == "SET":
+                    expires = time.time() + int(args[4]) / 1000 if len(args) > 4 and args[3].upper() == b"PX" else None
+                    data[args[1]] = (args[2], expires)
+                    writer.write(b"+OK\r\n")
+                elif cmd == "DEL":
+                    writer.write(b":%d\r\n" % (data.pop(args[1], None) is not None))
+                else:
+                    writer.write(b"-ERR unknown command\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+
+
+def _with_stand_in(test, password=None):
+    async def run():
+        server = await RespStandIn(password).start()
+        try:
+            await test(server)
+        finally:
+            await server.stop()
+
+    asyncio.run(run())
+
+
+def test_resp_roundtrip_and_delete():
+    async def test(server):
+        backend = RedisBackend(port=server.port)
+        assert await backend.get("missing") is None
+        await backend.set("k", {"a": [1, 2], "name": "Bijan Robinson’s"}, 123.5, 60)
+        assert await backend.get("k") == (123.5, {"a": [1, 2], "name": "Bijan Robinson’s"})
+        assert list(server.dbs[0]) == [b"dynasty:k"]
+        await backend.delete("k")
+        assert await backend.get("k") is None
+        assert server.dbs[0] == {} and server.connections == 1
+        await backend.close()
+
+    _with_stand_in(test)
+
+
+def test_resp_retention_expires_entries():
+    async def test(server):
+        backend = RedisBackend(port=server.port)
+        await backend.set("k", 1, time.time(), 0.05)
+        assert (await backend.get("k"))[1] == 1
+        await asyncio.sleep(0.1)
+        assert await backend.get("k") is None
+        await backend.close()
+
+    _with_stand_in(test)
+
+
+def test_resp_auth_and_db_from_url():
+    async def test(server):
+        backend = make_backend(f"redis://:s3cret@127.0.0.1:{server.port}/2")
+        assert isinstance(backend, RedisBackend) and backend.db == 2
+        await backend.set("k", "v", 1.0, 60)
+        assert server.commands[:2] == ["AUTH", "SELECT"]
+        assert list(server.dbs[2]) == [b"dynasty:k"]
+        other = RedisBackend(port=server.port, password="s3cret")
+        assert await other.get("k") is None
+        await backend.close()
+        await other.close()
+
+    _with_stand_in(test, password="s3cret")
+
+
+def test_resp_error_reply_is_raised():
+    async def test(server):
+        backend = RedisBackend(port=server.port, password="wrong")
+        for _ in range(2):
+            # A failed AUTH must not leave an unauthenticated connection behind
+            with pytest.raises(RuntimeError, match="WRONGPASS"):
+                await backend.get("k")
+        assert server.connections == 2
+        await backend.close()
+
+    _with_stand_in(test, password="s3cret")
+
+
+def test_resp_reconnects_after_the_server_drops_the_connection():
+    async def test(server):
+        backend = RedisBackend(port=server.port)
+        await backend.set("k", "v", 1.0, 60)
+        server.drop_connections()
+        await asyncio.sleep(0.01)
+        assert await backend.get("k") == (1.0, "v")
+        assert server.connections == 2
+        await backend.close()
+
+    _with_stand_in(test)
+
+
+def test_resp_cancelled_get_does_not_leak_its_reply_to_the_next_command():
+    async def test(server):
+        backend = RedisBackend(port=server.port)
+        await backend.set("a", "A", 1.0, 60)
+        await backend.set("b", "B", 1.0, 60)
+        server.reply_delay[b"dynasty:a"] = 0.1
+        # As _ask_versions' wait_for does to a backend read through SleeperClient._cached
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(backend.get("a"), 0.02)
+        assert await backend.get("b") == (1.0, "B")
+        await asyncio.sleep(0.15)
+        assert await backend.get("a") == (1.0, "A")
+        await backend.close()
+
+    _with_stand_in(test)
+
+
+def test_resp_concurrent_commands_share_the_connection():
+    async def test(server):
+        backend = RedisBackend(port=server.port)
+        await asyncio.gather(*(backend.set(f"k{i}", i, 1.0, 60) for i in range(50)))
+        values = await asyncio.gather(*(backend.get(f"k{i}") for i in range(50)))
+        assert [v[1] for v in values] == list(range(50))
+        assert server.connections == 1
+        await backend.close()
+
+    _with_stand_in(test)
+
+
+def test_unreachable_server_raises():
+    async def run():
+        server = await RespStandIn().start()
+        port = server.port
+        await server.stop()
+        backend = RedisBackend(port=port, timeout_s=0.5)
+        with pytest.raises(OSError):
+            await backend.get("k")
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("factory", [lambda tmp: MemoryBackend(), lambda tmp: SQLiteBackend(str(tmp / "cache.sqlite3"))], ids=["memory", "sqlite"])
+def test_local_backends_match_the_contract(tmp_path, factory):
+    async def run():
+        backend = factory(tmp_path)
+        assert await backend.get("k") is None
+        await backend.set("k", {"v": 1}, 42.0, 60)
+        assert await backend.get("k") == (42.0, {"v": 1})
+        await backend.set("gone", 1, 1.0, 0)
+        assert await backend.get("gone") is None
+        await backend.delete("k")
+        assert await backend.get("k") is None
+        await backend.close()
+
+    asyncio.run(run())
+
+
+def test_make_backend_rejects_unknown_schemes():
+    assert isinstance(make_backend(None), MemoryBackend)
+    with pytest.raises(ValueError):
+        make_backend("memcached://localhost")
@@ -0,0 +1,30 @@
+from app.services.news_tagger import NewsTagger
+from app.services.player_catalog import PlayerCatalog
+
+
+def _catalog():
+    return PlayerCatalog.from_raw({
+        "1": {"first_name": "Justin", "last_name": "Jefferson", "position": "WR", "team": "MIN"},
+        "2": {"first_name": "Bijan", "last_name": "Robinson", "position": "RB", "team": "ATL"},
+        "3": {"first_name": "Brian", "last_name": "Robinson", "position": "RB", "team": "WAS"},
+        "4": {"first_name": "Ja'Marr", "last_name": "Chase", "position": "WR", "team": "CIN"},
+    })
+
+
+def test_possessive_names_are_tagged():
+    tagger = NewsTagger(_catalog())
+    assert tagger.tag("Justin Jefferson's hamstring") == {"1"}
+    assert tagger.tag("Bijan Robinson’s big day") == {"2"}
+    assert tagger.tag("Ja'Marr Chase's catch") == {"4"}
+
+
+def test_whole_words_only():
+    tagger = NewsTagger(_catalog())
+    assert tagger.tag("Justin Jeffersonville fair") == set()
+
+
+def test_ambiguous_initial_tags_nobody():
+    tagger = NewsTagger(_catalog())
+    assert tagger.tag("B. Robinson ruled out") == set()
+    assert tagger.tag("J. Jefferson limited") == {"1"}
+    assert tagger.tag("Brian Robinson and Bijan Robinson split work") == {"2", "3"}
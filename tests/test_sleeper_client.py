@@ -0,0 +1,211 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import sleeper_client as sc
+from app.services.cache_backends import MemoryBackend
+from app.services.sleeper_client import SleeperClient
+
+
+class FakeUpstream:
+    """Stands in for SleeperClient._get: counts calls per path and answers after a delay."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = {}
+        self.fail = False
+
+    async def __call__(self, path, params=None):
+        self.calls[path] = self.calls.get(path, 0) + 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return {"path": path, "n": self.calls[path]}
+
+
+def _client(upstream):
+    client = SleeperClient(default_league_id="L1", players_snapshot_path=None, backend=MemoryBackend())
+    client._get = upstream
+    return client
+
+
+def _run(test):
+    async def run():
+        upstream = FakeUpstream()
+        client = _client(upstream)
+        try:
+            await test(client, upstream)
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+
+
+def test_concurrent_misses_share_one_upstream_call():
+    async def test(client, upstream):
+        results = await asyncio.gather(*(client.get_nfl_state() for _ in range(20)))
+        assert upstream.calls == {"/state/nfl": 1}
+        assert all(r == results[0] for r in results)
+        assert client.stats["issued"] == 1 and client.stats["coalesced"] == 19
+        # Fresh entries are served without another call
+        await client.get_nfl_state()
+        assert upstream.calls == {"/state/nfl": 1}
+
+    _run(test)
+
+
+def test_one_cancelled_caller_does_not_cancel_the_shared_fetch():
+    async def test(client, upstream):
+        first = asyncio.ensure_future(client.get_nfl_state())
+        second = asyncio.ensure_future(client.get_nfl_state())
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert (await second)["n"] == 1
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert upstream.calls == {"/state/nfl": 1}
+
+    _run(test)
+
+
+def test_errors_are_shared_but_not_cached():
+    async def test(client, upstream):
+        upstream.fail = True
+        results = await asyncio.gather(*(client.get_nfl_state() for _ in range(5)), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert upstream.calls == {"/state/nfl": 1}
+        upstream.fail = False
+        assert (await client.get_nfl_state())["n"] == 2
+
+    _run(test)
+
+
+def test_stale_entry_is_served_while_one_background_refresh_runs(monkeypatch):
+    monkeypatch.setattr(sc, "STALE_WHILE_REVALIDATE", True)
+
+    async def test(client, upstream):
+        stale = {"path": "/state/nfl", "n": 0}
+        client._store("state:nfl", time.time() - 60, stale)  # TTL is 30 s; still within STALE_FACTOR
+        t0 = time.perf_counter()
+        results = await asyncio.gather(*(client.get_nfl_state() for _ in range(10)))
+        assert time.perf_counter() - t0 < upstream.delay
+        assert all(r == stale for r in results)
+        assert client.stats["stale_served"] == 10 and client.stats["background_refreshes"] == 1
+        await asyncio.sleep(upstream.delay * 3)
+        assert upstream.calls == {"/state/nfl": 1}
+        fresh = await client.get_nfl_state()
+        assert fresh["n"] == 1 and upstream.calls == {"/state/nfl": 1}
+
+    _run(test)
+
+
+def test_too_stale_entry_waits_for_the_fetch(monkeypatch):
+    monkeypatch.setattr(sc, "STALE_WHILE_REVALIDATE", True)
+
+    async def test(client, upstream):
+        client._store("state:nfl", time.time() - 30 * sc.STALE_FACTOR - 1, {"n": 0})
+        assert (await client.get_nfl_state())["n"] == 1
+        assert client.stats["stale_served"] == 0
+
+    _run(test)
+
+
+def test_without_swr_expired_entries_are_refetched_inline(monkeypatch):
+    monkeypatch.setattr(sc, "STALE_WHILE_REVALIDATE", False)
+
+    async def test(client, upstream):
+        client._store("state:nfl", time.time() - 60, {"n": 0})
+        results = await asyncio.gather(*(client.get_nfl_state() for _ in range(5)))
+        assert [r["n"] for r in results] == [1] * 5
+        assert upstream.calls == {"/state/nfl": 1}
+
+    _run(test)
+
+
+def test_failed_background_refresh_keeps_serving_stale_and_retries(monkeypatch):
+    monkeypatch.setattr(sc, "STALE_WHILE_REVALIDATE", True)
+
+    async def test(client, upstream):
+        client._store("state:nfl", time.time() - 60, {"n": 0})
+        upstream.fail = True
+        assert (await client.get_nfl_state())["n"] == 0
+        await asyncio.sleep(upstream.delay * 2)
+        upstream.fail = False
+        assert (await client.get_nfl_state())["n"] == 0
+        await asyncio.sleep(upstream.delay * 2)
+        assert (await client.get_nfl_state())["n"] == 2
+        assert upstream.calls == {"/state/nfl": 2}
+
+    _run(test)
+
+
+def test_warmer_refreshes_hot_keys_before_they_expire():
+    async def test(client, upstream):
+        await client.get_nfl_state()
+        ts, _ = client._cache["state:nfl"]
+        client._cache["state:nfl"] = (ts - 25, client._cache["state:nfl"][1])  # 5 s of TTL left
+        client._warm_once(lead_s=10)
+        client._warm_once(lead_s=10)  # already in flight: not issued twice
+        await asyncio.sleep(upstream.delay * 2)
+        assert upstream.calls == {"/state/nfl": 2}
+        assert time.time() - client._cache["state:nfl"][0] < 1
+
+    _run(test)
+
+
+def test_fetches_are_shared_through_the_backend():
+    async def run():
+        upstream = FakeUpstream()
+        backend = MemoryBackend()
+        a = SleeperClient(players_snapshot_path=None, backend=backend)
+        b = SleeperClient(players_snapshot_path=None, backend=backend)
+        a._get = b._get = upstream
+        try:
+            assert await a.get_nfl_state() == await b.get_nfl_state()
+            assert upstream.calls == {"/state/nfl": 1}
+        finally:
+            await a.close()
+            await b.close()
+
+    asyncio.run(run())
+
+
+def test_data_versions_wait_for_the_refetch_instead_of_serving_stale(monkeypatch):
+    monkeypatch.setattr(sc, "STALE_WHILE_REVALIDATE", True)
+
+    async def test(client, upstream):
+        now = time.time()
+        client._store("state:nfl", now, {"week": 3})
+        client._store("rosters:L1", now - 200, [])  # expired (120 s TTL) but within STALE_FACTOR
+        client._store("matchups:L1:3", now, [])
+        before = client.data_version("rosters:L1")
+        versions = await client.data_versions()
+        assert upstream.calls == {"/league/L1/rosters": 1}
+        assert client.stats["stale_served"] == 0
+        assert versions["rosters:L1"] != before
+        assert versions["rosters:L1"] == client.data_version("rosters:L1")
+
+    _run(test)
+
+
+def test_registry_closes_an_evicted_client_only_once_its_fetch_finishes():
+    from app.services.providers import SleeperRegistry
+
+    async def test(client, upstream):
+        registry = SleeperRegistry(client, max_size=1)
+        league = registry.get("L2")
+        league._get = upstream
+        pending = asyncio.ensure_future(league.get_rosters())
+        await asyncio.sleep(0.01)
+        registry.get("L3")  # evicts L2 mid-fetch
+        registry.get("L3")
+        assert league.busy and registry._retired == [league]
+        assert (await pending)["n"] == 1
+        assert "rosters:L2" in league._cache  # not closed under the caller
+        registry.get("L3")  # the next sweep closes it
+        await asyncio.sleep(0.01)
+        assert not league._cache and not registry._retired and not registry._closing
+        await registry.aclose()
+
+    _run(test)